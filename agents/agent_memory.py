@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List, Optional
+
+# Folds evicted entries into a session's running summary: (summary, evicted data) -> new summary
+Compactor = Callable[[Optional[Dict[str, Any]], List[Dict[str, Any]]], Dict[str, Any]]
+
+DEFAULT_SESSION = "default"
+
+
+class MemoryEntry:
+    """One remembered item with the monotonic time it was added"""
+
+    __slots__ = ("data", "created_at")
+
+    def __init__(self, data: Dict[str, Any], created_at: float):
+        self.data = data
+        self.created_at = created_at
+
+
+class _SessionMemory:
+    """Ring buffer of one session's entries plus the summary of compacted ones"""
+
+    __slots__ = ("entries", "summary")
+
+    def __init__(self, capacity: int):
+        self.entries = deque(maxlen=capacity)
+        self.summary = None
+
+
+class AgentMemory:
+    """Bounded, per-session agent memory.
+
+    Each session keeps at most capacity entries in a ring buffer (O(1) append and
+    evict) and entries older than ttl are dropped. Sessions are kept in LRU order and
+    capped at max_sessions, so a long-running worker never grows without bound.
+    Entries pushed out of a full buffer are handed to the optional compactor, which
+    folds them into a per-session summary.
+    """
+
+    def __init__(self, capacity: int = 20, ttl: float = 0.0, max_sessions: int = 1000,
+                 compactor: Optional[Compactor] = None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.compactor = compactor
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, data: Dict[str, Any], session_id: Optional[str] = None):
+        """Append an entry to a session, compacting the entry it pushes out"""
+        session_id = session_id or DEFAULT_SESSION
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = _SessionMemory(self.capacity)
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+
+            evicted = []
+            if len(session.entries) == session.entries.maxlen:
+                evicted.append(session.entries[0].data)
+            session.entries.append(MemoryEntry(data, now))
+            self._compact(session, evicted)
+
+    def get(self, session_id: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Unexpired entries of a session, oldest first (the last limit entries if given)"""
+        with self._lock:
+            session = self._sessions.get(session_id or DEFAULT_SESSION)
+            if session is None:
+                return []
+            self._expire(session, time.monotonic())
+            entries = list(session.entries)
+        if limit is not None:
+            entries = entries[-limit:] if limit > 0 else []
+        return [entry.data for entry in entries]
+
+    def summary(self, session_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Compacted summary of a session's older entries, if any"""
+        with self._lock:
+            session = self._sessions.get(session_id or DEFAULT_SESSION)
+            return session.summary if session is not None else None
+
+    def clear(self, session_id: Optional[str] = None):
+        """Forget one session, or every session when none is given"""
+        with self._lock:
+            if session_id is None:
+                self._sessions.clear()
+            else:
+                self._sessions.pop(session_id, None)
+
+    def session_count(self) -> int:
+        """Number of sessions held"""
+        return len(self._sessions)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(session.entries) for session in self._sessions.values())
+
+    def _expire(self, session: _SessionMemory, now: float):
+        """Drop entries older than ttl from the front of the buffer (lock must be held)"""
+        if self.ttl <= 0:
+            return
+        expired = []
+        entries = session.entries
+        while entries and now - entries[0].created_at >= self.ttl:
+            expired.append(entries.popleft().data)
+        self._compact(session, expired)
+
+    def _compact(self, session: _SessionMemory, evicted: List[Dict[str, Any]]):
+        """Fold evicted entries into the session summary (lock must be held)"""
+        if not evicted or self.compactor is None:
+            return
+        try:
+            session.summary = self.compactor(session.summary, evicted)
+        except Exception as e:
+            print(f"Error compacting agent memory: {e}")
@@ -1,37 +1,69 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
-from langchain_mistralai import ChatMistralAI
+from typing import Dict, Any, Callable, List, Optional
+import asyncio
 import config
+from services.llm_registry import llm_registry
+from services.quote_cache import QuoteCache
+from agents.agent_memory import AgentMemory
+from data.portfolio_snapshot import PortfolioSnapshot
 
 class BaseAgent(ABC):
     """Base class for all agents in the system"""
     
+    # Per-agent LLM overrides; None uses the registry defaults
+    llm_model: Optional[str] = None
+    llm_temperature: Optional[float] = None
+    
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
-        self.llm = ChatMistralAI(
-            model="mistral-large-latest",
-            mistral_api_key=config.MISTRAL_API_KEY,
-            temperature=0.7
+        self.memory = AgentMemory(
+            capacity=config.AGENT_MEMORY_CAPACITY,
+            ttl=config.AGENT_MEMORY_TTL_SECONDS,
+            max_sessions=config.AGENT_MEMORY_MAX_SESSIONS
+        )
+        # Computed analyses per (analysis, portfolio, snapshot version); versions never repeat, so no TTL
+        self.analysis_cache = QuoteCache(
+            ttl=float("inf"),
+            max_size=config.AGENT_ANALYSIS_CACHE_SIZE,
+            refresh_workers=1,
+            name=f"{name} analysis"
         )
-        self.memory = []
+    
+    @property
+    def llm(self):
+        """Chat model for this agent from the shared registry (created on first use)"""
+        return llm_registry.get(self.llm_model, self.llm_temperature)
     
     @abstractmethod
     def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process input and return output"""
         pass
     
-    def add_to_memory(self, data: Dict[str, Any]):
-        """Add data to agent memory"""
-        self.memory.append(data)
+    async def aprocess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Async process hook; runs the blocking process() in a worker thread by default"""
+        return await asyncio.to_thread(self.process, input_data)
+    
+    def memoize_analysis(self, analysis: str, snapshot: PortfolioSnapshot, compute: Callable[[], Any]) -> Any:
+        """Result of compute for this snapshot, computed at most once per snapshot version.
+        
+        Concurrent callers for the same version share one computation. Cache the
+        structured analysis, not language-specific text, so every rendering reuses it.
+        """
+        key = f"{analysis}|{snapshot.portfolio_id or ''}|{snapshot.version}"
+        return self.analysis_cache.get(key, lambda keys: {key: compute()})
+    
+    def add_to_memory(self, data: Dict[str, Any], session_id: Optional[str] = None):
+        """Add data to agent memory for a session"""
+        self.memory.add(data, session_id)
     
-    def get_memory(self) -> List[Dict[str, Any]]:
-        """Get agent memory"""
-        return self.memory
+    def get_memory(self, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get agent memory for a session"""
+        return self.memory.get(session_id)
     
-    def clear_memory(self):
-        """Clear agent memory"""
-        self.memory = []
+    def clear_memory(self, session_id: Optional[str] = None):
+        """Clear agent memory for a session, or for every session"""
+        self.memory.clear(session_id)
     
     def get_status(self) -> Dict[str, Any]:
         """Get agent status"""
@@ -39,5 +71,7 @@ class BaseAgent(ABC):
             "name": self.name,
             "description": self.description,
             "memory_size": len(self.memory),
+            "memory_sessions": self.memory.session_count(),
+            "analysis_cache": self.analysis_cache.stats(),
             "status": "active"
         }
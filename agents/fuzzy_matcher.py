@@ -0,0 +1,106 @@
+from typing import Dict, List, Tuple, Iterable
+
+
+def damerau_levenshtein(word1: str, word2: str, max_distance: int) -> int:
+    """Optimal string alignment distance between two words, or max_distance + 1 if it exceeds the bound"""
+    if abs(len(word1) - len(word2)) > max_distance:
+        return max_distance + 1
+    if word1 == word2:
+        return 0
+
+    previous_previous = None
+    previous = list(range(len(word2) + 1))
+    for i in range(1, len(word1) + 1):
+        current = [i] + [0] * len(word2)
+        row_min = i
+        for j in range(1, len(word2) + 1):
+            cost = 0 if word1[i - 1] == word2[j - 1] else 1
+            value = min(
+                previous[j] + 1,         # deletion
+                current[j - 1] + 1,      # insertion
+                previous[j - 1] + cost   # substitution
+            )
+            if (i > 1 and j > 1 and word1[i - 1] == word2[j - 2]
+                    and word1[i - 2] == word2[j - 1]):
+                value = min(value, previous_previous[j - 2] + 1)  # transposition
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+
+    distance = previous[len(word2)]
+    return distance if distance <= max_distance else max_distance + 1
+
+
+class FuzzyMatcher:
+    """SymSpell-style deletion index for typo-tolerant lookups over a fixed vocabulary.
+
+    Every vocabulary word is indexed under all of its deletions up to the maximum
+    edit distance. A query token is resolved by generating its own deletions and
+    verifying the candidates that share one with Damerau-Levenshtein distance, so
+    a lookup touches only a handful of dictionary entries.
+    """
+
+    def __init__(self, vocabulary: Iterable[str], max_distance: int = 2, min_word_length: int = 3):
+        self.max_distance = max_distance
+        self.min_word_length = min_word_length
+        self.words = set()
+        self.deletes = {}
+
+        for word in vocabulary:
+            if len(word) < min_word_length or word in self.words:
+                continue
+            self.words.add(word)
+            for variant in self._deletions(word, self.distance_for_length(len(word))):
+                self.deletes.setdefault(variant, []).append(word)
+
+    def distance_for_length(self, length: int) -> int:
+        """Allowed edit distance for a word of the given length"""
+        if length < self.min_word_length:
+            return 0
+        return min(self.max_distance, 1 if length < 6 else 2)
+
+    def lookup(self, token: str) -> List[Tuple[str, int]]:
+        """Return (vocabulary word, edit distance) pairs within the allowed distance of token"""
+        token_distance = self.distance_for_length(len(token))
+        if token_distance == 0:
+            return []
+
+        matches = {}
+        for variant in self._deletions(token, token_distance):
+            for word in self.deletes.get(variant, ()):
+                if word in matches:
+                    continue
+                allowed = self.distance_for_length(min(len(token), len(word)))
+                distance = damerau_levenshtein(token, word, allowed)
+                if distance <= allowed:
+                    matches[word] = distance
+
+        return sorted(matches.items(), key=lambda match: (match[1], match[0]))
+
+    def lookup_all(self, tokens: Iterable[str]) -> Dict[str, List[Tuple[str, int]]]:
+        """Look up every distinct token, returning only tokens that matched something"""
+        results = {}
+        for token in tokens:
+            if token not in results:
+                results[token] = self.lookup(token)
+        return {token: matches for token, matches in results.items() if matches}
+
+    @staticmethod
+    def _deletions(word: str, max_distance: int) -> set:
+        """All strings reachable from word by deleting up to max_distance characters"""
+        variants = {word}
+        frontier = {word}
+        for _ in range(max_distance):
+            next_frontier = set()
+            for variant in frontier:
+                if len(variant) <= 1:
+                    continue
+                for i in range(len(variant)):
+                    next_frontier.add(variant[:i] + variant[i + 1:])
+            next_frontier -= variants
+            variants |= next_frontier
+            frontier = next_frontier
+        return variants
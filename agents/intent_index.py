@@ -0,0 +1,253 @@
+from typing import Dict, List, Tuple, FrozenSet
+from collections import deque
+from agents.fuzzy_matcher import FuzzyMatcher
+
+# Common misspellings and variations used for typo-tolerant intent matching
+COMMON_MISSPELLINGS = {
+    # Portfolio related
+    "portfolio": ("portfolo", "portfollio", "portfoli", "portflio", "profolio", "porfolio"),
+    "performance": ("perfomance", "perfrmance", "preformance", "performence"),
+    "summary": ("summry", "sumary", "sumery", "summery"),
+    "stocks": ("stoks", "stonks", "stokcs", "stockz"),
+    "investment": ("investmnt", "invesment", "investement", "investmnet"),
+
+    # News related
+    "news": ("nws", "newz", "new", "newss"),
+    "market": ("mrket", "markt", "markeet", "markett"),
+    "traffic": ("trffic", "trafik", "trafic", "traffik"),
+    "impact": ("impct", "impackt", "impakt", "imapct"),
+
+    # Analysis related
+    "analysis": ("anlysis", "analisis", "analisys", "anaylsis"),
+    "research": ("reserch", "recherch", "resarch", "reseach"),
+    "technical": ("techncal", "techical", "tecnical", "technicall"),
+    "sentiment": ("sentimnt", "sentment", "sentimant", "sentyment"),
+
+    # Investment advice
+    "recommendation": ("recomendatn", "recomendation", "recomandation", "recomendashun"),
+    "advice": ("advise", "advic", "advis", "advices"),
+    "buy": ("by", "byu", "buuy", "byy"),
+    "sell": ("sel", "seel", "sall", "cell"),
+    "hold": ("hol", "hoold", "hhold", "holdd"),
+
+    # Personal info
+    "ganesh": ("ganes", "gansh", "ganeshh", "ganessh"),
+    "contact": ("contct", "contakt", "contak", "contac"),
+    "who": ("woh", "whoo", "hwo", "wo"),
+
+    # Risk related
+    "risk": ("rsk", "risc", "riskk", "risck"),
+    "volatility": ("volatilty", "volatality", "volatlity", "volatilityy"),
+    "safety": ("saftey", "safte", "safty", "saftty"),
+    "danger": ("dnger", "dangr", "dangerr", "dager"),
+
+    # Market research
+    "trends": ("trnds", "trend", "trendz", "trendd"),
+    "industry": ("indstry", "industy", "industrie", "industryy"),
+    "competition": ("competitn", "competishun", "competetion", "compettion"),
+    "growth": ("grwth", "growht", "growtth", "growthh"),
+
+    # Gen Z variations
+    "stonks": ("stocks", "stoks", "stonk", "stonkz"),
+    "hodl": ("hold", "hol", "hodll", "hodl"),
+    "tendies": ("tenders", "tendys", "tendiez", "tendees"),
+    "vibes": ("vibe", "vibez", "vybes", "vibs"),
+    "tea": ("t", "tee", "teaa", "teea")
+}
+
+def _build_misspelling_map() -> Dict[str, FrozenSet[str]]:
+    """Build a symmetric word -> related spellings map from COMMON_MISSPELLINGS"""
+    related = {}
+    for correct_word, misspellings in COMMON_MISSPELLINGS.items():
+        for misspelling in misspellings:
+            related.setdefault(correct_word, set()).add(misspelling)
+            related.setdefault(misspelling, set()).add(correct_word)
+    return {word: frozenset(words) for word, words in related.items()}
+
+
+MISSPELLING_MAP = _build_misspelling_map()
+
+
+class PatternMatcher:
+    """Aho-Corasick automaton reporting every pattern that occurs as a substring of a text"""
+
+    def __init__(self, patterns: List[str]):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append(pattern_id)
+
+        # Breadth-first construction of failure links
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def find_all(self, text: str) -> set:
+        """Return the ids of all patterns occurring in text"""
+        found = set()
+        state = 0
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class IntentIndex:
+    """Precompiled intent classifier over MasterAgent.intent_patterns.
+
+    Produces the per-intent pattern scores of scanning every pattern of every intent,
+    but resolves each query word through prebuilt indexes so the cost grows with the
+    query length rather than with patterns x words.
+    """
+
+    def __init__(self, intent_patterns: Dict[str, List[str]], token_cache_size: int = 4096,
+                 fuzzy_max_distance: int = 2):
+        self.intents = list(intent_patterns.keys())
+        self.pattern_counts = {intent: len(patterns) for intent, patterns in intent_patterns.items()}
+
+        # Every pattern occurrence gets its own bit so duplicates inside an intent keep their weight
+        self.intent_masks = {}
+        pattern_masks = {}
+        bit = 0
+        for intent, patterns in intent_patterns.items():
+            intent_mask = 0
+            for pattern in patterns:
+                pattern_masks[pattern] = pattern_masks.get(pattern, 0) | (1 << bit)
+                intent_mask |= 1 << bit
+                bit += 1
+            self.intent_masks[intent] = intent_mask
+
+        self.patterns = list(pattern_masks.keys())
+        self.pattern_masks = [pattern_masks[pattern] for pattern in self.patterns]
+        self.exact_index = pattern_masks
+        self.matcher = PatternMatcher(self.patterns)
+
+        # Pre-split pattern words: pattern word -> mask of patterns containing it
+        self.word_masks = {}
+        for pattern, mask in pattern_masks.items():
+            for pattern_word in pattern.split():
+                self.word_masks[pattern_word] = self.word_masks.get(pattern_word, 0) | mask
+
+        # Substring index: every substring of every pattern word -> mask of patterns containing it
+        self.substring_masks = {}
+        for pattern_word, mask in self.word_masks.items():
+            length = len(pattern_word)
+            for start in range(length):
+                for end in range(start + 1, length + 1):
+                    substring = pattern_word[start:end]
+                    self.substring_masks[substring] = self.substring_masks.get(substring, 0) | mask
+
+        # Typo-tolerant lookups over the pattern vocabulary
+        self.fuzzy_matcher = FuzzyMatcher(self.word_masks.keys(), max_distance=fuzzy_max_distance)
+        self.max_word_length = max((len(word) for word in self.word_masks), default=0)
+
+        self.token_cache_size = token_cache_size
+        self._token_cache = {}
+
+    def score_patterns(self, query_lower: str, query_words: List[str]) -> Dict[str, float]:
+        """Return the raw (un-normalized) pattern score of every intent"""
+        exact_mask = self.exact_index.get(query_lower.strip(), 0)
+
+        substring_mask = 0
+        for pattern_id in self.matcher.find_all(query_lower):
+            substring_mask |= self.pattern_masks[pattern_id]
+
+        partial_mask = 0
+        similar_mask = 0
+        for word in query_words:
+            word_partial, word_similar = self._resolve_token(word)
+            partial_mask |= word_partial
+            similar_mask |= word_similar
+
+        # Each pattern only scores at its best matching level
+        substring_mask &= ~exact_mask
+        partial_mask &= ~(exact_mask | substring_mask)
+        similar_mask &= ~(exact_mask | substring_mask | partial_mask)
+
+        scores = {}
+        for intent in self.intents:
+            intent_mask = self.intent_masks[intent]
+            scores[intent] = (
+                3.0 * _popcount(exact_mask & intent_mask) +
+                2.0 * _popcount(substring_mask & intent_mask) +
+                1.5 * _popcount(partial_mask & intent_mask) +
+                1.0 * _popcount(similar_mask & intent_mask)
+            )
+        return scores
+
+    def fuzzy_matches(self, query_words: List[str]) -> Dict[str, List[Tuple[str, int]]]:
+        """Return the matching pattern words and edit distances for each query word"""
+        return self.fuzzy_matcher.lookup_all(query_words)
+
+    def _resolve_token(self, word: str) -> Tuple[int, int]:
+        """Resolve a query word to (partial match mask, similar word mask), memoized per word"""
+        cached = self._token_cache.get(word)
+        if cached is not None:
+            return cached
+
+        partial_mask = self.substring_masks.get(word, 0)
+        similar_mask = 0
+        for pattern_word in self._similar_pattern_words(word):
+            similar_mask |= self.word_masks[pattern_word]
+
+        result = (partial_mask, similar_mask)
+        if len(self._token_cache) >= self.token_cache_size:
+            self._token_cache.clear()
+        self._token_cache[word] = result
+        return result
+
+    def _similar_pattern_words(self, word: str) -> set:
+        """Find pattern words considered similar to a query word (typos and common variations)"""
+        if len(word) < 2:
+            return set()
+
+        similar = set()
+        length = len(word)
+
+        # Pattern words contained in the query word (the reverse direction is already
+        # covered by the partial match level, which always outranks similarity)
+        for start in range(length):
+            for end in range(start + 2, min(length, start + self.max_word_length) + 1):
+                if word[start:end] in self.word_masks:
+                    similar.add(word[start:end])
+
+        # Bounded edit-distance matches (typos, transpositions, dropped letters)
+        for pattern_word, _ in self.fuzzy_matcher.lookup(word):
+            similar.add(pattern_word)
+
+        # Common misspellings
+        for related_word in MISSPELLING_MAP.get(word, ()):
+            if related_word in self.word_masks and len(related_word) >= 2:
+                similar.add(related_word)
+
+        return similar
+
+
+def _popcount(mask: int) -> int:
+    """Number of set bits in mask"""
+    return bin(mask).count("1")
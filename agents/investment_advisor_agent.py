@@ -1,6 +1,9 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from agents.base_agent import BaseAgent
-from data.portfolio_data import PORTFOLIO_DATA, get_portfolio_summary, get_stocks_by_criteria
+from data.portfolio_data import PORTFOLIO_DATA, get_portfolio_snapshot, get_portfolio_summary, get_stocks_by_criteria
+from services.currency_service import currency_service
+from services.monte_carlo import monte_carlo, is_sell_query, is_simulation_query, is_trade_query, parse_scenario
+import config
 import random
 
 class InvestmentAdvisorAgent(BaseAgent):
@@ -17,7 +20,10 @@ class InvestmentAdvisorAgent(BaseAgent):
         query = input_data.get("query", "").lower()
         user_language = input_data.get("language", "normal")
         
-        if "buy" in query or "invest" in query:
+        if is_simulation_query(query):
+            return self._generate_simulation_outlook(query, user_language, input_data.get("portfolio_id"))
+        
+        elif "buy" in query or "invest" in query:
             return self._generate_buy_recommendations(user_language)
         
         elif "sell" in query:
@@ -33,7 +39,7 @@ class InvestmentAdvisorAgent(BaseAgent):
             return self._generate_investment_opportunities(user_language)
         
         else:
-            return self._generate_comprehensive_advice(user_language)
+            return self._generate_comprehensive_advice(user_language, input_data.get("portfolio_id"))
     
     def _generate_buy_recommendations(self, language: str) -> Dict[str, Any]:
         """Generate buy recommendations"""
@@ -330,9 +336,9 @@ class InvestmentAdvisorAgent(BaseAgent):
             "type": "general_recommendations"
         }
     
-    def _generate_comprehensive_advice(self, language: str) -> Dict[str, Any]:
+    def _generate_comprehensive_advice(self, language: str, portfolio_id: Optional[str] = None) -> Dict[str, Any]:
         """Generate comprehensive investment advice"""
-        summary = get_portfolio_summary()
+        summary = get_portfolio_summary(portfolio_id)
         
         # Generate personalized advice based on portfolio performance
         if summary['total_pnl_percentage'] > 15:
@@ -379,3 +385,70 @@ class InvestmentAdvisorAgent(BaseAgent):
             "data": {"performance": summary, "advice": advice},
             "type": "comprehensive_advice"
         }
+    
+    def _generate_simulation_outlook(self, query: str, language: str, portfolio_id: Optional[str] = None) -> Dict[str, Any]:
+        """Forward outlook for "what if ..." questions, with buy/sell recommendations for trade questions"""
+        snapshot = get_portfolio_snapshot(portfolio_id)
+        scenario = parse_scenario(query)
+        holdings = snapshot.holdings
+        simulation = self.memoize_analysis(
+            f"simulation|{scenario.get('initial_shock', 0)}|{scenario.get('volatility_scale', 1)}", snapshot,
+            lambda: monte_carlo.simulate([record["symbol"] for record in holdings.records], holdings.current_value,
+                                         [record.get("country", "") for record in holdings.records],
+                                         paths=config.MONTE_CARLO_AGENT_PATHS, **scenario))
+        if not simulation:
+            return self._generate_comprehensive_advice(language, portfolio_id)
+        
+        bands = simulation["bands"]
+        median = currency_service.format_currency(bands["p50"][-1], "INR")
+        low = currency_service.format_currency(bands["p5"][-1], "INR")
+        high = currency_service.format_currency(bands["p95"][-1], "INR")
+        start = currency_service.format_currency(simulation["initial_value"], "INR")
+        if simulation["probability_of_loss"] > 0.4:
+            advice = "The odds of ending lower are meaningful - keep a cash buffer and avoid adding leverage."
+        elif simulation["probability_drawdown_over_20"] > 0.2:
+            advice = "Returns look positive on balance, but deep interim drawdowns are likely - size positions so you can hold through them."
+        else:
+            advice = "The simulated outlook is steady - stay invested and rebalance on schedule."
+        
+        if language == "genz":
+            response = f"""
+            🔮 Portfolio Crystal Ball 🔮
+            
+            💰 Today: {start}
+            🎯 In {simulation['horizon_days']} trading days, most likely: {median}
+            📉 Bad-day vibes (5%): {low}
+            🚀 Moon vibes (95%): {high}
+            😬 Chance of being down: {simulation['probability_of_loss']:.0%}
+            
+            💡 The Move:
+            {advice}
+            """
+        else:
+            response = f"""
+            Portfolio Simulation Outlook ({simulation['paths_completed']:,} paths):
+            
+            Starting Value: {start}
+            Median Value after {simulation['horizon_days']} trading days: {median}
+            5th-95th Percentile Range: {low} - {high}
+            Probability of a Loss: {simulation['probability_of_loss']:.0%}
+            Typical Maximum Drawdown: {simulation['median_max_drawdown']:.1%}
+            
+            Advice:
+            {advice}
+            """
+        
+        data = {"simulation": simulation, "scenario": scenario, "advice": advice}
+        if is_trade_query(query):
+            # "What if I buy more TCS?": the outlook as held, then the trade recommendations
+            trade = (self._generate_sell_recommendations(language) if is_sell_query(query)
+                     else self._generate_buy_recommendations(language))
+            response += "\n" + trade["response"]
+            data["recommendations"] = trade["data"]
+        
+        return {
+            "agent": self.name,
+            "response": response,
+            "data": data,
+            "type": "simulation_outlook"
+        }
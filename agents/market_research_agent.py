@@ -1,6 +1,6 @@
 from typing import Dict, Any
 from agents.base_agent import BaseAgent
-from data.portfolio_data import get_portfolio_data
+from data.portfolio_data import get_portfolio_snapshot
 import random
 
 class MarketResearchAgent(BaseAgent):
@@ -52,11 +52,10 @@ class MarketResearchAgent(BaseAgent):
         user_language = input_data.get("language", "normal")
         
         try:
-            # Extract sectors from portfolio
-            portfolio_sectors = self._get_portfolio_sectors()
-            
-            # Conduct market research
-            market_analysis = self._conduct_market_research(portfolio_sectors)
+            # Conduct market research for the portfolio's sectors (once per snapshot version)
+            snapshot = get_portfolio_snapshot(input_data.get("portfolio_id"))
+            market_analysis = self.memoize_analysis("market_research", snapshot,
+                                                    lambda: self._conduct_market_research(list(snapshot.by_sector)))
             
             # Generate response based on language preference
             response = self._format_market_response(market_analysis, user_language)
@@ -77,12 +76,6 @@ class MarketResearchAgent(BaseAgent):
                 "type": "error"
             }
     
-    def _get_portfolio_sectors(self) -> list:
-        """Get sectors from portfolio"""
-        portfolio_data = get_portfolio_data()
-        sectors = list(set(stock['sector'] for stock in portfolio_data['stocks']))
-        return sectors
-    
     def _conduct_market_research(self, sectors: list) -> Dict[str, Any]:
         """Conduct market research for given sectors"""
         research_results = {}
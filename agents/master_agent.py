@@ -8,8 +8,30 @@ from agents.risk_analyzer_agent import RiskAnalyzerAgent
 from agents.market_research_agent import MarketResearchAgent
 from agents.technical_analyzer_agent import TechnicalAnalyzerAgent
 from agents.sentiment_analyzer_agent import SentimentAnalyzerAgent
+from agents.intent_index import IntentIndex, MISSPELLING_MAP
+from services.monte_carlo import is_simulation_query, is_trade_query
+from services.stress_test import is_news_impact_query, is_stress_query
+from services.tracing import span, record_error, run_in_context, set_attribute
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import asyncio
+import config
 import json
 import re
+import time
+from datetime import datetime
+
+def parse_agent_timeouts(value: str) -> Dict[str, float]:
+    """Per-intent timeouts from an "intent=seconds,..." setting (malformed entries are skipped)"""
+    timeouts = {}
+    for entry in value.split(","):
+        intent, _, seconds = entry.partition("=")
+        try:
+            timeouts[intent.strip()] = float(seconds)
+        except ValueError:
+            if entry.strip():
+                print(f"Ignoring invalid AGENT_TIMEOUTS entry: {entry!r}")
+    return timeouts
+
 
 class MasterAgent(BaseAgent):
     """Master agent that handles intent classification and routes requests to appropriate agents"""
@@ -32,6 +54,13 @@ class MasterAgent(BaseAgent):
             "sentiment_analyzer": SentimentAnalyzerAgent()
         }
         
+        # Concurrent fan-out for primary and secondary agents
+        self.fanout_enabled = config.AGENT_FANOUT_ENABLED
+        self.executor = ThreadPoolExecutor(max_workers=config.AGENT_MAX_WORKERS, thread_name_prefix="agent")
+        
+        # Per-intent timeout overrides in seconds (defaults to config.AGENT_TIMEOUT_SECONDS)
+        self.agent_timeouts = parse_agent_timeouts(config.AGENT_TIMEOUTS)
+        
         # Enhanced intent classification patterns with fuzzy matching support
         self.intent_patterns = {
             "portfolio_analysis": [
@@ -154,6 +183,7 @@ class MasterAgent(BaseAgent):
                 "risk overview", "risk summary", "risk report", "volatility analysis", "safety assessment",
                 "security analysis", "stability analysis", "exposure analysis", "is my portfolio safe",
                 "portfolio safety", "how risky is my portfolio", "portfolio risk level",
+                "what if", "what happens", "simulate", "simulation", "monte carlo", "worst case",
                 # Fuzzy/Typo variations
                 "rsk", "dnger", "sfe", "volatle", "stablty", "securty", "protctn", "hedg",
                 "diversifcatn", "exposre", "volatilty", "saftey", "risc", "safty", "stabil"
@@ -226,46 +256,113 @@ class MasterAgent(BaseAgent):
                 "bullsh", "bearsh", "mrket sentimnt", "sentment", "moud", "fealing", "opinon"
             ]
         }
+        
+        # Precompiled classifier over the patterns above (built once, reused for every query)
+        self.intent_index = IntentIndex(self.intent_patterns)
+        
+        # Turns pushed out of a session's memory are folded into per-intent counts
+        self.memory.compactor = self._summarize_turns
     
     def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process query with intent classification and routing"""
         query = input_data.get("query", "")
         user_language = input_data.get("language", "normal")
+        portfolio_id = input_data.get("portfolio_id")
+        session_id = input_data.get("session_id")
         
         try:
             # Step 1: Intent Classification
-            intent = self._classify_intent(query)
+            with span("master.classify_intent"):
+                intent = self._classify_intent(query)
             
             # Step 2: Route to appropriate agent(s)
-            agent_responses = self._route_to_agents(query, intent, user_language)
+            with span("master.route", intent=intent["primary"]):
+                agent_responses = self._route_to_agents(query, intent, user_language, portfolio_id, session_id)
+            self.remember_turn(query, intent["primary"], list(agent_responses.keys()), session_id)
             
             # Step 3: Generate final response
-            final_response = self._generate_final_response(agent_responses, user_language)
+            with span("master.compose_response"):
+                return self._build_master_response(query, intent, agent_responses, user_language)
             
-            return {
-                "agent": self.name,
-                "response": final_response,
-                "data": {
-                    "query": query,
-                    "intent": intent,
-                    "agent_responses": agent_responses,
-                    "routing_info": {
-                        "primary_intent": intent["primary"],
-                        "confidence": intent["confidence"],
-                        "agents_used": list(agent_responses.keys())
-                    }
-                },
-                "type": "master_response"
-            }
+        except Exception as e:
+            print(f"Error in master agent: {e}")
+            record_error(e)
+            return self._master_error_response(e)
+    
+    async def aprocess(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of process that awaits the routed agents without blocking the event loop"""
+        query = input_data.get("query", "")
+        user_language = input_data.get("language", "normal")
+        portfolio_id = input_data.get("portfolio_id")
+        session_id = input_data.get("session_id")
+        
+        try:
+            # Step 1: Intent Classification (pure CPU, microseconds)
+            with span("master.classify_intent"):
+                intent = self._classify_intent(query)
+            
+            # Step 2: Route to appropriate agent(s)
+            with span("master.route", intent=intent["primary"]):
+                agent_responses = await self._aroute_to_agents(query, intent, user_language, portfolio_id, session_id)
+            self.remember_turn(query, intent["primary"], list(agent_responses.keys()), session_id)
+            
+            # Step 3: Generate final response
+            with span("master.compose_response"):
+                return self._build_master_response(query, intent, agent_responses, user_language)
             
         except Exception as e:
             print(f"Error in master agent: {e}")
-            return {
-                "agent": self.name,
-                "response": "I'm sorry, I encountered an error processing your request. Please try again.",
-                "data": {"error": str(e)},
-                "type": "error"
-            }
+            record_error(e)
+            return self._master_error_response(e)
+    
+    def remember_turn(self, query: str, intent: str, agents_used: List[str], session_id: Optional[str] = None):
+        """Record a routed query in the session's memory"""
+        self.add_to_memory({
+            "query": query,
+            "intent": intent,
+            "agents_used": agents_used,
+            "timestamp": datetime.now().isoformat()
+        }, session_id)
+    
+    @staticmethod
+    def _summarize_turns(summary: Optional[Dict[str, Any]], turns: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Compact old turns into a turn count and per-intent counts"""
+        summary = dict(summary or {"turns": 0, "intents": {}})
+        intents = dict(summary["intents"])
+        for turn in turns:
+            intents[turn["intent"]] = intents.get(turn["intent"], 0) + 1
+        summary["turns"] += len(turns)
+        summary["intents"] = intents
+        return summary
+    
+    def _build_master_response(self, query: str, intent: Dict[str, Any], agent_responses: Dict[str, Any], language: str) -> Dict[str, Any]:
+        """Combine the routed agent responses into the master agent payload"""
+        final_response = self._generate_final_response(agent_responses, language)
+        
+        return {
+            "agent": self.name,
+            "response": final_response,
+            "data": {
+                "query": query,
+                "intent": intent,
+                "agent_responses": agent_responses,
+                "routing_info": {
+                    "primary_intent": intent["primary"],
+                    "confidence": intent["confidence"],
+                    "agents_used": list(agent_responses.keys())
+                }
+            },
+            "type": "master_response"
+        }
+    
+    def _master_error_response(self, error: Exception) -> Dict[str, Any]:
+        """Error payload returned when the master agent fails"""
+        return {
+            "agent": self.name,
+            "response": "I'm sorry, I encountered an error processing your request. Please try again.",
+            "data": {"error": str(error)},
+            "type": "error"
+        }
     
     def _classify_intent(self, query: str) -> Dict[str, Any]:
         """Enhanced intent classification with sophisticated pattern matching and context awareness"""
@@ -318,7 +415,7 @@ class MasterAgent(BaseAgent):
         
         for pattern in personal_patterns:
             if re.match(pattern, query_lower):
-                print(f"DEBUG: Personal info special case triggered for query: '{query_lower}'")
+                set_attribute("special_case", "personal_info")
                 return {
                     "primary": "personal_info",
                     "confidence": 1.0,
@@ -326,6 +423,29 @@ class MasterAgent(BaseAgent):
                     "all_scores": {"personal_info": 1.0}
                 }
         
+        # Event and news impact ("how much would an oil shock hit me", "news impact on my
+        # portfolio") goes to the news analyzer, ahead of the "my portfolio" patterns
+        if is_stress_query(query_lower) or is_news_impact_query(query_lower):
+            set_attribute("special_case", "news_impact")
+            return {
+                "primary": "news_analysis",
+                "confidence": 1.0,
+                "secondary": [],
+                "all_scores": {"news_analysis": 1.0}
+            }
+        
+        # Forward simulation: "what if I buy more TCS" goes to the investment advisor,
+        # "what happens to my portfolio if ..." to the risk analyzer
+        if is_simulation_query(query_lower):
+            set_attribute("special_case", "simulation")
+            intent = "investment_advice" if is_trade_query(query_lower) else "risk_assessment"
+            return {
+                "primary": intent,
+                "confidence": 1.0,
+                "secondary": [],
+                "all_scores": {intent: 1.0}
+            }
+        
         # Portfolio analysis special cases
         portfolio_patterns = [
             r'.*portfolio.*(help|analyze|check|review|show|display|get).*',
@@ -337,7 +457,7 @@ class MasterAgent(BaseAgent):
         
         for pattern in portfolio_patterns:
             if re.match(pattern, query_lower):
-                print(f"DEBUG: Portfolio analysis special case triggered for query: '{query_lower}'")
+                set_attribute("special_case", "portfolio")
                 return {
                     "primary": "portfolio_analysis",
                     "confidence": 1.0,
@@ -356,7 +476,7 @@ class MasterAgent(BaseAgent):
         
         for pattern in price_patterns:
             if re.match(pattern, query_lower):
-                print(f"DEBUG: Price query special case triggered for query: '{query_lower}'")
+                set_attribute("special_case", "price")
                 return {
                     "primary": "portfolio_analysis",
                     "confidence": 1.0,
@@ -375,7 +495,7 @@ class MasterAgent(BaseAgent):
         
         for pattern in enlist_patterns:
             if re.match(pattern, query_lower):
-                print(f"DEBUG: Enlist query special case triggered for query: '{query_lower}'")
+                set_attribute("special_case", "enlist")
                 return {
                     "primary": "portfolio_analysis",
                     "confidence": 1.0,
@@ -389,22 +509,11 @@ class MasterAgent(BaseAgent):
         """Calculate enhanced intent scores with context awareness and weighted patterns"""
         intent_scores = {}
         
-        for intent_name, patterns in self.intent_patterns.items():
-            score = 0
-            total_patterns = len(patterns)
-            
-            for pattern in patterns:
-                # Exact match (highest score)
-                if pattern == query_lower.strip():
-                    score += 3.0
-                elif pattern in query_lower:
-                    score += 2.0
-                # Partial word match (medium score)
-                elif any(word in pattern for word in query_words):
-                    score += 1.5
-                # Word similarity (lower score for typos)
-                elif self._word_similarity(pattern, query_words):
-                    score += 1.0
+        # Exact (3.0), substring (2.0), partial word (1.5) and similar word (1.0) matches
+        pattern_scores = self.intent_index.score_patterns(query_lower, query_words)
+        
+        for intent_name, score in pattern_scores.items():
+            total_patterns = self.intent_index.pattern_counts[intent_name]
             
             # Context bonus for specific patterns
             context_bonus = self._calculate_context_bonus(intent_name, query_lower)
@@ -470,208 +579,216 @@ class MasterAgent(BaseAgent):
     
     def _word_similarity(self, pattern: str, query_words: list) -> bool:
         """Enhanced word similarity check to handle typos, variations, and fuzzy matching"""
-        pattern_words = pattern.split()
+        pattern_words = [pattern_word for pattern_word in pattern.split() if len(pattern_word) >= 2]
         
         for word in query_words:
-            for pattern_word in pattern_words:
-                if len(word) >= 2 and len(pattern_word) >= 2:
-                    # Exact substring match
-                    if word in pattern_word or pattern_word in word:
-                        return True
-                    
-                    # Length-based fuzzy matching
-                    if len(word) >= 3 and len(pattern_word) >= 3:
-                        # Allow character differences based on word length
-                        max_diff = max(1, min(len(word), len(pattern_word)) // 3)
-                        
-                        if abs(len(word) - len(pattern_word)) <= max_diff:
-                            diff_count = sum(1 for a, b in zip(word, pattern_word) if a != b)
-                            if diff_count <= max_diff:
-                                return True
-                    
-                    # Check for common character swaps (transpositions)
-                    if self._check_transposition(word, pattern_word):
-                        return True
-                    
-                    # Check for common misspellings and variations
-                    if self._is_common_misspelling(word, pattern_word):
-                        return True
-                    
-                    # Check for phonetic similarity (basic)
-                    if self._phonetic_similarity(word, pattern_word):
-                        return True
-        
-        return False
-    
-    def _check_transposition(self, word1: str, word2: str) -> bool:
-        """Check for character transposition (swapped adjacent characters)"""
-        if abs(len(word1) - len(word2)) > 1:
-            return False
+            if len(word) < 2:
+                continue
             
-        if len(word1) == len(word2):
-            diff_positions = [i for i in range(len(word1)) if word1[i] != word2[i]]
-            if len(diff_positions) == 2:
-                i, j = diff_positions
-                if abs(i - j) == 1:  # Adjacent positions
-                    return word1[i] == word2[j] and word1[j] == word2[i]
-        
-        return False
-    
-    def _phonetic_similarity(self, word1: str, word2: str) -> bool:
-        """Basic phonetic similarity check"""
-        # Common phonetic replacements
-        phonetic_map = {
-            'c': 'k', 'k': 'c', 'f': 'ph', 'ph': 'f',
-            'z': 's', 's': 'z', 'i': 'y', 'y': 'i'
-        }
-        
-        for char, replacement in phonetic_map.items():
-            if char in word1.lower() and replacement in word2.lower():
-                if word1.lower().replace(char, replacement) == word2.lower():
+            # Bounded edit-distance lookup against the pattern vocabulary
+            fuzzy_words = {match for match, _ in self.intent_index.fuzzy_matcher.lookup(word)}
+            
+            for pattern_word in pattern_words:
+                # Exact substring match
+                if word in pattern_word or pattern_word in word:
                     return True
-            if char in word2.lower() and replacement in word1.lower():
-                if word2.lower().replace(char, replacement) == word1.lower():
+                
+                if pattern_word in fuzzy_words:
+                    return True
+                
+                # Check for common misspellings and variations
+                if self._is_common_misspelling(word, pattern_word):
                     return True
         
         return False
     
     def _is_common_misspelling(self, word: str, pattern: str) -> bool:
         """Enhanced common misspellings and variations check"""
-        # Comprehensive misspellings dictionary
-        common_misspellings = {
-            # Portfolio related
-            "portfolio": ["portfolo", "portfollio", "portfoli", "portflio", "profolio", "porfolio"],
-            "performance": ["perfomance", "perfrmance", "preformance", "performence"],
-            "summary": ["summry", "sumary", "sumery", "summery"],
-            "stocks": ["stoks", "stonks", "stokcs", "stockz"],
-            "investment": ["investmnt", "invesment", "investement", "investmnet"],
-            
-            # News related
-            "news": ["nws", "newz", "new", "newss"],
-            "market": ["mrket", "markt", "markeet", "markett"],
-            "traffic": ["trffic", "trafik", "trafic", "traffik"],
-            "impact": ["impct", "impackt", "impakt", "imapct"],
-            
-            # Analysis related
-            "analysis": ["anlysis", "analisis", "analisys", "anaylsis"],
-            "research": ["reserch", "recherch", "resarch", "reseach"],
-            "technical": ["techncal", "techical", "tecnical", "technicall"],
-            "sentiment": ["sentimnt", "sentment", "sentimant", "sentyment"],
-            
-            # Investment advice
-            "recommendation": ["recomendatn", "recomendation", "recomandation", "recomendashun"],
-            "advice": ["advise", "advic", "advis", "advices"],
-            "buy": ["by", "byu", "buuy", "byy"],
-            "sell": ["sel", "seel", "sall", "cell"],
-            "hold": ["hol", "hoold", "hhold", "holdd"],
-            
-            # Personal info
-            "ganesh": ["ganes", "gansh", "ganeshh", "ganessh"],
-            "contact": ["contct", "contakt", "contak", "contac"],
-            "who": ["woh", "whoo", "hwo", "wo"],
-            
-            # Risk related
-            "risk": ["rsk", "risc", "riskk", "risck"],
-            "volatility": ["volatilty", "volatality", "volatlity", "volatilityy"],
-            "safety": ["saftey", "safte", "safty", "saftty"],
-            "danger": ["dnger", "dangr", "dangerr", "dager"],
-            
-            # Market research
-            "trends": ["trnds", "trend", "trendz", "trendd"],
-            "industry": ["indstry", "industy", "industrie", "industryy"],
-            "competition": ["competitn", "competishun", "competetion", "compettion"],
-            "growth": ["grwth", "growht", "growtth", "growthh"],
-            
-            # Gen Z variations
-            "stonks": ["stocks", "stoks", "stonk", "stonkz"],
-            "hodl": ["hold", "hol", "hodll", "hodl"],
-            "tendies": ["tenders", "tendys", "tendiez", "tendees"],
-            "vibes": ["vibe", "vibez", "vybes", "vibs"],
-            "tea": ["t", "tee", "teaa", "teea"]
-        }
-        
         # Check both directions (word->pattern and pattern->word)
         word_lower = word.lower()
         pattern_lower = pattern.lower()
         
-        # Direct lookup
-        if pattern_lower in common_misspellings:
-            if word_lower in common_misspellings[pattern_lower]:
-                return True
+        return word_lower in MISSPELLING_MAP.get(pattern_lower, ())
+    
+    def _route_to_agents(self, query: str, intent: Dict[str, Any], language: str,
+                         portfolio_id: Optional[str] = None, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Enhanced routing with intelligent agent selection and context awareness"""
+        dispatch_plan = self._plan_agent_dispatch(query, intent, language, portfolio_id, session_id)
         
-        if word_lower in common_misspellings:
-            if pattern_lower in common_misspellings[word_lower]:
-                return True
+        # Independent agents run concurrently so multi-intent queries pay the slowest agent, not the sum
+        if self.fanout_enabled and len(dispatch_plan) > 1:
+            agent_responses = self._dispatch_concurrently(dispatch_plan)
+        else:
+            agent_responses = self._dispatch_sequentially(dispatch_plan)
         
-        # Reverse lookup (check if word is a correct spelling of a misspelled pattern)
-        for correct_word, misspellings in common_misspellings.items():
-            if pattern_lower in misspellings and word_lower == correct_word:
-                return True
-            if word_lower in misspellings and pattern_lower == correct_word:
-                return True
+        # Enhanced fallback with better error handling
+        if not agent_responses:
+            try:
+                response = self.agents["rag_agent"].process(self._fallback_payload(query, intent, language, portfolio_id, session_id))
+                agent_responses["fallback"] = response
+            except Exception as e:
+                print(f"Error in fallback agent: {e}")
+                agent_responses["fallback"] = self._fallback_error_response()
         
-        return False
+        return agent_responses
     
-    def _route_to_agents(self, query: str, intent: Dict[str, Any], language: str) -> Dict[str, Any]:
-        """Enhanced routing with intelligent agent selection and context awareness"""
+    async def _aroute_to_agents(self, query: str, intent: Dict[str, Any], language: str,
+                                portfolio_id: Optional[str] = None, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Async routing: awaits the planned agents concurrently on the event loop"""
+        dispatch_plan = self._plan_agent_dispatch(query, intent, language, portfolio_id, session_id)
         agent_responses = {}
         
+        if self.fanout_enabled and len(dispatch_plan) > 1:
+            results = await asyncio.gather(*[
+                asyncio.wait_for(self._arun_agent(dispatch), self._get_agent_timeout(dispatch["intent"]))
+                for dispatch in dispatch_plan
+            ], return_exceptions=True)
+        else:
+            results = []
+            for dispatch in dispatch_plan:
+                try:
+                    results.append(await self._arun_agent(dispatch))
+                except Exception as e:
+                    results.append(e)
+        
+        for dispatch, result in zip(dispatch_plan, results):
+            if isinstance(result, asyncio.TimeoutError):
+                print(f"Timeout in {dispatch['intent']} agent after {self._get_agent_timeout(dispatch['intent'])}s")
+            elif isinstance(result, BaseException):
+                print(f"Error in {dispatch['intent']} agent: {result}")
+            else:
+                agent_responses[dispatch["intent"]] = result
+                continue
+            if dispatch["primary"]:
+                agent_responses[dispatch["intent"]] = self._agent_error_response(dispatch["intent"])
+        
+        # Enhanced fallback with better error handling
+        if not agent_responses:
+            try:
+                response = await self.agents["rag_agent"].aprocess(self._fallback_payload(query, intent, language, portfolio_id, session_id))
+                agent_responses["fallback"] = response
+            except Exception as e:
+                print(f"Error in fallback agent: {e}")
+                agent_responses["fallback"] = self._fallback_error_response()
+        
+        return agent_responses
+    
+    def _fallback_payload(self, query: str, intent: Dict[str, Any], language: str,
+                          portfolio_id: Optional[str] = None, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Input for the RAG agent when no specialised agent answered"""
+        return {
+            "query": query,
+            "language": language,
+            "portfolio_id": portfolio_id,
+            "session_id": session_id,
+            "context": {"fallback": True, "original_intent": intent["primary"]}
+        }
+    
+    def _fallback_error_response(self) -> Dict[str, Any]:
+        """Response used when even the fallback agent fails"""
+        return {
+            "agent": "RAG Agent",
+            "response": "I'm sorry, I couldn't understand your request. Could you please rephrase it or ask about your portfolio, investments, or personal information?",
+            "type": "error"
+        }
+    
+    def _plan_agent_dispatch(self, query: str, intent: Dict[str, Any], language: str,
+                             portfolio_id: Optional[str] = None, session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Select the primary and secondary agents for a query, in response order"""
+        dispatch_plan = []
+        enhanced_query = self._enhance_query_with_context(query, intent)
+        payload = {
+            "query": enhanced_query,
+            "language": language,
+            "portfolio_id": portfolio_id,
+            "session_id": session_id,
+            "context": intent.get("query_context", {})
+        }
+        
         # Enhanced primary agent routing with confidence check
         primary_agent = self._get_agent_for_intent(intent["primary"])
         if primary_agent and intent["confidence"] > 0.25:  # Lowered minimum confidence threshold
-            try:
-                # Enhanced query processing with context
-                enhanced_query = self._enhance_query_with_context(query, intent)
-                response = primary_agent.process({
-                    "query": enhanced_query,
-                    "language": language,
-                    "context": intent.get("query_context", {})
-                })
-                agent_responses[intent["primary"]] = response
-            except Exception as e:
-                print(f"Error in {intent['primary']} agent: {e}")
-                agent_responses[intent["primary"]] = {
-                    "agent": intent["primary"].replace("_", " ").title(),
-                    "response": "Sorry, I couldn't process this request. Please try rephrasing your question.",
-                    "type": "error"
-                }
+            dispatch_plan.append({
+                "intent": intent["primary"],
+                "agent": primary_agent,
+                "payload": payload,
+                "primary": True
+            })
         
         # Smart secondary agent routing
         for secondary_intent in intent["secondary"]:
             if intent["all_scores"][secondary_intent] > 0.4:  # Higher threshold for secondary agents
                 secondary_agent = self._get_agent_for_intent(secondary_intent)
                 if secondary_agent and self._should_route_to_secondary(query, intent, secondary_intent):
-                    try:
-                        enhanced_query = self._enhance_query_with_context(query, intent)
-                        response = secondary_agent.process({
-                            "query": enhanced_query,
-                            "language": language,
-                            "context": intent.get("query_context", {})
-                        })
-                        agent_responses[secondary_intent] = response
-                    except Exception as e:
-                        print(f"Error in {secondary_intent} agent: {e}")
+                    dispatch_plan.append({
+                        "intent": secondary_intent,
+                        "agent": secondary_agent,
+                        "payload": payload,
+                        "primary": False
+                    })
+        
+        return dispatch_plan
+    
+    def _run_agent(self, dispatch: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one planned agent inside its tracing span"""
+        with span(f"agent.{dispatch['intent']}"):
+            return dispatch["agent"].process(dispatch["payload"])
+    
+    async def _arun_agent(self, dispatch: Dict[str, Any]) -> Dict[str, Any]:
+        """Await one planned agent inside its tracing span"""
+        with span(f"agent.{dispatch['intent']}"):
+            return await dispatch["agent"].aprocess(dispatch["payload"])
+    
+    def _dispatch_sequentially(self, dispatch_plan: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Run the planned agents one after another"""
+        agent_responses = {}
+        for dispatch in dispatch_plan:
+            try:
+                agent_responses[dispatch["intent"]] = self._run_agent(dispatch)
+            except Exception as e:
+                print(f"Error in {dispatch['intent']} agent: {e}")
+                if dispatch["primary"]:
+                    agent_responses[dispatch["intent"]] = self._agent_error_response(dispatch["intent"])
+        return agent_responses
+    
+    def _dispatch_concurrently(self, dispatch_plan: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Run the planned agents in parallel with per-agent timeouts, keeping the planned order"""
+        started_at = time.monotonic()
+        futures = [
+            self.executor.submit(run_in_context(self._run_agent), dispatch)
+            for dispatch in dispatch_plan
+        ]
         
-        # Enhanced fallback with better error handling
-        if not agent_responses:
-            fallback_agent = self.agents["rag_agent"]
+        agent_responses = {}
+        for dispatch, future in zip(dispatch_plan, futures):
+            deadline = started_at + self._get_agent_timeout(dispatch["intent"])
             try:
-                response = fallback_agent.process({
-                    "query": query,
-                    "language": language,
-                    "context": {"fallback": True, "original_intent": intent["primary"]}
-                })
-                agent_responses["fallback"] = response
+                agent_responses[dispatch["intent"]] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                # Stragglers that have not started are cancelled; running ones are abandoned
+                future.cancel()
+                print(f"Timeout in {dispatch['intent']} agent after {self._get_agent_timeout(dispatch['intent'])}s")
+                if dispatch["primary"]:
+                    agent_responses[dispatch["intent"]] = self._agent_error_response(dispatch["intent"])
             except Exception as e:
-                print(f"Error in fallback agent: {e}")
-                agent_responses["fallback"] = {
-                    "agent": "RAG Agent",
-                    "response": "I'm sorry, I couldn't understand your request. Could you please rephrase it or ask about your portfolio, investments, or personal information?",
-                    "type": "error"
-                }
+                print(f"Error in {dispatch['intent']} agent: {e}")
+                if dispatch["primary"]:
+                    agent_responses[dispatch["intent"]] = self._agent_error_response(dispatch["intent"])
         
         return agent_responses
     
+    def _get_agent_timeout(self, intent: str) -> float:
+        """Get the timeout in seconds for the agent serving an intent"""
+        return self.agent_timeouts.get(intent, config.AGENT_TIMEOUT_SECONDS)
+    
+    def _agent_error_response(self, intent: str) -> Dict[str, Any]:
+        """Error response used when the primary agent fails or times out"""
+        return {
+            "agent": intent.replace("_", " ").title(),
+            "response": "Sorry, I couldn't process this request. Please try rephrasing your question.",
+            "type": "error"
+        }
+    
     def _enhance_query_with_context(self, query: str, intent: Dict[str, Any]) -> str:
         """Enhance query with context information for better agent processing"""
         context = intent.get("query_context", {})
@@ -810,9 +927,11 @@ class MasterAgent(BaseAgent):
     def get_intent_analysis(self, query: str) -> Dict[str, Any]:
         """Get detailed intent analysis for a query"""
         intent = self._classify_intent(query)
+        query_words = re.sub(r'[^\w\s]', ' ', query.lower()).split()
         return {
             "query": query,
             "intent_analysis": intent,
+            "fuzzy_matches": self.intent_index.fuzzy_matches(query_words),
             "available_intents": list(self.intent_patterns.keys()),
             "agent_mapping": {
                 "portfolio_analysis": "Portfolio Analyzer",
@@ -1,6 +1,8 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from agents.base_agent import BaseAgent
-from data.portfolio_data import PORTFOLIO_DATA, SECTORS, COUNTRIES
+from data.portfolio_data import PORTFOLIO_DATA, SECTORS, COUNTRIES, get_portfolio_snapshot
+from services.currency_service import currency_service
+from services.stress_test import stress_test_engine, is_stress_query, is_traffic_query, match_scenarios
 import requests
 from datetime import datetime, timedelta
 import json
@@ -20,12 +22,16 @@ class NewsAnalyzerAgent(BaseAgent):
         """Process news analysis request"""
         query = input_data.get("query", "").lower()
         user_language = input_data.get("language", "normal")
+        portfolio_id = input_data.get("portfolio_id")
         
         if "news" in query and "impact" in query:
-            return self._analyze_news_impact(user_language)
+            return self._analyze_news_impact(user_language, portfolio_id)
         
-        elif "traffic" in query and ("india" in query or "usa" in query):
-            return self._analyze_traffic_impact(query, user_language)
+        elif is_traffic_query(query):
+            return self._analyze_traffic_impact(query, user_language, portfolio_id)
+        
+        elif is_stress_query(query):
+            return self._analyze_event_impact(query, user_language, portfolio_id)
         
         elif "market" in query and "news" in query:
             return self._get_market_news(user_language)
@@ -36,7 +42,17 @@ class NewsAnalyzerAgent(BaseAgent):
         else:
             return self._get_general_news_analysis(user_language)
     
-    def _analyze_news_impact(self, language: str) -> Dict[str, Any]:
+    def _stress_results(self, portfolio_id: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Every registered stress scenario evaluated on the portfolio (once per snapshot version)"""
+        snapshot = get_portfolio_snapshot(portfolio_id)
+        return self.memoize_analysis("stress_tests", snapshot, lambda: stress_test_engine.run(snapshot))
+    
+    def _format_impact(self, result: Dict[str, Any]) -> str:
+        """Signed INR amount and percentage of a scenario's P&L"""
+        sign = "+" if result["pnl"] >= 0 else "-"
+        return f"{sign}{currency_service.format_currency(abs(result['pnl']), 'INR')} ({result['pnl_percentage']:+.2f}%)"
+    
+    def _analyze_news_impact(self, language: str, portfolio_id: Optional[str] = None) -> Dict[str, Any]:
         """Analyze news impact on portfolio"""
         # Simulate news impact analysis
         impact_analysis = {
@@ -44,12 +60,19 @@ class NewsAnalyzerAgent(BaseAgent):
             "negative_impact": ["Oil & Gas"],
             "neutral_impact": ["Consumer Discretionary", "Automotive"],
             "key_events": [
-                "Tech stocks rally on AI breakthrough news",
-                "Banking sector stable despite rate changes",
-                "Oil prices volatile due to geopolitical tensions"
+                {"event": "Tech stocks rally on AI breakthrough news", "scenario": "tech_rally"},
+                {"event": "Banking sector stable despite rate changes", "scenario": "rate_hike"},
+                {"event": "Oil prices volatile due to geopolitical tensions", "scenario": "oil_shock"}
             ]
         }
         
+        # Quantify each event with its stress scenario on the holdings
+        stress = self._stress_results(portfolio_id)
+        event_impacts = [{**event, **stress[event["scenario"]]}
+                         for event in impact_analysis["key_events"] if event["scenario"] in stress]
+        impact_analysis["event_impacts"] = event_impacts
+        impact_analysis["net_impact"] = sum(impact["pnl"] for impact in event_impacts)
+        
         if language == "genz":
             response = f"""
             📰 News Impact Analysis 📰
@@ -63,10 +86,11 @@ class NewsAnalyzerAgent(BaseAgent):
             🟡 Neutral Sectors:
             {', '.join(impact_analysis['neutral_impact'])}
             
-            📊 Key Events:
+            📊 Key Events (hit to your bag):
             """
-            for event in impact_analysis['key_events']:
-                response += f"• {event}\n"
+            for impact in event_impacts:
+                emoji = "🟢" if impact["pnl"] >= 0 else "🔴"
+                response += f"{emoji} {impact['event']}: {self._format_impact(impact)}\n"
         else:
             response = f"""
             News Impact Analysis:
@@ -80,10 +104,13 @@ class NewsAnalyzerAgent(BaseAgent):
             Neutral Sectors:
             {', '.join(impact_analysis['neutral_impact'])}
             
-            Key Events:
+            Key Events (estimated impact on your portfolio):
             """
-            for event in impact_analysis['key_events']:
-                response += f"• {event}\n"
+            for impact in event_impacts:
+                response += f"• {impact['event']}: {self._format_impact(impact)}\n"
+        
+        net = impact_analysis["net_impact"]
+        response += f"\nNet estimated impact: {'+' if net >= 0 else '-'}{currency_service.format_currency(abs(net), 'INR')}\n"
         
         return {
             "agent": self.name,
@@ -92,7 +119,7 @@ class NewsAnalyzerAgent(BaseAgent):
             "type": "news_impact_analysis"
         }
     
-    def _analyze_traffic_impact(self, query: str, language: str) -> Dict[str, Any]:
+    def _analyze_traffic_impact(self, query: str, language: str, portfolio_id: Optional[str] = None) -> Dict[str, Any]:
         """Analyze traffic issues impact on stocks"""
         affected_stocks = []
         
@@ -111,6 +138,15 @@ class NewsAnalyzerAgent(BaseAgent):
                 {"symbol": "MSFT", "name": "Microsoft", "impact": "Low - Cloud services stable"}
             ]
         
+        # Rupee impact on the holdings from the matching logistics scenario
+        scenario = stress_test_engine.run(get_portfolio_snapshot(portfolio_id),
+                                          ["india_logistics_disruption" if "india" in query else "us_logistics_disruption"])
+        scenario = next(iter(scenario.values()), None)
+        holding_pnl = {holding["symbol"]: holding["pnl"] for holding in scenario["holdings"]} if scenario else {}
+        for stock in affected_stocks:
+            if stock["symbol"] in holding_pnl:
+                stock["portfolio_impact"] = holding_pnl[stock["symbol"]]
+        
         if language == "genz":
             response = f"""
             🚦 Traffic Impact Analysis 🚦
@@ -121,7 +157,7 @@ class NewsAnalyzerAgent(BaseAgent):
             """
             for stock in affected_stocks:
                 emoji = "🔴" if "High" in stock["impact"] else "🟡" if "Medium" in stock["impact"] else "🟢"
-                response += f"{emoji} {stock['name']} ({stock['symbol']}): {stock['impact']}\n"
+                response += f"{emoji} {stock['name']} ({stock['symbol']}): {stock['impact']}{self._format_holding_impact(stock)}\n"
         else:
             response = f"""
             Traffic Impact Analysis:
@@ -131,15 +167,56 @@ class NewsAnalyzerAgent(BaseAgent):
             Stocks Affected:
             """
             for stock in affected_stocks:
-                response += f"• {stock['name']} ({stock['symbol']}): {stock['impact']}\n"
+                response += f"• {stock['name']} ({stock['symbol']}): {stock['impact']}{self._format_holding_impact(stock)}\n"
+        
+        if scenario:
+            response += f"\nEstimated impact on your portfolio: {self._format_impact(scenario)}\n"
         
         return {
             "agent": self.name,
             "response": response,
-            "data": {"affected_stocks": affected_stocks, "region": "India" if "india" in query else "USA"},
+            "data": {"affected_stocks": affected_stocks, "region": "India" if "india" in query else "USA",
+                     "scenario": scenario},
             "type": "traffic_impact_analysis"
         }
     
+    def _format_holding_impact(self, stock: Dict[str, Any]) -> str:
+        """' - your position: -₹x' for held stocks"""
+        if "portfolio_impact" not in stock:
+            return ""
+        pnl = stock["portfolio_impact"]
+        return f" - your position: {'+' if pnl >= 0 else '-'}{currency_service.format_currency(abs(pnl), 'INR')}"
+    
+    def _analyze_event_impact(self, query: str, language: str, portfolio_id: Optional[str] = None) -> Dict[str, Any]:
+        """How much an event would hit the portfolio: matching scenarios, or every scenario worst first"""
+        stress = self._stress_results(portfolio_id)
+        keys = [key for key in match_scenarios(query) if key in stress] or sorted(stress, key=lambda key: stress[key]["pnl"])
+        results = [{"scenario": key, **stress[key]} for key in keys]
+        
+        if language == "genz":
+            response = "💥 How Hard Would It Hit? 💥\n\n"
+            for result in results:
+                emoji = "🟢" if result["pnl"] >= 0 else "🔴"
+                response += f"{emoji} {result['name']}: {self._format_impact(result)}\n"
+        else:
+            response = "Event Impact on Your Portfolio:\n\n"
+            for result in results:
+                response += f"• {result['name']}: {self._format_impact(result)}\n"
+        
+        if len(results) == 1:
+            # One event: break it down by sector, biggest moves first
+            by_sector = sorted(results[0]["by_sector"].items(), key=lambda item: -abs(item[1]))
+            response += "\nBy sector:\n"
+            for sector, pnl in by_sector[:5]:
+                response += f"• {sector}: {'+' if pnl >= 0 else '-'}{currency_service.format_currency(abs(pnl), 'INR')}\n"
+        
+        return {
+            "agent": self.name,
+            "response": response + "\n\n📰 Source: News Analyzer Agent",
+            "data": {"scenarios": results},
+            "type": "event_impact_analysis"
+        }
+    
     def _get_market_news(self, language: str) -> Dict[str, Any]:
         """Get market news"""
         market_news = [
@@ -1,6 +1,7 @@
 from typing import Dict, Any, List
 from agents.base_agent import BaseAgent
-from data.portfolio_data import PORTFOLIO_DATA, get_portfolio_summary, get_stocks_by_criteria, get_penny_stocks, get_portfolio_data
+from data.portfolio_data import get_portfolio_snapshot
+from data.portfolio_snapshot import PortfolioSnapshot
 from services.chart_service import chart_service
 from services.currency_service import currency_service
 import yfinance as yf
@@ -20,43 +21,43 @@ class PortfolioAnalyzerAgent(BaseAgent):
         query = input_data.get("query", "").lower()
         user_language = input_data.get("language", "normal")
         
-        # Analyze portfolio performance
-        summary = get_portfolio_summary()
+        # One snapshot per request: every figure below comes from the same prices
+        snapshot = get_portfolio_snapshot(input_data.get("portfolio_id"))
+        summary = dict(snapshot.summary)
         
         if "portfolio summary" in query or "portfolio value" in query:
-            return self._generate_portfolio_summary(summary, user_language)
+            return self._generate_portfolio_summary(summary, user_language, snapshot)
         
         elif "penny stocks" in query or "low price stocks" in query:
-            return self._analyze_penny_stocks(user_language)
+            return self._analyze_penny_stocks(user_language, snapshot)
         
         elif "sector analysis" in query or "sector breakdown" in query:
-            return self._analyze_sectors(user_language)
+            return self._analyze_sectors(user_language, snapshot)
         
         elif "country analysis" in query or "geographic breakdown" in query:
-            return self._analyze_countries(user_language)
+            return self._analyze_countries(user_language, snapshot)
         
         elif "enlist stocks" in query or "list stocks" in query or "show stocks" in query:
-            return self._enlist_stocks(user_language)
+            return self._enlist_stocks(user_language, snapshot)
         
         elif "enlist sectors" in query or "list sectors" in query or "show sectors" in query:
-            return self._enlist_sectors(user_language)
+            return self._enlist_sectors(user_language, snapshot)
         
         elif "enlist countries" in query or "list countries" in query or "show countries" in query:
-            return self._enlist_countries(user_language)
+            return self._enlist_countries(user_language, snapshot)
         
         elif "performance" in query or "returns" in query:
             return self._analyze_performance(summary, user_language)
         
         elif "risk" in query or "volatility" in query:
-            return self._analyze_risk(user_language)
+            return self._analyze_risk(user_language, snapshot)
         
         else:
-            return self._generate_comprehensive_analysis(summary, user_language)
+            return self._generate_comprehensive_analysis(summary, user_language, snapshot)
     
-    def _generate_portfolio_summary(self, summary: Dict, language: str) -> Dict[str, Any]:
+    def _generate_portfolio_summary(self, summary: Dict, language: str, snapshot: PortfolioSnapshot) -> Dict[str, Any]:
         """Generate portfolio summary with charts"""
-        # Get real-time portfolio data
-        portfolio_data = get_portfolio_data()
+        portfolio_data = snapshot.to_dict()
         
         # Generate charts
         pie_chart = chart_service.generate_portfolio_pie_chart(portfolio_data)
@@ -102,9 +103,9 @@ class PortfolioAnalyzerAgent(BaseAgent):
             "type": "portfolio_summary"
         }
     
-    def _analyze_penny_stocks(self, language: str) -> Dict[str, Any]:
+    def _analyze_penny_stocks(self, language: str, snapshot: PortfolioSnapshot) -> Dict[str, Any]:
         """Analyze penny stocks"""
-        penny_stocks = get_penny_stocks()
+        penny_stocks = [dict(stock) for stock in snapshot.penny_stocks()]
         
         if language == "genz":
             response = f"""
@@ -113,8 +114,8 @@ class PortfolioAnalyzerAgent(BaseAgent):
             Found {len(penny_stocks)} penny stocks in your portfolio:
             """
             for stock in penny_stocks:
-                pnl = (stock['current_price'] - stock['avg_price']) * stock['quantity']
-                pnl_pct = ((stock['current_price'] - stock['avg_price']) / stock['avg_price']) * 100
+                pnl = stock['pnl']
+                pnl_pct = stock['pnl_percentage']
                 response += f"""
                 📊 {stock['name']} ({stock['symbol']})
                 💵 Current: ₹{stock['current_price']} | Avg: ₹{stock['avg_price']}
@@ -123,8 +124,8 @@ class PortfolioAnalyzerAgent(BaseAgent):
         else:
             response = f"Found {len(penny_stocks)} penny stocks in your portfolio:\n"
             for stock in penny_stocks:
-                pnl = (stock['current_price'] - stock['avg_price']) * stock['quantity']
-                pnl_pct = ((stock['current_price'] - stock['avg_price']) / stock['avg_price']) * 100
+                pnl = stock['pnl']
+                pnl_pct = stock['pnl_percentage']
                 response += f"""
                 {stock['name']} ({stock['symbol']})
                 Current: ₹{stock['current_price']} | Avg: ₹{stock['avg_price']}
@@ -138,15 +139,10 @@ class PortfolioAnalyzerAgent(BaseAgent):
             "type": "penny_stocks_analysis"
         }
     
-    def _analyze_sectors(self, language: str) -> Dict[str, Any]:
+    def _analyze_sectors(self, language: str, snapshot: PortfolioSnapshot) -> Dict[str, Any]:
         """Analyze sector breakdown"""
-        sectors = {}
-        for stock in PORTFOLIO_DATA["stocks"]:
-            sector = stock["sector"]
-            if sector not in sectors:
-                sectors[sector] = {"stocks": [], "total_value": 0}
-            sectors[sector]["stocks"].append(stock)
-            sectors[sector]["total_value"] += stock["quantity"] * stock["current_price"]
+        sectors = self.memoize_analysis("sector_breakdown", snapshot,
+                                        lambda: self._group_breakdown(snapshot, "sector"))
         
         if language == "genz":
             response = "🏢 Sector Breakdown 🏢\n\n"
@@ -164,15 +160,10 @@ class PortfolioAnalyzerAgent(BaseAgent):
             "type": "sector_analysis"
         }
     
-    def _analyze_countries(self, language: str) -> Dict[str, Any]:
+    def _analyze_countries(self, language: str, snapshot: PortfolioSnapshot) -> Dict[str, Any]:
         """Analyze geographic breakdown"""
-        countries = {}
-        for stock in PORTFOLIO_DATA["stocks"]:
-            country = stock["country"]
-            if country not in countries:
-                countries[country] = {"stocks": [], "total_value": 0}
-            countries[country]["stocks"].append(stock)
-            countries[country]["total_value"] += stock["quantity"] * stock["current_price"]
+        countries = self.memoize_analysis("country_breakdown", snapshot,
+                                          lambda: self._group_breakdown(snapshot, "country"))
         
         if language == "genz":
             response = "🌍 Geographic Breakdown 🌍\n\n"
@@ -190,6 +181,16 @@ class PortfolioAnalyzerAgent(BaseAgent):
             "type": "country_analysis"
         }
     
+    def _group_breakdown(self, snapshot: PortfolioSnapshot, field: str) -> Dict[str, Any]:
+        """Holdings and total value per sector or country"""
+        return {
+            label: {
+                "stocks": [dict(stock) for stock in snapshot.stocks_by(field, label)],
+                "total_value": group["total_value"]
+            }
+            for label, group in snapshot.aggregates[field].items()
+        }
+    
     def _analyze_performance(self, summary: Dict, language: str) -> Dict[str, Any]:
         """Analyze portfolio performance"""
         if language == "genz":
@@ -218,12 +219,12 @@ class PortfolioAnalyzerAgent(BaseAgent):
             "type": "performance_analysis"
         }
     
-    def _analyze_risk(self, language: str) -> Dict[str, Any]:
+    def _analyze_risk(self, language: str, snapshot: PortfolioSnapshot) -> Dict[str, Any]:
         """Analyze portfolio risk"""
         # Simple risk analysis based on diversification
-        total_stocks = len(PORTFOLIO_DATA["stocks"])
-        sectors = len(set(stock["sector"] for stock in PORTFOLIO_DATA["stocks"]))
-        countries = len(set(stock["country"] for stock in PORTFOLIO_DATA["stocks"]))
+        total_stocks = len(snapshot.stocks)
+        sectors = len(snapshot.by_sector)
+        countries = len(snapshot.by_country)
         
         if language == "genz":
             response = f"""
@@ -255,7 +256,7 @@ class PortfolioAnalyzerAgent(BaseAgent):
             "type": "risk_analysis"
         }
     
-    def _generate_comprehensive_analysis(self, summary: Dict, language: str) -> Dict[str, Any]:
+    def _generate_comprehensive_analysis(self, summary: Dict, language: str, snapshot: PortfolioSnapshot) -> Dict[str, Any]:
         """Generate comprehensive portfolio analysis"""
         if language == "genz":
             response = f"""
@@ -266,9 +267,9 @@ class PortfolioAnalyzerAgent(BaseAgent):
             🎯 P&L: ₹{summary['total_pnl']:,.0f}
             
             📊 Quick Stats:
-            • {len(PORTFOLIO_DATA['stocks'])} stocks
-            • {len(set(stock['sector'] for stock in PORTFOLIO_DATA['stocks']))} sectors
-            • {len(set(stock['country'] for stock in PORTFOLIO_DATA['stocks']))} countries
+            • {len(snapshot.stocks)} stocks
+            • {len(snapshot.by_sector)} sectors
+            • {len(snapshot.by_country)} countries
             
             {self._get_emoji_status(summary['total_pnl_percentage'])}
             """
@@ -281,9 +282,9 @@ class PortfolioAnalyzerAgent(BaseAgent):
             P&L: ₹{summary['total_pnl']:,.0f}
             
             Quick Stats:
-            • {len(PORTFOLIO_DATA['stocks'])} stocks
-            • {len(set(stock['sector'] for stock in PORTFOLIO_DATA['stocks']))} sectors
-            • {len(set(stock['country'] for stock in PORTFOLIO_DATA['stocks']))} countries
+            • {len(snapshot.stocks)} stocks
+            • {len(snapshot.by_sector)} sectors
+            • {len(snapshot.by_country)} countries
             
             {self._get_performance_status(summary['total_pnl_percentage'])}
             """
@@ -361,15 +362,15 @@ class PortfolioAnalyzerAgent(BaseAgent):
         else:
             return "Consider diversifying more to reduce risk."
     
-    def _enlist_stocks(self, language: str) -> Dict[str, Any]:
+    def _enlist_stocks(self, language: str, snapshot: PortfolioSnapshot) -> Dict[str, Any]:
         """List all stocks in the portfolio"""
-        stocks = PORTFOLIO_DATA["stocks"]
+        stocks = [dict(stock) for stock in snapshot.stocks]
         
         if language == "genz":
             response = f"📈 Your Stock Collection ({len(stocks)} stocks) 📈\n\n"
             for i, stock in enumerate(stocks, 1):
-                pnl = (stock['current_price'] - stock['avg_price']) * stock['quantity']
-                pnl_pct = ((stock['current_price'] - stock['avg_price']) / stock['avg_price']) * 100
+                pnl = stock['pnl']
+                pnl_pct = stock['pnl_percentage']
                 emoji = "🟢" if pnl >= 0 else "🔴"
                 response += f"{i}. {emoji} {stock['name']} ({stock['symbol']})\n"
                 response += f"   💰 Qty: {stock['quantity']} | Price: ₹{stock['current_price']:.2f}\n"
@@ -378,8 +379,8 @@ class PortfolioAnalyzerAgent(BaseAgent):
         else:
             response = f"Portfolio Stocks ({len(stocks)} stocks):\n\n"
             for i, stock in enumerate(stocks, 1):
-                pnl = (stock['current_price'] - stock['avg_price']) * stock['quantity']
-                pnl_pct = ((stock['current_price'] - stock['avg_price']) / stock['avg_price']) * 100
+                pnl = stock['pnl']
+                pnl_pct = stock['pnl_percentage']
                 status = "▲" if pnl >= 0 else "▼"
                 response += f"{i}. {status} {stock['name']} ({stock['symbol']})\n"
                 response += f"   Quantity: {stock['quantity']} | Current Price: ₹{stock['current_price']:.2f}\n"
@@ -393,32 +394,25 @@ class PortfolioAnalyzerAgent(BaseAgent):
             "type": "stocks_list"
         }
     
-    def _enlist_sectors(self, language: str) -> Dict[str, Any]:
+    def _enlist_sectors(self, language: str, snapshot: PortfolioSnapshot) -> Dict[str, Any]:
         """List all sectors in the portfolio"""
-        sectors = {}
-        for stock in PORTFOLIO_DATA["stocks"]:
-            sector = stock["sector"]
-            if sector not in sectors:
-                sectors[sector] = {
-                    "stocks": [],
-                    "total_value": 0,
-                    "total_investment": 0,
-                    "stock_count": 0
-                }
-            sectors[sector]["stocks"].append(stock["name"])
-            sectors[sector]["total_value"] += stock["quantity"] * stock["current_price"]
-            sectors[sector]["total_investment"] += stock["quantity"] * stock["avg_price"]
-            sectors[sector]["stock_count"] += 1
-        
-        # Calculate sector percentages
-        total_portfolio_value = sum(s["total_value"] for s in sectors.values())
+        sectors = {
+            sector: {
+                "stocks": list(group["names"]),
+                "total_value": group["total_value"],
+                "total_investment": group["total_investment"],
+                "stock_count": group["stock_count"]
+            }
+            for sector, group in snapshot.by_sector.items()
+        }
         
         if language == "genz":
             response = f"🏢 Your Sector Breakdown ({len(sectors)} sectors) 🏢\n\n"
             for i, (sector, data) in enumerate(sectors.items(), 1):
-                pnl = data["total_value"] - data["total_investment"]
-                pnl_pct = (pnl / data["total_investment"]) * 100 if data["total_investment"] > 0 else 0
-                allocation_pct = (data["total_value"] / total_portfolio_value) * 100
+                group = snapshot.by_sector[sector]
+                pnl = group["pnl"]
+                pnl_pct = group["pnl_percentage"]
+                allocation_pct = group["allocation_percentage"]
                 emoji = "🟢" if pnl >= 0 else "🔴"
                 response += f"{i}. {emoji} {sector}\n"
                 response += f"   💰 Value: ₹{data['total_value']:,.0f} ({allocation_pct:.1f}%)\n"
@@ -430,9 +424,10 @@ class PortfolioAnalyzerAgent(BaseAgent):
         else:
             response = f"Portfolio Sectors ({len(sectors)} sectors):\n\n"
             for i, (sector, data) in enumerate(sectors.items(), 1):
-                pnl = data["total_value"] - data["total_investment"]
-                pnl_pct = (pnl / data["total_investment"]) * 100 if data["total_investment"] > 0 else 0
-                allocation_pct = (data["total_value"] / total_portfolio_value) * 100
+                group = snapshot.by_sector[sector]
+                pnl = group["pnl"]
+                pnl_pct = group["pnl_percentage"]
+                allocation_pct = group["allocation_percentage"]
                 status = "▲" if pnl >= 0 else "▼"
                 response += f"{i}. {status} {sector}\n"
                 response += f"   Value: ₹{data['total_value']:,.0f} ({allocation_pct:.1f}% of portfolio)\n"
@@ -449,34 +444,26 @@ class PortfolioAnalyzerAgent(BaseAgent):
             "type": "sectors_list"
         }
     
-    def _enlist_countries(self, language: str) -> Dict[str, Any]:
+    def _enlist_countries(self, language: str, snapshot: PortfolioSnapshot) -> Dict[str, Any]:
         """List all countries in the portfolio"""
-        countries = {}
-        for stock in PORTFOLIO_DATA["stocks"]:
-            country = stock["country"]
-            if country not in countries:
-                countries[country] = {
-                    "stocks": [],
-                    "sectors": set(),
-                    "total_value": 0,
-                    "total_investment": 0,
-                    "stock_count": 0
-                }
-            countries[country]["stocks"].append(stock["name"])
-            countries[country]["sectors"].add(stock["sector"])
-            countries[country]["total_value"] += stock["quantity"] * stock["current_price"]
-            countries[country]["total_investment"] += stock["quantity"] * stock["avg_price"]
-            countries[country]["stock_count"] += 1
-        
-        # Calculate country percentages
-        total_portfolio_value = sum(c["total_value"] for c in countries.values())
+        countries = {
+            country: {
+                "stocks": list(group["names"]),
+                "sectors": list(group["sectors"]),
+                "total_value": group["total_value"],
+                "total_investment": group["total_investment"],
+                "stock_count": group["stock_count"]
+            }
+            for country, group in snapshot.by_country.items()
+        }
         
         if language == "genz":
             response = f"🌍 Your Geographic Breakdown ({len(countries)} countries) 🌍\n\n"
             for i, (country, data) in enumerate(countries.items(), 1):
-                pnl = data["total_value"] - data["total_investment"]
-                pnl_pct = (pnl / data["total_investment"]) * 100 if data["total_investment"] > 0 else 0
-                allocation_pct = (data["total_value"] / total_portfolio_value) * 100
+                group = snapshot.by_country[country]
+                pnl = group["pnl"]
+                pnl_pct = group["pnl_percentage"]
+                allocation_pct = group["allocation_percentage"]
                 emoji = "🟢" if pnl >= 0 else "🔴"
                 flag = "🇮🇳" if country == "India" else "🇺🇸"
                 response += f"{i}. {emoji} {flag} {country}\n"
@@ -490,9 +477,10 @@ class PortfolioAnalyzerAgent(BaseAgent):
         else:
             response = f"Portfolio Countries ({len(countries)} countries):\n\n"
             for i, (country, data) in enumerate(countries.items(), 1):
-                pnl = data["total_value"] - data["total_investment"]
-                pnl_pct = (pnl / data["total_investment"]) * 100 if data["total_investment"] > 0 else 0
-                allocation_pct = (data["total_value"] / total_portfolio_value) * 100
+                group = snapshot.by_country[country]
+                pnl = group["pnl"]
+                pnl_pct = group["pnl_percentage"]
+                allocation_pct = group["allocation_percentage"]
                 status = "▲" if pnl >= 0 else "▼"
                 response += f"{i}. {status} {country}\n"
                 response += f"   Value: ₹{data['total_value']:,.0f} ({allocation_pct:.1f}% of portfolio)\n"
@@ -1,7 +1,15 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import config
 from agents.base_agent import BaseAgent
-from data.portfolio_data import get_portfolio_data, get_portfolio_summary
-import random
+from data.portfolio_data import get_portfolio_snapshot, get_portfolio_summary
+from data.portfolio_snapshot import PortfolioSnapshot
+from services.currency_service import currency_service
+from services.monte_carlo import monte_carlo, is_simulation_query, parse_scenario
+from services.risk_engine import risk_engine
+from services.value_at_risk import inr_exposures, var_service
+
+# Annualized volatility assumed when no holding has price history
+FALLBACK_VOLATILITY = 0.25
 
 class RiskAnalyzerAgent(BaseAgent):
     """Agent for analyzing portfolio risk and providing risk management advice"""
@@ -18,12 +26,24 @@ class RiskAnalyzerAgent(BaseAgent):
         user_language = input_data.get("language", "normal")
         
         try:
-            # Analyze portfolio risk
-            risk_analysis = self._analyze_portfolio_risk()
+            # Analyze portfolio risk (once per snapshot version)
+            snapshot = get_portfolio_snapshot(input_data.get("portfolio_id"))
+            risk_analysis = self.memoize_analysis("portfolio_risk", snapshot,
+                                                  lambda: self._analyze_portfolio_risk(snapshot))
             
             # Generate response based on language preference
             response = self._format_risk_response(risk_analysis, user_language)
             
+            # Forward simulation for "what happens if ..." questions
+            if is_simulation_query(query):
+                scenario = parse_scenario(query)
+                simulation = self.memoize_analysis(
+                    f"simulation|{scenario.get('initial_shock', 0)}|{scenario.get('volatility_scale', 1)}", snapshot,
+                    lambda: self._simulate(snapshot, scenario))
+                if simulation:
+                    risk_analysis = {**risk_analysis, "simulation": simulation}
+                    response += self._format_simulation(simulation)
+            
             return {
                 "agent": self.name,
                 "response": response + "\n\n⚠️ Source: Risk Analyzer Agent",
@@ -40,33 +60,29 @@ class RiskAnalyzerAgent(BaseAgent):
                 "type": "error"
             }
     
-    def _analyze_portfolio_risk(self) -> Dict[str, Any]:
+    def _analyze_portfolio_risk(self, snapshot: PortfolioSnapshot) -> Dict[str, Any]:
         """Analyze portfolio risk metrics"""
-        portfolio_data = get_portfolio_data()
-        
         # Calculate risk metrics
-        total_value = sum(stock['quantity'] * stock['current_price'] for stock in portfolio_data['stocks'])
-        total_investment = sum(stock['quantity'] * stock['avg_price'] for stock in portfolio_data['stocks'])
+        total_value = snapshot.stock_summary['total_value']
+        total_investment = snapshot.stock_summary['total_investment']
         
-        # Calculate volatility (simulated)
-        volatility = random.uniform(0.15, 0.35)
+        # Volatility, beta and risk contributions from the covariance of daily returns,
+        # weighted by value in INR so USD and INR holdings are comparable
+        holdings = snapshot.holdings
+        symbols = [record["symbol"] for record in holdings.records]
+        countries = [record.get("country", "") for record in holdings.records]
+        exposures, _ = inr_exposures(symbols, holdings.current_value, countries)
+        risk = risk_engine.analyze(list(exposures), [value for _, value in exposures.values()])
+        volatility = risk["volatility"] if risk else FALLBACK_VOLATILITY
         
-        # Calculate sector concentration
-        sectors = {}
-        for stock in portfolio_data['stocks']:
-            sector = stock['sector']
-            current_value = stock['quantity'] * stock['current_price']
-            sectors[sector] = sectors.get(sector, 0) + current_value
+        # Tail risk (VaR / CVaR in INR) over the same returns window
+        value_at_risk = var_service.compute(symbols, holdings.current_value, countries)
         
+        # Sector and country concentration from the snapshot aggregates
+        sectors = {sector: group['total_value'] for sector, group in snapshot.by_sector.items()}
         max_sector_concentration = max(sectors.values()) / total_value if sectors else 0
         
-        # Calculate country concentration
-        countries = {}
-        for stock in portfolio_data['stocks']:
-            country = stock['country']
-            current_value = stock['quantity'] * stock['current_price']
-            countries[country] = countries.get(country, 0) + current_value
-        
+        countries = {country: group['total_value'] for country, group in snapshot.by_country.items()}
         max_country_concentration = max(countries.values()) / total_value if countries else 0
         
         # Risk assessment
@@ -77,15 +93,42 @@ class RiskAnalyzerAgent(BaseAgent):
             "total_value": total_value,
             "total_investment": total_investment,
             "volatility": volatility,
+            "volatility_source": "covariance" if risk else "fallback",
+            "beta": risk["beta"] if risk else None,
+            "risk_contributions": risk["risk_contributions"] if risk else [],
+            "correlation_clusters": risk["correlation_clusters"] if risk else [],
+            "history_coverage": risk["coverage"] if risk else 0.0,
+            "value_at_risk": value_at_risk,
             "sector_concentration": max_sector_concentration,
             "country_concentration": max_country_concentration,
             "risk_score": risk_score,
             "risk_level": risk_level,
             "sectors": sectors,
             "countries": countries,
-            "recommendations": self._generate_risk_recommendations(risk_score, sectors, countries)
+            "recommendations": self._generate_risk_recommendations(risk_score, sectors, countries, risk)
         }
     
+    def _simulate(self, snapshot: PortfolioSnapshot, scenario: Dict[str, float]) -> Optional[Dict[str, Any]]:
+        """Monte Carlo paths of the stock holdings under the query's scenario"""
+        holdings = snapshot.holdings
+        return monte_carlo.simulate([record["symbol"] for record in holdings.records], holdings.current_value,
+                                    [record.get("country", "") for record in holdings.records],
+                                    paths=config.MONTE_CARLO_AGENT_PATHS, **scenario)
+    
+    def _format_simulation(self, simulation: Dict[str, Any]) -> str:
+        """Simulation findings appended to the risk report"""
+        bands = simulation["bands"]
+        shock = simulation["initial_shock"]
+        scenario = f" after an immediate {shock:+.0%} move" if shock else ""
+        return f"""
+        Monte Carlo Outlook ({simulation['paths_completed']:,} paths, {simulation['horizon_days']} trading days{scenario}):
+        • Chance of ending below today's value: {simulation['probability_of_loss']:.0%}
+        • Likely range (5th-95th percentile): {currency_service.format_currency(bands['p5'][-1], 'INR')} - {currency_service.format_currency(bands['p95'][-1], 'INR')}
+        • Average of the worst 5% of outcomes: {simulation['expected_shortfall_5']:.1%}
+        • Typical peak-to-trough drawdown: {simulation['median_max_drawdown']:.1%}
+        • Chance of a drawdown over 20%: {simulation['probability_drawdown_over_20']:.0%}
+        """
+    
     def _calculate_risk_score(self, volatility: float, sector_concentration: float, country_concentration: float) -> float:
         """Calculate overall risk score"""
         # Weighted risk factors
@@ -110,10 +153,23 @@ class RiskAnalyzerAgent(BaseAgent):
         else:
             return "High"
     
-    def _generate_risk_recommendations(self, risk_score: float, sectors: Dict[str, float], countries: Dict[str, float]) -> list:
+    def _generate_risk_recommendations(self, risk_score: float, sectors: Dict[str, float], countries: Dict[str, float],
+                                       risk: Optional[Dict[str, Any]] = None) -> list:
         """Generate risk management recommendations"""
         recommendations = []
         
+        if risk:
+            contributions = risk["risk_contributions"]
+            if contributions and contributions[0]["risk_share"] > 0.25:
+                top = contributions[0]
+                recommendations.append(f"{top['symbol']} drives {top['risk_share']:.0%} of portfolio volatility "
+                                       f"with a {top['weight']:.0%} weight - consider trimming it")
+            for cluster in risk["correlation_clusters"][:2]:
+                if cluster["weight"] > 0.2:
+                    recommendations.append(f"{', '.join(cluster['symbols'])} move together "
+                                           f"(correlation {cluster['average_correlation']:.2f}, "
+                                           f"{cluster['weight']:.0%} of holdings) - they offer little diversification")
+        
         if risk_score > 0.6:
             recommendations.append("Consider reducing portfolio concentration in high-risk sectors")
             recommendations.append("Diversify across more countries to reduce geopolitical risk")
@@ -162,7 +218,7 @@ class RiskAnalyzerAgent(BaseAgent):
         🔍 Key Findings:
         • Sector Concentration: {risk_analysis['sector_concentration']:.2%}
         • Country Concentration: {risk_analysis['country_concentration']:.2%}
-        
+        {self._format_risk_drivers(risk_analysis)}
         💡 Recommendations:
         """
         
@@ -186,7 +242,7 @@ class RiskAnalyzerAgent(BaseAgent):
         Key Risk Metrics:
         • Sector Concentration: {risk_analysis['sector_concentration']:.2%}
         • Country Concentration: {risk_analysis['country_concentration']:.2%}
-        
+        {self._format_risk_drivers(risk_analysis)}
         Recommendations:
         """
         
@@ -194,3 +250,22 @@ class RiskAnalyzerAgent(BaseAgent):
             response += f"• {rec}\n"
         
         return response
+    
+    def _format_risk_drivers(self, risk_analysis: Dict[str, Any]) -> str:
+        """Beta and top risk contributors lines (empty without price history)"""
+        lines = []
+        if risk_analysis.get("beta") is not None:
+            lines.append(f"• Beta: {risk_analysis['beta']:.2f}")
+        drivers = ", ".join(f"{item['symbol']} ({item['risk_share']:.0%})"
+                            for item in risk_analysis.get("risk_contributions", [])[:3])
+        if drivers:
+            lines.append(f"• Top Risk Contributors: {drivers}")
+        value_at_risk = risk_analysis.get("value_at_risk")
+        if value_at_risk:
+            for horizon, levels in value_at_risk["methods"].get("historical", {}).items():
+                for level, measures in levels.items():
+                    lines.append(f"• {horizon[:-1]}-Day VaR ({level}): "
+                                 f"{currency_service.format_currency(measures['var'], 'INR')} "
+                                 f"({measures['var_pct']:.2%}), expected shortfall "
+                                 f"{currency_service.format_currency(measures['cvar'], 'INR')}")
+        return "\n        ".join(lines) + "\n" if lines else ""
@@ -1,6 +1,6 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from agents.base_agent import BaseAgent
-from data.portfolio_data import get_portfolio_data
+from data.portfolio_data import get_portfolio_snapshot
 import random
 
 class SentimentAnalyzerAgent(BaseAgent):
@@ -38,7 +38,7 @@ class SentimentAnalyzerAgent(BaseAgent):
         
         try:
             # Get portfolio stocks for sentiment analysis
-            portfolio_stocks = self._get_portfolio_stocks()
+            portfolio_stocks = self._get_portfolio_stocks(input_data.get("portfolio_id"))
             
             # Perform sentiment analysis
             sentiment_analysis = self._perform_sentiment_analysis(portfolio_stocks)
@@ -62,10 +62,9 @@ class SentimentAnalyzerAgent(BaseAgent):
                 "type": "error"
             }
     
-    def _get_portfolio_stocks(self) -> list:
+    def _get_portfolio_stocks(self, portfolio_id: Optional[str] = None) -> list:
         """Get stocks from portfolio for sentiment analysis"""
-        portfolio_data = get_portfolio_data()
-        return portfolio_data['stocks']
+        return list(get_portfolio_snapshot(portfolio_id).stocks)
     
     def _perform_sentiment_analysis(self, stocks: list) -> Dict[str, Any]:
         """Perform sentiment analysis on portfolio stocks"""
@@ -1,6 +1,8 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from agents.base_agent import BaseAgent
-from data.portfolio_data import get_portfolio_data
+from data.portfolio_data import get_portfolio_snapshot
+from services.real_time_data import real_time_service
+import math
 import random
 
 class TechnicalAnalyzerAgent(BaseAgent):
@@ -33,7 +35,7 @@ class TechnicalAnalyzerAgent(BaseAgent):
         
         try:
             # Get portfolio stocks for analysis
-            portfolio_stocks = self._get_portfolio_stocks()
+            portfolio_stocks = self._get_portfolio_stocks(input_data.get("portfolio_id"))
             
             # Perform technical analysis
             technical_analysis = self._perform_technical_analysis(portfolio_stocks)
@@ -57,22 +59,24 @@ class TechnicalAnalyzerAgent(BaseAgent):
                 "type": "error"
             }
     
-    def _get_portfolio_stocks(self) -> list:
+    def _get_portfolio_stocks(self, portfolio_id: Optional[str] = None) -> list:
         """Get stocks from portfolio for analysis"""
-        portfolio_data = get_portfolio_data()
-        return portfolio_data['stocks']
+        return list(get_portfolio_snapshot(portfolio_id).stocks)
     
     def _perform_technical_analysis(self, stocks: list) -> Dict[str, Any]:
-        """Perform technical analysis on portfolio stocks"""
+        """Perform technical analysis on portfolio stocks from their price history"""
+        indicators = self._get_indicators([stock['symbol'] for stock in stocks])
         stock_analysis = {}
         
         for stock in stocks:
             stock_symbol = stock['symbol']
+            values = indicators.get(stock_symbol, {})
+            current_price = stock['current_price']
             
-            # Generate technical indicators (simulated)
-            rsi = random.uniform(20, 80)
-            macd_signal = random.choice(["positive", "negative", "neutral"])
-            moving_average_trend = random.choice(["bullish", "bearish", "neutral"])
+            # Indicators from history; neutral defaults where history is missing or too short
+            rsi = _finite(values.get('rsi'), 50.0)
+            macd_signal = self._classify_macd(values)
+            moving_average_trend = self._classify_moving_averages(values)
             pattern = self._generate_chart_pattern()
             
             # Determine overall technical signal
@@ -84,8 +88,9 @@ class TechnicalAnalyzerAgent(BaseAgent):
                 "moving_average_trend": moving_average_trend,
                 "chart_pattern": pattern,
                 "technical_signal": technical_signal,
-                "support_level": stock['current_price'] * random.uniform(0.85, 0.95),
-                "resistance_level": stock['current_price'] * random.uniform(1.05, 1.15),
+                "support_level": _finite(values.get('support'), current_price * 0.9),
+                "resistance_level": _finite(values.get('resistance'), current_price * 1.1),
+                "bollinger_percent_b": _finite(values.get('bb_percent_b'), 0.5),
                 "recommendations": self._generate_technical_recommendations(technical_signal, rsi, pattern)
             }
         
@@ -99,6 +104,39 @@ class TechnicalAnalyzerAgent(BaseAgent):
             "key_levels": self._get_key_levels(stock_analysis)
         }
     
+    def _get_indicators(self, symbols: list) -> Dict[str, Dict[str, float]]:
+        """Latest indicators per symbol from the streaming state (history is replayed only for new or stale symbols)"""
+        try:
+            return real_time_service.get_indicators_many(symbols)
+        except Exception as e:
+            print(f"Error computing technical indicators: {e}")
+            return {}
+    
+    def _classify_macd(self, values: Dict[str, float]) -> str:
+        """MACD histogram direction, neutral within 0.1% of price"""
+        histogram = _finite(values.get('macd_histogram'), 0.0)
+        threshold = 0.001 * _finite(values.get('close'), 0.0)
+        if histogram > threshold:
+            return "positive"
+        if histogram < -threshold:
+            return "negative"
+        return "neutral"
+    
+    def _classify_moving_averages(self, values: Dict[str, float]) -> str:
+        """Trend from price against the 20- and 50-day moving averages"""
+        close = _finite(values.get('close'), None)
+        sma_20 = _finite(values.get('sma_20'), None)
+        if close is None or sma_20 is None:
+            return "neutral"
+        
+        # Short histories have no 50-day average; fall back to the 20-day one
+        sma_50 = _finite(values.get('sma_50'), sma_20)
+        if close > sma_20 >= sma_50:
+            return "bullish"
+        if close < sma_20 <= sma_50:
+            return "bearish"
+        return "neutral"
+    
     def _generate_chart_pattern(self) -> str:
         """Generate a random chart pattern"""
         pattern_type = random.choice(list(self.technical_patterns.keys()))
@@ -330,3 +368,10 @@ class TechnicalAnalyzerAgent(BaseAgent):
             response += f"• {insight}\n"
         
         return response
+
+
+def _finite(value: Any, default: Optional[float]) -> Optional[float]:
+    """value as a float, or default when missing or NaN"""
+    if value is None or not math.isfinite(value):
+        return default
+    return float(value)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the WealthLens API.
+
+Drives the FastAPI app in-process over an ASGI transport with network services
+stubbed out, at one or more concurrency levels, and reports throughput, latency
+percentiles and allocations per endpoint. Results can be saved as a baseline and
+later runs compared against it.
+
+    python -m benchmarks.load_test --concurrency 1,8,32 --requests 200
+    python -m benchmarks.load_test --save-baseline local
+    python -m benchmarks.load_test --compare local --tolerance 0.25
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks import stubs
+import httpx
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+# Non-chat endpoints exercised alongside the /chat query mix: (label, method, path)
+ENDPOINTS = [
+    ("GET /portfolio", "GET", "/portfolio"),
+    ("GET /portfolio?detailed", "GET", "/portfolio?analysis_type=detailed"),
+    ("GET /portfolio?sectors", "GET", "/portfolio?analysis_type=sectors"),
+    ("GET /portfolio/penny-stocks", "GET", "/portfolio/penny-stocks"),
+    ("GET /health", "GET", "/health")
+]
+
+
+def percentile(sorted_values: List[float], quantile: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(quantile * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def load_chat_queries(client: httpx.AsyncClient) -> List[str]:
+    """Flatten the /examples query lists into the chat query mix"""
+    response = await client.get("/examples")
+    response.raise_for_status()
+    return [query for queries in response.json().values() if isinstance(queries, list) for query in queries]
+
+
+def build_requests(queries: List[str]) -> List[Tuple[str, str, str, Optional[Dict[str, Any]]]]:
+    """One (label, method, path, body) per request in the mix"""
+    requests = [("POST /chat", "POST", "/chat", {"message": query, "language": "normal"}) for query in queries]
+    requests.extend((label, method, path, None) for label, method, path in ENDPOINTS)
+    return requests
+
+
+async def run_level(client: httpx.AsyncClient, mix: List[Tuple[str, str, str, Optional[Dict[str, Any]]]],
+                    concurrency: int, total: int, unique_queries: bool = False) -> Dict[str, Dict[str, Any]]:
+    """Issue total requests from the mix with concurrency workers; latencies per endpoint"""
+    latencies = {}
+    errors = {}
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index
+        while next_index < total:
+            label, method, path, body = mix[next_index % len(mix)]
+            if unique_queries and body is not None:
+                # A per-request suffix defeats the response cache so agents run every time
+                body = {**body, "message": f"{body['message']} #{next_index}-{time.perf_counter_ns()}"}
+            next_index += 1
+            started_at = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            latencies.setdefault(label, []).append(time.perf_counter() - started_at)
+            if failed:
+                errors[label] = errors.get(label, 0) + 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started_at
+
+    results = {}
+    for label, samples in sorted(latencies.items()):
+        samples.sort()
+        results[label] = {
+            "requests": len(samples),
+            "errors": errors.get(label, 0),
+            "throughput_rps": round(len(samples) / elapsed, 2),
+            "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(samples, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(samples, 0.99) * 1000, 3)
+        }
+    results["ALL"] = {
+        "requests": total,
+        "errors": sum(errors.values()),
+        "throughput_rps": round(total / elapsed, 2),
+        "elapsed_s": round(elapsed, 3)
+    }
+    return results
+
+
+async def measure_allocations(client: httpx.AsyncClient, mix: List[Tuple[str, str, str, Optional[Dict[str, Any]]]],
+                              samples: int) -> Dict[str, Dict[str, float]]:
+    """Mean peak traced allocation per request for each endpoint (sequential, separate from timing runs)"""
+    by_label = {}
+    for label, method, path, body in mix:
+        by_label.setdefault(label, []).append((method, path, body))
+
+    results = {}
+    tracemalloc.start()
+    try:
+        for label, requests in sorted(by_label.items()):
+            peaks = []
+            for method, path, body in (requests * samples)[:samples]:
+                tracemalloc.clear_traces()
+                tracemalloc.reset_peak()
+                baseline, _ = tracemalloc.get_traced_memory()
+                await client.request(method, path, json=body)
+                _, peak = tracemalloc.get_traced_memory()
+                peaks.append(peak - baseline)
+            results[label] = {"alloc_peak_kb": round(sum(peaks) / len(peaks) / 1024, 1)}
+    finally:
+        tracemalloc.stop()
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of current against baseline beyond tolerance (fractional)"""
+    regressions = []
+    for level, endpoints in current["levels"].items():
+        for label, metrics in endpoints.items():
+            reference = baseline.get("levels", {}).get(level, {}).get(label)
+            if reference is None:
+                continue
+            if reference.get("p95_ms") and metrics["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+                regressions.append(f"c={level} {label}: p95 {reference['p95_ms']}ms -> {metrics['p95_ms']}ms")
+            if reference.get("throughput_rps") and metrics["throughput_rps"] < reference["throughput_rps"] * (1 - tolerance):
+                regressions.append(f"c={level} {label}: throughput {reference['throughput_rps']} -> {metrics['throughput_rps']} rps")
+    return regressions
+
+
+def print_report(report: Dict[str, Any]):
+    """Print the results table"""
+    header = f"{'endpoint':<32}{'reqs':>7}{'err':>5}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'alloc KB':>10}"
+    for level, endpoints in report["levels"].items():
+        print(f"\nconcurrency={level}  ({endpoints['ALL']['throughput_rps']} req/s overall, "
+              f"{endpoints['ALL']['elapsed_s']}s)")
+        print(header)
+        for label, metrics in endpoints.items():
+            if label == "ALL":
+                continue
+            alloc = report.get("allocations", {}).get(label, {}).get("alloc_peak_kb", "")
+            print(f"{label:<32}{metrics['requests']:>7}{metrics['errors']:>5}{metrics['throughput_rps']:>10}"
+                  f"{metrics['p50_ms']:>10}{metrics['p95_ms']:>10}{metrics['p99_ms']:>10}{alloc:>10}")
+
+
+async def run(args) -> Dict[str, Any]:
+    """Warm up, run every concurrency level and collect the report"""
+    import main
+
+    stubs.install()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+        queries = await load_chat_queries(client)
+        mix = build_requests(queries)
+
+        # Warm-up: imports, snapshots and caches
+        await run_level(client, mix, 1, len(mix))
+
+        levels = {}
+        for concurrency in args.concurrency:
+            levels[str(concurrency)] = await run_level(client, mix, concurrency, args.requests, args.no_cache)
+
+        allocations = await measure_allocations(client, mix, args.alloc_samples) if args.alloc_samples else {}
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "requests_per_level": args.requests,
+        "response_cache": not args.no_cache,
+        "levels": levels,
+        "allocations": allocations
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline WealthLens load test")
+    parser.add_argument("--concurrency", type=lambda value: [int(level) for level in value.split(",")],
+                        default=[1, 8, 32], help="comma-separated concurrency levels (default 1,8,32)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--alloc-samples", type=int, default=5, help="requests per endpoint for allocation tracing (0 to skip)")
+    parser.add_argument("--no-cache", action="store_true", help="make every chat query unique to bypass the response cache")
+    parser.add_argument("--save-baseline", metavar="NAME", help="save results to benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against benchmarks/baselines/NAME.json")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression as a fraction (default 0.25)")
+    parser.add_argument("--json", action="store_true", help="print the raw report as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save_baseline}.json"
+        path.write_text(json.dumps(report, indent=2))
+        print(f"\nBaseline saved to {path}")
+
+    if args.compare:
+        path = BASELINE_DIR / f"{args.compare}.json"
+        if not path.exists():
+            print(f"\nBaseline not found: {path}")
+            return 2
+        regressions = compare(report, json.loads(path.read_text()), args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"   {regression}")
+            return 1
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%} against {path.name}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
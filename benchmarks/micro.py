@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for intent classification, portfolio access, agents and charts.
+
+Each hot path is timed over synthetic inputs of increasing size (portfolios of 13
+up to 10k holdings, queries of 3 up to 200 words) with network services stubbed
+out. The report gives per-call latency at every size plus a fitted scaling
+exponent (time ~ size^k), so algorithmic regressions show up as a change in k
+rather than a shift in one number.
+
+    python -m benchmarks.micro
+    python -m benchmarks.micro --holdings 13,1000 --only agent. --json
+    python -m benchmarks.micro --save-baseline local
+    python -m benchmarks.micro --compare local --tolerance 0.3
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Synthetic portfolios hold up to 10k symbols: size the caches and the quote rate
+# limit so runs measure the code paths rather than evictions and throttling
+os.environ.setdefault("QUOTE_CACHE_MAX_SIZE", "50000")
+os.environ.setdefault("QUOTE_REQUESTS_PER_MINUTE", "1000000")
+
+from benchmarks import stubs
+from benchmarks.load_test import BASELINE_DIR
+import numpy as np
+
+HOLDING_SIZES = [13, 100, 1000, 10000]
+QUERY_LENGTHS = [3, 10, 50, 200]
+
+SECTORS = ["IT", "Banking", "Oil & Gas", "FMCG", "Pharma", "Automotive", "Technology", "Consumer Discretionary"]
+COUNTRIES = ["India", "USA"]
+MARKET_CAPS = ["Large Cap", "Mid Cap", "Small Cap"]
+
+# Words the synthetic queries are drawn from: intent keywords, typos and filler
+QUERY_WORDS = [
+    "portfolio", "performance", "risk", "news", "market", "sector", "stocks", "price", "analysis",
+    "invest", "buy", "sell", "technical", "rsi", "sentiment", "bullish", "volatility", "dividend",
+    "portfolo", "perfomance", "rsk", "nws", "the", "my", "is", "what", "how", "should", "i", "about",
+    "today", "please", "tell", "me", "and", "with", "for", "show", "current", "value"
+]
+
+
+def synthetic_portfolio(holdings: int) -> Dict[str, Any]:
+    """Deterministic portfolio with the given number of stock holdings"""
+    rng = np.random.default_rng(holdings)
+    avg_prices = rng.uniform(5, 5000, holdings).round(2)
+    stocks = []
+    for index in range(holdings):
+        country = COUNTRIES[index % len(COUNTRIES)]
+        stocks.append({
+            "symbol": f"SYN{index:05d}" + (".NS" if country == "India" else ""),
+            "name": f"Synthetic {index}",
+            "quantity": int(rng.integers(1, 2000)),
+            "avg_price": float(avg_prices[index]),
+            "current_price": float(avg_prices[index]),
+            "sector": SECTORS[index % len(SECTORS)],
+            "country": country,
+            "market_cap": MARKET_CAPS[index % len(MARKET_CAPS)]
+        })
+    return {"stocks": stocks, "mutual_funds": [], "last_updated": "synthetic"}
+
+
+def synthetic_prices(portfolio: Dict[str, Any]) -> Dict[str, float]:
+    """Live prices within +/-20% of each holding's average price"""
+    rng = np.random.default_rng(len(portfolio["stocks"]) + 1)
+    return {stock["symbol"]: round(stock["avg_price"] * float(rng.uniform(0.8, 1.2)), 2)
+            for stock in portfolio["stocks"]}
+
+
+def synthetic_query(words: int) -> str:
+    """Deterministic query of the given word count"""
+    rng = np.random.default_rng(words)
+    return " ".join(QUERY_WORDS[index] for index in rng.integers(0, len(QUERY_WORDS), words))
+
+
+def time_call(func: Callable[[], Any], repeat: int, min_sample_time: float) -> Dict[str, Any]:
+    """Per-call latency: loops per sample are calibrated so each sample runs at least min_sample_time"""
+    started_at = time.perf_counter()
+    func()
+    first_call = time.perf_counter() - started_at
+    loops = max(1, min(100_000, int(min_sample_time / first_call))) if first_call > 0 else 100_000
+
+    samples = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - started_at) / loops)
+    samples.sort()
+    return {
+        "loops": loops,
+        "median_us": round(samples[len(samples) // 2] * 1e6, 3),
+        "min_us": round(samples[0] * 1e6, 3),
+        "max_us": round(samples[-1] * 1e6, 3)
+    }
+
+
+def scaling_exponent(points: Dict[str, Dict[str, Any]]) -> Optional[float]:
+    """Least-squares slope of log(median) against log(size); None with fewer than two sizes"""
+    sizes = [(int(size), result["median_us"]) for size, result in points.items() if result["median_us"] > 0]
+    if len(sizes) < 2:
+        return None
+    x = np.log([size for size, _ in sizes])
+    y = np.log([median for _, median in sizes])
+    return round(float(np.polyfit(x, y, 1)[0]), 3)
+
+
+def build_cases(holding_sizes: List[int], query_lengths: List[int]) -> List[Dict[str, Any]]:
+    """Benchmark cases as {name, axis, size, func}; registers one synthetic portfolio per size"""
+    from agents.master_agent import MasterAgent
+    from data.portfolio_data import save_portfolio, get_portfolio_summary, get_portfolio_data
+    from services.chart_service import chart_service
+    from services.quote_provider import StaticQuoteProvider
+    from services.real_time_data import real_time_service, FALLBACK_PRICES
+
+    master = MasterAgent()
+    prices = dict(FALLBACK_PRICES)
+    cases = []
+
+    # Intent classification over query length
+    pattern = "portfolio performance analysis"
+    for words in query_lengths:
+        query = synthetic_query(words)
+        query_words = query.split()
+        cases.append({"name": "master._classify_intent", "axis": "query_words", "size": words,
+                      "func": lambda query=query: master._classify_intent(query)})
+        cases.append({"name": "master._word_similarity", "axis": "query_words", "size": words,
+                      "func": lambda query_words=query_words: master._word_similarity(pattern, query_words)})
+
+    # Portfolio access, agents and charts over holdings count
+    portfolios = {}
+    for holdings in holding_sizes:
+        portfolio = synthetic_portfolio(holdings)
+        prices.update(synthetic_prices(portfolio))
+        portfolio_id = f"bench-{holdings}"
+        save_portfolio(portfolio_id, "benchmark", portfolio, name=f"Benchmark {holdings}")
+        portfolios[holdings] = portfolio_id
+    real_time_service.set_provider(StaticQuoteProvider(prices))
+
+    for holdings, portfolio_id in portfolios.items():
+        def size_case(name: str, func: Callable[[], Any]):
+            cases.append({"name": name, "axis": "holdings", "size": holdings, "func": func})
+
+        size_case("portfolio.get_portfolio_summary", lambda pid=portfolio_id: get_portfolio_summary(pid))
+        size_case("portfolio.get_portfolio_data", lambda pid=portfolio_id: get_portfolio_data(pid))
+
+        for intent, agent in master.agents.items():
+            input_data = {"query": f"{intent.replace('_', ' ')} of my portfolio", "portfolio_id": portfolio_id}
+
+            def process(agent=agent, input_data=input_data):
+                # Drop memoized analyses so every call measures the computation itself
+                agent.analysis_cache.invalidate()
+                return agent.process(input_data)
+
+            size_case(f"agent.{intent}.process", process)
+
+        for method in ("generate_portfolio_pie_chart", "generate_portfolio_performance_chart",
+                       "generate_risk_metrics_chart", "generate_market_sentiment_chart",
+                       "generate_comprehensive_dashboard"):
+            size_case(f"charts.{method}",
+                      lambda method=method, pid=portfolio_id: getattr(chart_service, method)(get_portfolio_data(pid)))
+
+        symbol = f"SYN{holdings - 1:05d}"
+        size_case("charts.generate_stock_price_chart",
+                  lambda symbol=symbol: chart_service.generate_stock_price_chart(symbol))
+
+    return cases
+
+
+def run(args) -> Dict[str, Any]:
+    """Run every selected case and collect the report"""
+    stubs.install()
+    cases = build_cases(args.holdings, args.query_lengths)
+    if args.only:
+        cases = [case for case in cases if re.search(args.only, case["name"])]
+
+    benchmarks = {}
+    for case in cases:
+        result = time_call(case["func"], args.repeat, args.min_time)
+        entry = benchmarks.setdefault(case["name"], {"axis": case["axis"], "sizes": {}})
+        entry["sizes"][str(case["size"])] = result
+        if not args.json:
+            print(f"  {case['name']:<48}{case['axis']:>12}={case['size']:<7}{result['median_us']:>14.1f} us",
+                  file=sys.stderr)
+
+    for entry in benchmarks.values():
+        entry["scaling_exponent"] = scaling_exponent(entry["sizes"])
+
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "repeat": args.repeat,
+        "benchmarks": benchmarks
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of current against baseline: per-size medians and scaling exponents"""
+    regressions = []
+    for name, entry in current["benchmarks"].items():
+        reference = baseline.get("benchmarks", {}).get(name)
+        if reference is None:
+            continue
+        for size, result in entry["sizes"].items():
+            reference_median = reference["sizes"].get(size, {}).get("median_us")
+            if reference_median and result["median_us"] > reference_median * (1 + tolerance):
+                regressions.append(f"{name} {entry['axis']}={size}: "
+                                   f"{reference_median}us -> {result['median_us']}us")
+        exponent, reference_exponent = entry.get("scaling_exponent"), reference.get("scaling_exponent")
+        # Exponents are compared in absolute terms (tolerance 0.25 flags e.g. O(n) drifting towards O(n^1.25))
+        if exponent is not None and reference_exponent is not None and exponent > reference_exponent + tolerance:
+            regressions.append(f"{name}: scaling exponent {reference_exponent} -> {exponent}")
+    return regressions
+
+
+def print_report(report: Dict[str, Any]):
+    """Print one row per benchmark: median per size and the scaling exponent"""
+    for axis in ("query_words", "holdings"):
+        entries = {name: entry for name, entry in report["benchmarks"].items() if entry["axis"] == axis}
+        if not entries:
+            continue
+        sizes = sorted({int(size) for entry in entries.values() for size in entry["sizes"]})
+        print(f"\nmedian us per call by {axis}")
+        print(f"{'benchmark':<48}" + "".join(f"{size:>12}" for size in sizes) + f"{'exponent':>10}")
+        for name, entry in entries.items():
+            row = "".join(f"{entry['sizes'].get(str(size), {}).get('median_us', ''):>12}" for size in sizes)
+            exponent = entry["scaling_exponent"]
+            print(f"{name:<48}{row}{'' if exponent is None else exponent:>10}")
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    int_list = lambda value: [int(item) for item in value.split(",")]
+    parser = argparse.ArgumentParser(description="WealthLens hot-path micro-benchmarks")
+    parser.add_argument("--holdings", type=int_list, default=HOLDING_SIZES,
+                        help="comma-separated portfolio sizes (default 13,100,1000,10000)")
+    parser.add_argument("--query-lengths", type=int_list, default=QUERY_LENGTHS,
+                        help="comma-separated query word counts (default 3,10,50,200)")
+    parser.add_argument("--only", metavar="REGEX", help="run benchmarks whose name matches REGEX")
+    parser.add_argument("--repeat", type=int, default=5, help="timed samples per benchmark and size")
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per sample")
+    parser.add_argument("--save-baseline", metavar="NAME", help="save results to benchmarks/baselines/micro-NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against benchmarks/baselines/micro-NAME.json")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression as a fraction (default 0.25)")
+    parser.add_argument("--json", action="store_true", help="print the raw report as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    report = run(args)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"micro-{args.save_baseline}.json"
+        path.write_text(json.dumps(report, indent=2))
+        print(f"\nBaseline saved to {path}", file=sys.stderr)
+
+    if args.compare:
+        path = BASELINE_DIR / f"micro-{args.compare}.json"
+        if not path.exists():
+            print(f"\nBaseline not found: {path}", file=sys.stderr)
+            return 2
+        regressions = compare(report, json.loads(path.read_text()), args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:", file=sys.stderr)
+            for regression in regressions:
+                print(f"   {regression}", file=sys.stderr)
+            return 1
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%} against {path.name}", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
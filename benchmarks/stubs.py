@@ -0,0 +1,88 @@
+"""
+Offline stand-ins for the network-bound services, so benchmarks run without
+Yahoo Finance, the exchange rate API or the LLM provider.
+"""
+
+import os
+import zlib
+
+# Must be set before config is imported anywhere
+os.environ.setdefault("MARKET_REFRESH_ENABLED", "false")
+os.environ.setdefault("PORTFOLIO_DB_PATH", ":memory:")
+os.environ.setdefault("SESSION_STORE_BACKEND", "memory")
+
+from typing import Any, Dict, List
+import numpy as np
+import pandas as pd
+from services.real_time_data import real_time_service, FALLBACK_PRICES
+from services.currency_service import currency_service
+from services.quote_provider import StaticQuoteProvider
+from services.llm_registry import llm_registry
+
+# Trading days per history period
+PERIOD_DAYS = {"1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504, "5y": 1260}
+
+FX_RATES = {"INR_USD": 0.012, "USD_INR": 83.0, "EUR_USD": 1.08, "USD_EUR": 0.93}
+
+
+def synthetic_history(symbol: str, period: str) -> pd.DataFrame:
+    """Deterministic random-walk OHLCV bars ending at the symbol's fallback price"""
+    days = PERIOD_DAYS.get(period, 252)
+    rng = np.random.default_rng(zlib.crc32(f"{symbol}|{period}".encode()))
+    close = np.exp(np.cumsum(rng.normal(0.0004, 0.015, days)))
+    close = close * FALLBACK_PRICES.get(symbol, 100.0) / close[-1]
+    spread = np.abs(rng.normal(0, 0.01, days)) * close
+    return pd.DataFrame({
+        "Open": close - spread / 2,
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(100_000, 5_000_000, days)
+    }, index=pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days))
+
+
+def _load_history(cache_keys: List[str]) -> Dict[str, pd.DataFrame]:
+    """History cache loader returning synthetic bars"""
+    return {key: synthetic_history(*key.split("|", 1)) for key in cache_keys}
+
+
+def _stock_info(symbol: str) -> Dict[str, Any]:
+    """Stock info built from the fallback price"""
+    price = FALLBACK_PRICES.get(symbol, 100.0)
+    return {
+        "symbol": symbol,
+        "name": symbol,
+        "current_price": price,
+        "previous_close": price,
+        "market_cap": 0,
+        "pe_ratio": 0,
+        "dividend_yield": 0,
+        "beta": 1,
+        "52_week_high": price * 1.2,
+        "52_week_low": price * 0.8,
+        "volume": 0,
+        "avg_volume": 0,
+        "sector": "Unknown",
+        "industry": "Unknown"
+    }
+
+
+class _OfflineLLM:
+    """Chat model stand-in that answers instantly"""
+
+    def invoke(self, *args, **kwargs):
+        return "offline"
+
+    async def ainvoke(self, *args, **kwargs):
+        return "offline"
+
+
+def install():
+    """Route quotes, history, stock info, FX rates and LLM calls to offline stubs"""
+    real_time_service.set_provider(StaticQuoteProvider(FALLBACK_PRICES))
+    real_time_service._load_history = _load_history
+    real_time_service.get_stock_info = _stock_info
+    real_time_service.history_cache.invalidate()
+    currency_service._fetch_rate = lambda from_currency, to_currency, cache_key: {cache_key: FX_RATES.get(cache_key, 1.0)}
+    currency_service.rate_cache.invalidate()
+    llm_registry.get = lambda model=None, temperature=None: _OfflineLLM()
@@ -11,6 +11,95 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "your_google_api_key_here")
 # Database Configuration
 CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", "./chroma_db")
 
+# LLM Clients
+LLM_MODEL = os.getenv("LLM_MODEL", "mistral-large-latest")
+LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.7"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "16"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+
+# Agent Orchestration
+AGENT_FANOUT_ENABLED = os.getenv("AGENT_FANOUT_ENABLED", "true").lower() == "true"
+AGENT_TIMEOUT_SECONDS = float(os.getenv("AGENT_TIMEOUT_SECONDS", "20"))
+AGENT_TIMEOUTS = os.getenv("AGENT_TIMEOUTS", "")  # per-intent overrides, e.g. "risk_assessment=30,news_analysis=10"
+AGENT_MAX_WORKERS = int(os.getenv("AGENT_MAX_WORKERS", "8"))
+AGENT_MEMORY_CAPACITY = int(os.getenv("AGENT_MEMORY_CAPACITY", "20"))
+AGENT_MEMORY_TTL_SECONDS = float(os.getenv("AGENT_MEMORY_TTL_SECONDS", "3600"))
+AGENT_MEMORY_MAX_SESSIONS = int(os.getenv("AGENT_MEMORY_MAX_SESSIONS", "1000"))
+AGENT_ANALYSIS_CACHE_SIZE = int(os.getenv("AGENT_ANALYSIS_CACHE_SIZE", "64"))
+
+# Tracing and Metrics
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+TRACING_SAMPLE_WINDOW = int(os.getenv("TRACING_SAMPLE_WINDOW", "2048"))
+
+# Market Data
+QUOTE_REQUESTS_PER_MINUTE = int(os.getenv("QUOTE_REQUESTS_PER_MINUTE", "10"))
+QUOTE_CACHE_TTL_SECONDS = float(os.getenv("QUOTE_CACHE_TTL_SECONDS", "600"))
+QUOTE_CACHE_STALE_SECONDS = float(os.getenv("QUOTE_CACHE_STALE_SECONDS", "1800"))
+QUOTE_CACHE_MAX_SIZE = int(os.getenv("QUOTE_CACHE_MAX_SIZE", "1024"))
+FX_CACHE_TTL_SECONDS = float(os.getenv("FX_CACHE_TTL_SECONDS", "3600"))
+FX_CACHE_STALE_SECONDS = float(os.getenv("FX_CACHE_STALE_SECONDS", "86400"))
+HISTORY_CACHE_TTL_SECONDS = float(os.getenv("HISTORY_CACHE_TTL_SECONDS", "3600"))
+HISTORY_CACHE_STALE_SECONDS = float(os.getenv("HISTORY_CACHE_STALE_SECONDS", "86400"))
+
+# Historical Bar Store (memory-mapped daily bars; only missing date ranges are downloaded)
+BAR_STORE_ENABLED = os.getenv("BAR_STORE_ENABLED", "true").lower() == "true"
+BAR_STORE_PATH = os.getenv("BAR_STORE_PATH", "wealthlens_bars")
+BAR_STORE_REFRESH_SECONDS = float(os.getenv("BAR_STORE_REFRESH_SECONDS", "3600"))
+
+# Technical Indicators
+INDICATOR_HISTORY_PERIOD = os.getenv("INDICATOR_HISTORY_PERIOD", "6mo")
+INDICATOR_CHECKPOINT_PATH = os.getenv("INDICATOR_CHECKPOINT_PATH", "")  # empty disables checkpointing
+
+# Portfolio Risk (shrinkage covariance of daily returns)
+RISK_HISTORY_PERIOD = os.getenv("RISK_HISTORY_PERIOD", "1y")
+RISK_WINDOW_DAYS = int(os.getenv("RISK_WINDOW_DAYS", "252"))
+RISK_BENCHMARK_SYMBOL = os.getenv("RISK_BENCHMARK_SYMBOL", "^NSEI")  # empty disables beta
+RISK_CORRELATION_THRESHOLD = float(os.getenv("RISK_CORRELATION_THRESHOLD", "0.7"))
+
+# Value at Risk (historical, parametric and Monte Carlo VaR / CVaR in INR)
+VAR_CONFIDENCE_LEVELS = os.getenv("VAR_CONFIDENCE_LEVELS", "0.95,0.99")
+VAR_HORIZONS = os.getenv("VAR_HORIZONS", "1,10")  # trading days
+VAR_SIMULATIONS = int(os.getenv("VAR_SIMULATIONS", "10000"))
+VAR_FX_SYMBOL = os.getenv("VAR_FX_SYMBOL", "USDINR=X")  # empty ignores currency risk
+VAR_SEED = int(os.getenv("VAR_SEED", "42"))
+VAR_METHODS = os.getenv("VAR_METHODS", "historical,parametric")  # add monte_carlo for full revaluation (slow on large portfolios)
+VAR_DRAW_CACHE_MB = float(os.getenv("VAR_DRAW_CACHE_MB", "256"))  # reused Monte Carlo draws kept in memory
+
+# Monte Carlo Simulation (process pool; 0 workers means one per CPU)
+MONTE_CARLO_PATHS = int(os.getenv("MONTE_CARLO_PATHS", "100000"))
+MONTE_CARLO_AGENT_PATHS = int(os.getenv("MONTE_CARLO_AGENT_PATHS", "20000"))
+MONTE_CARLO_HORIZON_DAYS = int(os.getenv("MONTE_CARLO_HORIZON_DAYS", "252"))
+MONTE_CARLO_BATCH_SIZE = int(os.getenv("MONTE_CARLO_BATCH_SIZE", "5000"))
+MONTE_CARLO_WORKERS = int(os.getenv("MONTE_CARLO_WORKERS", "0"))
+MONTE_CARLO_SEED = int(os.getenv("MONTE_CARLO_SEED", "42"))
+
+# Chat Response Cache (keyed on portfolio snapshot version)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "512"))
+RESPONSE_CACHE_SEMANTIC = os.getenv("RESPONSE_CACHE_SEMANTIC", "false").lower() == "true"
+
+# Background Market Data Refresh
+MARKET_REFRESH_ENABLED = os.getenv("MARKET_REFRESH_ENABLED", "true").lower() == "true"
+MARKET_REFRESH_INTERVAL_SECONDS = float(os.getenv("MARKET_REFRESH_INTERVAL_SECONDS", "60"))
+FX_REFRESH_INTERVAL_SECONDS = float(os.getenv("FX_REFRESH_INTERVAL_SECONDS", "1800"))
+HISTORY_REFRESH_INTERVAL_SECONDS = float(os.getenv("HISTORY_REFRESH_INTERVAL_SECONDS", "3600"))
+HISTORY_REFRESH_PERIODS = os.getenv("HISTORY_REFRESH_PERIODS", "6mo,1y").split(",")
+
+# Portfolio Storage
+PORTFOLIO_DB_PATH = os.getenv("PORTFOLIO_DB_PATH", "wealthlens_portfolios.db")
+DEFAULT_PORTFOLIO_ID = os.getenv("DEFAULT_PORTFOLIO_ID", "default")
+DEFAULT_USER_ID = os.getenv("DEFAULT_USER_ID", "demo")
+SNAPSHOT_STORE_MAX_PORTFOLIOS = int(os.getenv("SNAPSHOT_STORE_MAX_PORTFOLIOS", "256"))  # loaded portfolios kept in memory
+SNAPSHOT_STORE_IDLE_SECONDS = float(os.getenv("SNAPSHOT_STORE_IDLE_SECONDS", "1800"))  # unused this long: dropped and no longer refreshed
+
+# Chat Sessions ("memory" is per worker; "sqlite" is shared by all workers on the host)
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "memory").lower()
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "wealthlens_sessions.db")
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "86400"))
+SESSION_MAX_SIZE = int(os.getenv("SESSION_MAX_SIZE", "10000"))
+SESSION_SWEEP_INTERVAL_SECONDS = float(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "300"))
+
 # WealthLens Configuration
 PORTFOLIO_VALUE = 8000000  # 80 lacs INR
 CURRENCY = "INR"
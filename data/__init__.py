@@ -1,4 +1,5 @@
-from .portfolio_data import PORTFOLIO_DATA, get_portfolio_summary, get_stocks_by_criteria, get_penny_stocks
+from .portfolio_data import PORTFOLIO_DATA, get_portfolio_summary, get_stocks_by_criteria, get_penny_stocks, get_portfolio_snapshot
+from .portfolio_snapshot import PortfolioSnapshot
 from .user_profile import get_user_info, get_knowledge_base
 
 __all__ = [
@@ -6,6 +7,8 @@ __all__ = [
     'get_portfolio_summary',
     'get_stocks_by_criteria',
     'get_penny_stocks',
+    'get_portfolio_snapshot',
+    'PortfolioSnapshot',
     'get_user_info',
     'get_knowledge_base'
 ]
@@ -0,0 +1,135 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+
+# Categorical columns stored as integer codes
+CATEGORY_FIELDS = ("sector", "country", "market_cap")
+
+
+class HoldingsStore:
+    """Columnar, read-only store of stock holdings.
+
+    Quantities and prices live in NumPy arrays and sector/country/market-cap are
+    categorical codes, so totals, P&L and group-bys are single vectorized passes
+    (np.bincount) regardless of the number of positions. Repricing produces a new
+    store that shares every static column with the old one.
+    """
+
+    def __init__(self, records: Sequence[Mapping[str, Any]], quantity: np.ndarray, avg_price: np.ndarray,
+                 current_price: np.ndarray, codes: Dict[str, np.ndarray], categories: Dict[str, Tuple[str, ...]],
+                 symbol_index: Dict[str, int]):
+        self.records = records
+        self.quantity = quantity
+        self.avg_price = avg_price
+        self.current_price = current_price
+        self.codes = codes
+        self.categories = categories
+        self.symbol_index = symbol_index
+
+        self.current_value = _readonly(quantity * current_price)
+        self.investment_amount = _readonly(quantity * avg_price)
+        self.pnl = _readonly(self.current_value - self.investment_amount)
+        self.pnl_percentage = _readonly(_safe_percentage(self.pnl, self.investment_amount))
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping[str, Any]]) -> "HoldingsStore":
+        """Build a store from stock dicts in the PORTFOLIO_DATA layout"""
+        records = tuple(records)
+        quantity = _readonly(np.array([record.get("quantity", 0) for record in records], dtype=np.float64))
+        avg_price = _readonly(np.array([record.get("avg_price", 0) for record in records], dtype=np.float64))
+        current_price = _readonly(np.array([record.get("current_price", 0) for record in records], dtype=np.float64))
+
+        codes = {}
+        categories = {}
+        for field in CATEGORY_FIELDS:
+            labels = {}
+            field_codes = np.empty(len(records), dtype=np.int32)
+            for row, record in enumerate(records):
+                field_codes[row] = labels.setdefault(record.get(field, "Unknown"), len(labels))
+            codes[field] = _readonly(field_codes)
+            categories[field] = tuple(labels)
+
+        symbol_index = {record.get("symbol"): row for row, record in enumerate(records)}
+        return cls(records, quantity, avg_price, current_price, codes, categories, symbol_index)
+
+    def with_prices(self, current_price: np.ndarray) -> "HoldingsStore":
+        """New store at the given prices, sharing all static columns"""
+        return HoldingsStore(self.records, self.quantity, self.avg_price, _readonly(current_price),
+                             self.codes, self.categories, self.symbol_index)
+
+    def price_vector(self, prices: Mapping[str, float]) -> np.ndarray:
+        """Current prices with the positive entries of prices applied by symbol"""
+        vector = self.current_price.copy()
+        for symbol, price in prices.items():
+            row = self.symbol_index.get(symbol)
+            if row is not None and price and price > 0:
+                vector[row] = price
+        return vector
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def index_of(self, symbol: str) -> Optional[int]:
+        """Row of a symbol, if held"""
+        return self.symbol_index.get(symbol)
+
+    def totals(self) -> Tuple[float, float]:
+        """(total current value, total investment)"""
+        return float(self.current_value.sum()), float(self.investment_amount.sum())
+
+    def group_totals(self, field: str) -> Dict[str, Dict[str, float]]:
+        """Value, investment and holding count per category of field, in first-seen order"""
+        codes = self.codes[field]
+        labels = self.categories[field]
+        size = len(labels)
+        values = np.bincount(codes, weights=self.current_value, minlength=size)
+        investments = np.bincount(codes, weights=self.investment_amount, minlength=size)
+        counts = np.bincount(codes, minlength=size)
+        return {
+            label: {
+                "total_value": float(values[code]),
+                "total_investment": float(investments[code]),
+                "stock_count": int(counts[code])
+            }
+            for code, label in enumerate(labels)
+        }
+
+    def group_rows(self, field: str) -> Dict[str, List[int]]:
+        """Row indexes per category of field, in first-seen order"""
+        codes = self.codes[field]
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes, minlength=len(self.categories[field]))
+        groups = np.split(order, np.cumsum(counts)[:-1])
+        return {label: groups[code].tolist() for code, label in enumerate(self.categories[field])}
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Dict view of one holding: the source record with current price and derived fields"""
+        holding = dict(self.records[index])
+        holding["current_price"] = self._python_price(index)
+        holding["current_value"] = float(self.current_value[index])
+        holding["investment_amount"] = float(self.investment_amount[index])
+        holding["pnl"] = float(self.pnl[index])
+        holding["pnl_percentage"] = float(self.pnl_percentage[index])
+        return holding
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Dict views of every holding"""
+        return [self.row(index) for index in range(len(self.records))]
+
+    def _python_price(self, index: int) -> Any:
+        """Current price, keeping the source record's value when it was not repriced"""
+        price = float(self.current_price[index])
+        original = self.records[index].get("current_price")
+        return original if original == price else price
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    """Mark an array read-only so shared columns cannot be modified in place"""
+    array.setflags(write=False)
+    return array
+
+
+def _safe_percentage(part: np.ndarray, whole: np.ndarray) -> np.ndarray:
+    """part / whole * 100 elementwise, 0 where whole is not positive"""
+    result = np.zeros_like(part, dtype=np.float64)
+    np.divide(part, whole, out=result, where=whole > 0)
+    return result * 100
@@ -1,6 +1,13 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
+from collections import OrderedDict
 from datetime import datetime
+import threading
+import time
+import config
 from services.real_time_data import real_time_service
+from data.portfolio_snapshot import PortfolioSnapshot, PortfolioSnapshotStore
+from data.portfolio_repository import PortfolioRepository
+from services.tracing import traced
 
 # Hardcoded Portfolio Data with Real-Time Price Updates
 PORTFOLIO_DATA = {
@@ -156,91 +163,120 @@ PORTFOLIO_DATA = {
     "last_updated": datetime.now().isoformat()
 }
 
-# Sector-wise classification
-SECTORS = {
-    "Technology": ["TCS.NS", "INFY.NS", "AAPL", "MSFT", "GOOGL"],
-    "Banking": ["HDFCBANK.NS", "ICICIBANK.NS", "YESBANK.NS"],
-    "Oil & Gas": ["RELIANCE.NS"],
-    "Consumer Discretionary": ["AMZN"],
-    "Automotive": ["TSLA"],
-    "Energy": ["SUZLON.NS"],
-    "Construction": ["JPASSOCIAT.NS"]
-}
+def _symbols_by(field: str) -> Dict[str, List[str]]:
+    """Group PORTFOLIO_DATA symbols by a holding field"""
+    grouped = {}
+    for stock in PORTFOLIO_DATA["stocks"]:
+        grouped.setdefault(stock[field], []).append(stock["symbol"])
+    return grouped
 
-# Country-wise classification
-COUNTRIES = {
-    "India": ["RELIANCE.NS", "TCS.NS", "INFY.NS", "HDFCBANK.NS", "ICICIBANK.NS", 
-              "SUZLON.NS", "JPASSOCIAT.NS", "YESBANK.NS"],
-    "USA": ["AAPL", "MSFT", "GOOGL", "AMZN", "TSLA"]
-}
+# Sector, country and market cap classifications, derived from the holdings
+SECTORS = _symbols_by("sector")
+COUNTRIES = _symbols_by("country")
+MARKET_CAPS = _symbols_by("market_cap")
 
-# Market cap classification
-MARKET_CAPS = {
-    "Large Cap": ["RELIANCE.NS", "TCS.NS", "INFY.NS", "HDFCBANK.NS", "ICICIBANK.NS",
-                  "AAPL", "MSFT", "GOOGL", "AMZN", "TSLA"],
-    "Mid Cap": ["YESBANK.NS"],
-    "Small Cap": ["SUZLON.NS", "JPASSOCIAT.NS"]
-}
+# Client portfolios; the default portfolio mirrors PORTFOLIO_DATA (see seed_default_portfolio)
+portfolio_repository = PortfolioRepository(config.PORTFOLIO_DB_PATH)
+
+# Versioned snapshots per portfolio at live prices; loaded portfolios are never mutated.
+# Least recently used first, with the monotonic time each was last used; idle ones are dropped
+_snapshot_stores = OrderedDict()
+_last_used = {}
+_snapshot_stores_lock = threading.Lock()
+# First version for a reloaded portfolio, so versions keep increasing across holdings changes and evictions
+_next_versions = {}
+
+def _get_snapshot_store(portfolio_id: Optional[str] = None) -> PortfolioSnapshotStore:
+    """Snapshot store for a portfolio, loading it from the repository on first use"""
+    portfolio_id = portfolio_id or config.DEFAULT_PORTFOLIO_ID
+    with _snapshot_stores_lock:
+        store = _snapshot_stores.get(portfolio_id)
+        if store is None:
+            portfolio = portfolio_repository.load_portfolio(portfolio_id)
+            if portfolio is None and portfolio_id == config.DEFAULT_PORTFOLIO_ID:
+                # Used outside the app (scripts, benchmarks): seed on first use instead of at startup
+                seed_default_portfolio()
+                portfolio = portfolio_repository.load_portfolio(portfolio_id)
+            if portfolio is None:
+                raise KeyError(f"Unknown portfolio: {portfolio_id}")
+            store = PortfolioSnapshotStore(portfolio, _next_versions.get(portfolio_id, 1), portfolio_id)
+            _snapshot_stores[portfolio_id] = store
+        _snapshot_stores.move_to_end(portfolio_id)
+        _last_used[portfolio_id] = time.monotonic()
+        _evict_snapshot_stores()
+        return store
+
+def _drop_snapshot_store(portfolio_id: str):
+    """Forget a loaded portfolio, remembering its next version (lock must be held)"""
+    store = _snapshot_stores.pop(portfolio_id, None)
+    _last_used.pop(portfolio_id, None)
+    if store is not None:
+        _next_versions[portfolio_id] = store.current().version + 1
+
+def _evict_snapshot_stores():
+    """Drop idle portfolios and the least recently used beyond the limit (lock must be held)"""
+    idle_before = time.monotonic() - config.SNAPSHOT_STORE_IDLE_SECONDS
+    for portfolio_id in list(_snapshot_stores):
+        if len(_snapshot_stores) <= config.SNAPSHOT_STORE_MAX_PORTFOLIOS and _last_used[portfolio_id] >= idle_before:
+            break
+        _drop_snapshot_store(portfolio_id)
+
+def seed_default_portfolio():
+    """Write PORTFOLIO_DATA as the default portfolio (called at app startup)"""
+    portfolio_repository.save_portfolio(config.DEFAULT_PORTFOLIO_ID, config.DEFAULT_USER_ID, PORTFOLIO_DATA,
+                                        name="Demo Portfolio")
+
+def validate_portfolio(portfolio: Dict):
+    """Raise ValueError for holdings the repository cannot store (missing or repeated keys)"""
+    for field, key in (("stocks", "symbol"), ("mutual_funds", "name")):
+        seen = set()
+        for entry in portfolio.get(field, []):
+            value = entry.get(key)
+            if not value:
+                raise ValueError(f"Every entry in {field} needs a {key}")
+            if value in seen:
+                raise ValueError(f"Duplicate {key} in {field}: {value}")
+            seen.add(value)
+
+def save_portfolio(portfolio_id: str, user_id: str, portfolio: Dict, name: Optional[str] = None):
+    """Create or replace a client portfolio and drop its cached snapshots"""
+    validate_portfolio(portfolio)
+    portfolio_repository.save_portfolio(portfolio_id, user_id, portfolio, name)
+    with _snapshot_stores_lock:
+        _drop_snapshot_store(portfolio_id)
 
-def get_portfolio_summary():
+def get_tracked_symbols() -> List[str]:
+    """Symbols held by the default portfolio and every recently used portfolio (idle ones are dropped first)"""
+    with _snapshot_stores_lock:
+        _evict_snapshot_stores()
+        stores = list(_snapshot_stores.values())
+    symbols = dict.fromkeys(stock["symbol"] for stock in PORTFOLIO_DATA["stocks"])
+    for store in stores:
+        symbols.update(dict.fromkeys(store.current().symbols))
+    return list(symbols)
+
+@traced("portfolio.snapshot")
+def get_portfolio_snapshot(portfolio_id: Optional[str] = None) -> PortfolioSnapshot:
+    """Get the current portfolio snapshot, publishing a new one if live prices moved"""
+    store = _get_snapshot_store(portfolio_id)
+    live_prices = real_time_service.get_live_prices(store.current().symbols)
+    return store.update_prices(live_prices)
+
+def get_portfolio_summary(portfolio_id: Optional[str] = None):
     """Calculate portfolio summary"""
-    total_value = 0
-    total_investment = 0
-    
-    for stock in PORTFOLIO_DATA["stocks"]:
-        current_value = stock["quantity"] * stock["current_price"]
-        investment_value = stock["quantity"] * stock["avg_price"]
-        total_value += current_value
-        total_investment += investment_value
-    
-    for fund in PORTFOLIO_DATA["mutual_funds"]:
-        current_value = fund["quantity"] * fund["current_nav"]
-        investment_value = fund["quantity"] * fund["nav"]
-        total_value += current_value
-        total_investment += investment_value
-    
-    return {
-        "total_value": total_value,
-        "total_investment": total_investment,
-        "total_pnl": total_value - total_investment,
-        "total_pnl_percentage": ((total_value - total_investment) / total_investment) * 100 if total_investment > 0 else 0
-    }
-
-def get_stocks_by_criteria(criteria: str, value: str):
+    return dict(get_portfolio_snapshot(portfolio_id).summary)
+
+def get_stocks_by_criteria(criteria: str, value: str, portfolio_id: Optional[str] = None):
     """Get stocks filtered by criteria"""
-    if criteria == "country":
-        symbols = COUNTRIES.get(value, [])
-    elif criteria == "sector":
-        symbols = SECTORS.get(value, [])
-    elif criteria == "market_cap":
-        symbols = MARKET_CAPS.get(value, [])
-    else:
+    if criteria not in ("country", "sector", "market_cap"):
         return []
     
-    return [stock for stock in PORTFOLIO_DATA["stocks"] if stock["symbol"] in symbols]
+    return [dict(stock) for stock in get_portfolio_snapshot(portfolio_id).stocks_by(criteria, value)]
 
-def get_penny_stocks():
+def get_penny_stocks(portfolio_id: Optional[str] = None):
     """Get penny stocks (low price stocks)"""
-    return [stock for stock in PORTFOLIO_DATA["stocks"] if stock["current_price"] < 20]
+    return [dict(stock) for stock in get_portfolio_snapshot(portfolio_id).penny_stocks()]
 
-def get_portfolio_data():
-    """Get complete portfolio data with real-time prices"""
-    # Get all symbols from portfolio
-    symbols = [stock["symbol"] for stock in PORTFOLIO_DATA["stocks"]]
-    
-    # Fetch real-time prices
-    live_prices = real_time_service.get_live_prices(symbols)
-    
-    # Update portfolio with live prices
-    updated_portfolio = PORTFOLIO_DATA.copy()
-    for stock in updated_portfolio["stocks"]:
-        symbol = stock["symbol"]
-        if symbol in live_prices and live_prices[symbol] > 0:
-            stock["current_price"] = live_prices[symbol]
-            # Calculate current value and P&L
-            stock["current_value"] = stock["quantity"] * stock["current_price"]
-            stock["investment_amount"] = stock["quantity"] * stock["avg_price"]
-            stock["pnl"] = stock["current_value"] - stock["investment_amount"]
-            stock["pnl_percentage"] = (stock["pnl"] / stock["investment_amount"]) * 100 if stock["investment_amount"] > 0 else 0
-    
-    return updated_portfolio
+def get_portfolio_data(portfolio_id: Optional[str] = None):
+    """Get complete portfolio data with real-time prices (a private copy of the current snapshot)"""
+    return get_portfolio_snapshot(portfolio_id).to_dict()
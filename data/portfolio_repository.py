@@ -0,0 +1,139 @@
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS portfolios (
+    portfolio_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    name TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_portfolios_user ON portfolios (user_id);
+
+CREATE TABLE IF NOT EXISTS holdings (
+    portfolio_id TEXT NOT NULL REFERENCES portfolios (portfolio_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    name TEXT,
+    quantity NUMERIC NOT NULL,
+    avg_price NUMERIC NOT NULL,
+    current_price NUMERIC NOT NULL,
+    sector TEXT,
+    country TEXT,
+    market_cap TEXT,
+    PRIMARY KEY (portfolio_id, symbol)
+);
+CREATE INDEX IF NOT EXISTS idx_holdings_position ON holdings (portfolio_id, position);
+
+CREATE TABLE IF NOT EXISTS mutual_funds (
+    portfolio_id TEXT NOT NULL REFERENCES portfolios (portfolio_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    quantity NUMERIC NOT NULL,
+    nav NUMERIC NOT NULL,
+    current_nav NUMERIC NOT NULL,
+    category TEXT,
+    PRIMARY KEY (portfolio_id, name)
+);
+"""
+
+HOLDING_COLUMNS = ("symbol", "name", "quantity", "avg_price", "current_price", "sector", "country", "market_cap")
+FUND_COLUMNS = ("name", "quantity", "nav", "current_nav", "category")
+
+
+class PortfolioRepository:
+    """SQLite-backed store of client portfolios keyed by portfolio id and user.
+
+    Holdings are keyed and indexed by portfolio, so loading a portfolio reads
+    only its own rows in their saved order. Criteria filters run on the in-memory
+    snapshot, which carries live prices.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock:
+            if db_path != ":memory:":
+                self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA foreign_keys=ON")
+            self._connection.executescript(SCHEMA)
+            self._connection.commit()
+
+    def save_portfolio(self, portfolio_id: str, user_id: str, portfolio: Dict[str, Any], name: Optional[str] = None):
+        """Create or replace a portfolio from data in the PORTFOLIO_DATA layout"""
+        now = datetime.now().isoformat()
+        holdings = [
+            (portfolio_id, position) + tuple(stock.get(column) for column in HOLDING_COLUMNS)
+            for position, stock in enumerate(portfolio.get("stocks", []))
+        ]
+        funds = [
+            (portfolio_id, position) + tuple(fund.get(column) for column in FUND_COLUMNS)
+            for position, fund in enumerate(portfolio.get("mutual_funds", []))
+        ]
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                """INSERT INTO portfolios (portfolio_id, user_id, name, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (portfolio_id) DO UPDATE SET
+                       user_id = excluded.user_id, name = excluded.name, updated_at = excluded.updated_at""",
+                (portfolio_id, user_id, name or portfolio_id, now, now)
+            )
+            self._connection.execute("DELETE FROM holdings WHERE portfolio_id = ?", (portfolio_id,))
+            self._connection.execute("DELETE FROM mutual_funds WHERE portfolio_id = ?", (portfolio_id,))
+            self._connection.executemany(
+                f"INSERT INTO holdings (portfolio_id, position, {', '.join(HOLDING_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(HOLDING_COLUMNS) + 2))})",
+                holdings
+            )
+            self._connection.executemany(
+                f"INSERT INTO mutual_funds (portfolio_id, position, {', '.join(FUND_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(FUND_COLUMNS) + 2))})",
+                funds
+            )
+
+    def load_portfolio(self, portfolio_id: str) -> Optional[Dict[str, Any]]:
+        """Load a portfolio in the PORTFOLIO_DATA layout, or None if it does not exist"""
+        with self._lock:
+            meta = self._connection.execute(
+                "SELECT * FROM portfolios WHERE portfolio_id = ?", (portfolio_id,)
+            ).fetchone()
+            if meta is None:
+                return None
+            stocks = self._connection.execute(
+                f"SELECT {', '.join(HOLDING_COLUMNS)} FROM holdings WHERE portfolio_id = ? ORDER BY position",
+                (portfolio_id,)
+            ).fetchall()
+            funds = self._connection.execute(
+                f"SELECT {', '.join(FUND_COLUMNS)} FROM mutual_funds WHERE portfolio_id = ? ORDER BY position",
+                (portfolio_id,)
+            ).fetchall()
+
+        return {
+            "stocks": [dict(row) for row in stocks],
+            "mutual_funds": [dict(row) for row in funds],
+            "last_updated": meta["updated_at"]
+        }
+
+    def list_portfolios(self, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Portfolios with holding counts, optionally for one user"""
+        query = """SELECT p.portfolio_id, p.user_id, p.name, p.updated_at,
+                          (SELECT COUNT(*) FROM holdings h WHERE h.portfolio_id = p.portfolio_id) AS stock_count
+                   FROM portfolios p"""
+        params = ()
+        if user_id is not None:
+            query += " WHERE p.user_id = ?"
+            params = (user_id,)
+        with self._lock:
+            rows = self._connection.execute(query + " ORDER BY p.portfolio_id", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._connection.close()
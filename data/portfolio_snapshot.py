@@ -0,0 +1,212 @@
+import threading
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import numpy as np
+from data.holdings_store import HoldingsStore, CATEGORY_FIELDS
+
+# Holdings priced below this are treated as penny stocks
+PENNY_STOCK_THRESHOLD = 20
+
+# Stock fields the snapshot groups by
+GROUP_FIELDS = CATEGORY_FIELDS
+
+
+class PortfolioSnapshot:
+    """Immutable, versioned view of the portfolio at one set of prices.
+
+    Stock math runs over a columnar HoldingsStore: per-holding value and P&L,
+    portfolio totals and sector/country/market-cap aggregates are computed once
+    when the snapshot is built. Holdings and aggregates are exposed as read-only
+    mappings, so any number of readers can share one snapshot without locks.
+    """
+
+    __slots__ = ("version", "portfolio_id", "created_at", "holdings", "mutual_funds", "summary",
+                 "stock_summary", "aggregates", "_stocks")
+
+    def __init__(self, version: int, holdings: HoldingsStore, mutual_funds: Tuple[Mapping[str, Any], ...],
+                 portfolio_id: Optional[str] = None):
+        set_field = object.__setattr__
+        set_field(self, "version", version)
+        set_field(self, "portfolio_id", portfolio_id)
+        set_field(self, "created_at", datetime.now())
+        set_field(self, "holdings", holdings)
+        set_field(self, "mutual_funds", mutual_funds)
+        set_field(self, "_stocks", None)
+
+        stock_value, stock_investment = holdings.totals()
+        fund_value = sum(fund["current_value"] for fund in mutual_funds)
+        fund_investment = sum(fund["investment_amount"] for fund in mutual_funds)
+
+        set_field(self, "stock_summary", _totals(stock_value, stock_investment))
+        set_field(self, "summary", _totals(stock_value + fund_value, stock_investment + fund_investment))
+        set_field(self, "aggregates", MappingProxyType({
+            field: _group_stocks(holdings, field, stock_value) for field in GROUP_FIELDS
+        }))
+
+    @property
+    def stocks(self) -> Tuple[Mapping[str, Any], ...]:
+        """Read-only dict views of the stock holdings (built on first access)"""
+        stocks = self._stocks
+        if stocks is None:
+            stocks = tuple(MappingProxyType(row) for row in self.holdings.rows())
+            object.__setattr__(self, "_stocks", stocks)
+        return stocks
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("PortfolioSnapshot is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError("PortfolioSnapshot is immutable")
+
+    @property
+    def by_sector(self) -> Mapping[str, Mapping[str, Any]]:
+        """Stock aggregates per sector"""
+        return self.aggregates["sector"]
+
+    @property
+    def by_country(self) -> Mapping[str, Mapping[str, Any]]:
+        """Stock aggregates per country"""
+        return self.aggregates["country"]
+
+    @property
+    def by_market_cap(self) -> Mapping[str, Mapping[str, Any]]:
+        """Stock aggregates per market cap bucket"""
+        return self.aggregates["market_cap"]
+
+    @property
+    def symbols(self) -> List[str]:
+        """Symbols of all stock holdings"""
+        return [record["symbol"] for record in self.holdings.records]
+
+    def get_stock(self, symbol: str) -> Optional[Mapping[str, Any]]:
+        """Holding for a symbol, if held"""
+        index = self.holdings.index_of(symbol)
+        return self.stocks[index] if index is not None else None
+
+    def stocks_by(self, field: str, value: str) -> List[Mapping[str, Any]]:
+        """Holdings whose field (sector, country, market_cap) equals value"""
+        group = self.aggregates.get(field, {}).get(value)
+        if group is None:
+            return []
+        stocks = self.stocks
+        return [stocks[index] for index in group["rows"]]
+
+    def penny_stocks(self, threshold: float = PENNY_STOCK_THRESHOLD) -> List[Mapping[str, Any]]:
+        """Holdings priced below threshold"""
+        stocks = self.stocks
+        return [stocks[index] for index in np.flatnonzero(self.holdings.current_price < threshold)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain, mutable copy in the PORTFOLIO_DATA layout"""
+        return {
+            "stocks": [dict(stock) for stock in self.stocks],
+            "mutual_funds": [dict(fund) for fund in self.mutual_funds],
+            "last_updated": self.created_at.isoformat(),
+            "version": self.version
+        }
+
+
+def build_snapshot(portfolio: Dict[str, Any], prices: Mapping[str, float], version: int) -> PortfolioSnapshot:
+    """Price the holdings in portfolio (PORTFOLIO_DATA layout) and build a snapshot"""
+    holdings = HoldingsStore.from_records(portfolio["stocks"])
+    holdings = holdings.with_prices(holdings.price_vector(prices))
+    return PortfolioSnapshot(version, holdings, _price_mutual_funds(portfolio["mutual_funds"]))
+
+
+def _price_mutual_funds(funds: List[Dict[str, Any]]) -> Tuple[Mapping[str, Any], ...]:
+    """Read-only mutual fund holdings with value and P&L"""
+    mutual_funds = []
+    for fund in funds:
+        holding = dict(fund)
+        holding["current_value"] = holding["quantity"] * holding["current_nav"]
+        holding["investment_amount"] = holding["quantity"] * holding["nav"]
+        holding["pnl"] = holding["current_value"] - holding["investment_amount"]
+        holding["pnl_percentage"] = _percentage(holding["pnl"], holding["investment_amount"])
+        mutual_funds.append(MappingProxyType(holding))
+    return tuple(mutual_funds)
+
+
+class PortfolioSnapshotStore:
+    """Holds the current snapshot; readers take it lock-free, writers swap in a new one"""
+
+    def __init__(self, portfolio: Dict[str, Any], version: int = 1, portfolio_id: Optional[str] = None):
+        self.portfolio = portfolio
+        self.portfolio_id = portfolio_id
+        self.base_holdings = HoldingsStore.from_records(portfolio["stocks"])
+        self.mutual_funds = _price_mutual_funds(portfolio["mutual_funds"])
+        self._write_lock = threading.Lock()
+        self._prices = {}
+        self._snapshot = PortfolioSnapshot(version, self.base_holdings, self.mutual_funds, portfolio_id)
+
+    def current(self) -> PortfolioSnapshot:
+        """Latest snapshot (a single reference read, safe without locks)"""
+        return self._snapshot
+
+    def update_prices(self, prices: Mapping[str, float]) -> PortfolioSnapshot:
+        """Publish a new snapshot if any price changed; otherwise return the current one"""
+        changed = {symbol: price for symbol, price in prices.items()
+                   if price and price > 0 and self._prices.get(symbol) != price}
+        if not changed:
+            return self._snapshot
+
+        with self._write_lock:
+            new_prices = dict(self._prices)
+            new_prices.update(changed)
+            if new_prices == self._prices:
+                return self._snapshot
+            holdings = self.base_holdings.with_prices(self.base_holdings.price_vector(new_prices))
+            snapshot = PortfolioSnapshot(self._snapshot.version + 1, holdings, self.mutual_funds, self.portfolio_id)
+            self._prices = new_prices
+            self._snapshot = snapshot
+            return snapshot
+
+
+def to_plain(value: Any) -> Any:
+    """Recursively convert read-only snapshot mappings and tuples to dicts and lists"""
+    if isinstance(value, Mapping):
+        return {key: to_plain(item) for key, item in value.items()}
+    if isinstance(value, (tuple, list)):
+        return [to_plain(item) for item in value]
+    return value
+
+
+def _totals(total_value: float, total_investment: float) -> Mapping[str, float]:
+    """Value / investment / P&L totals"""
+    return MappingProxyType({
+        "total_value": total_value,
+        "total_investment": total_investment,
+        "total_pnl": total_value - total_investment,
+        "total_pnl_percentage": _percentage(total_value - total_investment, total_investment)
+    })
+
+
+def _group_stocks(holdings: HoldingsStore, field: str, portfolio_value: float) -> Mapping[str, Mapping[str, Any]]:
+    """Aggregate holdings by one categorical field, in first-seen order"""
+    totals = holdings.group_totals(field)
+    group_rows = holdings.group_rows(field)
+    sector_codes = holdings.codes["sector"]
+    sector_labels = holdings.categories["sector"]
+
+    groups = {}
+    for key, group in totals.items():
+        rows = group_rows[key]
+        pnl = group["total_value"] - group["total_investment"]
+        groups[key] = MappingProxyType({
+            "rows": tuple(rows),
+            "symbols": tuple(holdings.records[row]["symbol"] for row in rows),
+            "names": tuple(holdings.records[row]["name"] for row in rows),
+            "sectors": tuple(dict.fromkeys(sector_labels[code] for code in sector_codes[rows])),
+            "stock_count": group["stock_count"],
+            "total_value": group["total_value"],
+            "total_investment": group["total_investment"],
+            "pnl": pnl,
+            "pnl_percentage": _percentage(pnl, group["total_investment"]),
+            "allocation_percentage": _percentage(group["total_value"], portfolio_value)
+        })
+    return MappingProxyType(groups)
+
+
+def _percentage(part: float, whole: float) -> float:
+    """part / whole as a percentage, 0 when whole is not positive"""
+    return (part / whole) * 100 if whole > 0 else 0
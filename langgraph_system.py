@@ -1,5 +1,10 @@
-from typing import Dict, Any, List, TypedDict
+from typing import Dict, Any, List, Optional, TypedDict
 from agents import MasterAgent
+from data import get_portfolio_snapshot
+from services.response_cache import response_cache, extract_actions, extract_entities
+from services.tracing import span
+import config
+import asyncio
 import json
 
 # Define state structure
@@ -16,6 +21,8 @@ class FinancialAgentSystem:
     
     def __init__(self):
         self.master_agent = MasterAgent()
+        self.response_cache = response_cache
+        self.cache_enabled = config.RESPONSE_CACHE_ENABLED
     
     # Simplified system with Master Agent orchestration
     
@@ -88,34 +95,114 @@ class FinancialAgentSystem:
         
         return combined
     
-    def process_query(self, query: str, language: str = "normal") -> Dict[str, Any]:
+    def process_query(self, query: str, language: str = "normal", portfolio_id: Optional[str] = None,
+                      session_id: Optional[str] = None) -> Dict[str, Any]:
         """Process a user query through the master agent system"""
         try:
+            cache_keys = self._response_cache_keys(query, language, portfolio_id)
+            cached = self._cached_result(cache_keys, query, session_id)
+            if cached is not None:
+                return cached
+            
             # Use master agent for intent classification and routing
             master_response = self.master_agent.process({
                 "query": query,
-                "language": language
+                "language": language,
+                "portfolio_id": portfolio_id,
+                "session_id": session_id
             })
             
-            return {
-                "success": True,
-                "response": master_response["response"],
-                "agent_responses": list(master_response["data"]["agent_responses"].values()),
+            return self._store_result(cache_keys, self._build_query_result(master_response, query, language))
+            
+        except Exception as e:
+            print(f"Error processing query: {e}")
+            return self._query_error_result(e, query, language)
+    
+    async def aprocess_query(self, query: str, language: str = "normal", portfolio_id: Optional[str] = None,
+                             session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant of process_query for use inside the event loop"""
+        try:
+            cache_keys = await asyncio.to_thread(self._response_cache_keys, query, language, portfolio_id)
+            cached = self._cached_result(cache_keys, query, session_id)
+            if cached is not None:
+                return cached
+            
+            master_response = await self.master_agent.aprocess({
                 "query": query,
                 "language": language,
-                "intent_analysis": master_response["data"]["intent"],
-                "routing_info": master_response["data"]["routing_info"]
-            }
+                "portfolio_id": portfolio_id,
+                "session_id": session_id
+            })
+            
+            return self._store_result(cache_keys, self._build_query_result(master_response, query, language))
             
         except Exception as e:
             print(f"Error processing query: {e}")
-            return {
-                "success": False,
-                "response": "I'm sorry, I encountered an error processing your request. Please try again.",
-                "error": str(e),
-                "query": query,
-                "language": language
-            }
+            return self._query_error_result(e, query, language)
+    
+    def _response_cache_keys(self, query: str, language: str, portfolio_id: Optional[str]) -> List[str]:
+        """Response cache keys for a query at the current portfolio snapshot version"""
+        if not self.cache_enabled:
+            return []
+        with span("response_cache.keys"):
+            try:
+                return self._build_cache_keys(query, language, portfolio_id)
+            except KeyError as e:
+                # Unknown portfolio: no snapshot version to key on, so answer uncached
+                print(f"Response cache skipped: {e}")
+                return []
+    
+    def _build_cache_keys(self, query: str, language: str, portfolio_id: Optional[str]) -> List[str]:
+        """Exact key plus the optional semantic key"""
+        snapshot = get_portfolio_snapshot(portfolio_id)
+        keys = [self.response_cache.exact_key(query, language, portfolio_id, snapshot.version)]
+        if self.response_cache.semantic:
+            intent = self.master_agent.get_intent_analysis(query)["intent_analysis"]
+            entities = extract_entities(query, snapshot.stocks)
+            actions = extract_actions(query)
+            keys.append(self.response_cache.semantic_key(intent, entities, actions, language, portfolio_id,
+                                                         snapshot.version))
+        return keys
+    
+    def _cached_result(self, cache_keys: List[str], query: str, session_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Cached result for the keys, recorded in the session's memory like a routed turn"""
+        if not cache_keys:
+            return None
+        cached = self.response_cache.get(cache_keys)
+        if cached is None:
+            return None
+        self.master_agent.remember_turn(query, cached["intent_analysis"]["primary"],
+                                        cached["routing_info"]["agents_used"], session_id)
+        return dict(cached, query=query, cached=True)
+    
+    def _store_result(self, cache_keys: List[str], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache a successful result under the keys and return it"""
+        if cache_keys and result["success"]:
+            self.response_cache.set(cache_keys, result)
+        return result
+    
+    def _build_query_result(self, master_response: Dict[str, Any], query: str, language: str) -> Dict[str, Any]:
+        """Shape the master agent payload into the query result (failed if any agent returned an error)"""
+        agent_responses = list(master_response["data"]["agent_responses"].values())
+        return {
+            "success": not any(response.get("type") == "error" for response in agent_responses),
+            "response": master_response["response"],
+            "agent_responses": agent_responses,
+            "query": query,
+            "language": language,
+            "intent_analysis": master_response["data"]["intent"],
+            "routing_info": master_response["data"]["routing_info"]
+        }
+    
+    def _query_error_result(self, error: Exception, query: str, language: str) -> Dict[str, Any]:
+        """Result returned when query processing fails"""
+        return {
+            "success": False,
+            "response": "I'm sorry, I encountered an error processing your request. Please try again.",
+            "error": str(error),
+            "query": query,
+            "language": language
+        }
     
     def get_agent_status(self) -> Dict[str, Any]:
         """Get status of all agents"""
@@ -1,22 +1,62 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi.responses import PlainTextResponse
+from starlette.routing import Match
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
-import uvicorn
 from langgraph_system import FinancialAgentSystem
 from services.chart_service import chart_service
 from services.real_time_data import real_time_service
-from data.portfolio_data import get_portfolio_data
-from data import get_portfolio_summary, PORTFOLIO_DATA
+from services.currency_service import currency_service
+from services.market_data_refresher import market_data_refresher
+from services.risk_engine import risk_engine
+from services.monte_carlo import monte_carlo
+from services.session_store import session_store
+from services.tracing import span, stage_metrics
+from data.portfolio_data import get_portfolio_data, portfolio_repository, save_portfolio, seed_default_portfolio
+from data import get_portfolio_snapshot, PORTFOLIO_DATA
+from data.portfolio_snapshot import to_plain
+import os
+import sys
 import uuid
+import asyncio
 from datetime import datetime
 import json
+from contextlib import asynccontextmanager
+import config
+
+async def sweep_sessions():
+    """Periodically remove expired chat sessions"""
+    while True:
+        await asyncio.sleep(config.SESSION_SWEEP_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(session_store.sweep)
+        except Exception as e:
+            print(f"Error sweeping sessions: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Seed the default portfolio and restore indicator state, then run market data refresh and session expiry"""
+    await asyncio.to_thread(seed_default_portfolio)
+    if config.INDICATOR_CHECKPOINT_PATH:
+        restored = real_time_service.streaming_indicators.load(config.INDICATOR_CHECKPOINT_PATH)
+        print(f"Restored indicator state for {restored} symbols")
+    if config.MARKET_REFRESH_ENABLED:
+        market_data_refresher.start()
+    sweeper = asyncio.create_task(sweep_sessions())
+    yield
+    sweeper.cancel()
+    market_data_refresher.stop()
+    monte_carlo.shutdown()
+    if config.INDICATOR_CHECKPOINT_PATH:
+        real_time_service.streaming_indicators.save(config.INDICATOR_CHECKPOINT_PATH)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="WealthLens - AI Financial Portfolio Analysis System",
     description="AI-powered financial portfolio analysis with multiple agents",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -28,6 +68,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def route_template(request: Request) -> str:
+    """Path template of the route serving a request (keeps metric labels low-cardinality)"""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Time every request as the root span of its trace, labelled by route"""
+    with span(f"http {request.method} {route_template(request)}"):
+        return await call_next(request)
+
 # Initialize the agent system
 agent_system = FinancialAgentSystem()
 
@@ -36,6 +90,8 @@ class ChatRequest(BaseModel):
     message: str
     language: Optional[str] = "normal"  # "normal" or "genz"
     session_id: Optional[str] = None
+    portfolio_id: Optional[str] = None
+    debug: Optional[bool] = False  # include the request trace in the response
 
 class ChatResponse(BaseModel):
     response: str
@@ -45,10 +101,17 @@ class ChatResponse(BaseModel):
     agent_responses: Optional[List[Dict[str, Any]]] = None
     sources: Optional[List[str]] = None
     intent: Optional[str] = None
+    trace: Optional[Dict[str, Any]] = None
 
 class PortfolioRequest(BaseModel):
     analysis_type: Optional[str] = "summary"  # "summary", "detailed", "sectors", "countries"
 
+class PortfolioUpsertRequest(BaseModel):
+    user_id: str
+    name: Optional[str] = None
+    stocks: List[Dict[str, Any]]
+    mutual_funds: Optional[List[Dict[str, Any]]] = []
+
 class PortfolioResponse(BaseModel):
     data: Dict[str, Any]
     summary: Dict[str, Any]
@@ -59,9 +122,6 @@ class AgentStatusResponse(BaseModel):
     system_status: str
     timestamp: str
 
-# In-memory session storage (in production, use Redis or database)
-sessions = {}
-
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -73,6 +133,7 @@ async def root():
         "endpoints": {
             "chat": "/chat",
             "portfolio": "/portfolio",
+            "portfolios": "/portfolios",
             "agents": "/agents/status",
             "health": "/health",
             "examples": "/examples"
@@ -87,17 +148,19 @@ async def chat(request: ChatRequest):
         # Generate session ID if not provided
         session_id = request.session_id or str(uuid.uuid4())
         
-        # Process query through agent system
-        result = agent_system.process_query(request.message, request.language)
-        
-        # Store session data
-        sessions[session_id] = {
-            "user": "demo",
-            "last_query": request.message,
-            "last_response": result["response"],
-            "timestamp": datetime.now().isoformat(),
-            "language": request.language
-        }
+        with span("chat") as chat_span:
+            # Process query through agent system without blocking the event loop
+            result = await agent_system.aprocess_query(request.message, request.language, request.portfolio_id, session_id)
+            
+            # Store session data
+            with span("session.store"):
+                await asyncio.to_thread(session_store.set, session_id, {
+                    "user": "demo",
+                    "last_query": request.message,
+                    "last_response": result["response"],
+                    "timestamp": datetime.now().isoformat(),
+                    "language": request.language
+                })
         
         return ChatResponse(
             response=result["response"],
@@ -106,51 +169,49 @@ async def chat(request: ChatRequest):
             success=result["success"],
             agent_responses=result.get("agent_responses", []),
             sources=result.get("routing_info", {}).get("agents_used", []),
-            intent=result.get("intent_analysis", {}).get("primary", "unknown")
+            intent=result.get("intent_analysis", {}).get("primary", "unknown"),
+            trace=chat_span.to_dict() if request.debug and chat_span is not None else None
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing chat: {str(e)}")
 
 @app.get("/portfolio", response_model=PortfolioResponse)
-async def get_portfolio(analysis_type: str = "summary"):
+async def get_portfolio(analysis_type: str = "summary", portfolio_id: Optional[str] = None):
     """Get portfolio analysis"""
     try:
-        summary = get_portfolio_summary()
+        snapshot = await asyncio.to_thread(get_portfolio_snapshot, portfolio_id)
+        summary = dict(snapshot.summary)
         
         if analysis_type == "summary":
             data = {
                 "summary": summary,
-                "total_stocks": len(PORTFOLIO_DATA["stocks"]),
-                "total_mutual_funds": len(PORTFOLIO_DATA["mutual_funds"])
+                "total_stocks": len(snapshot.stocks),
+                "total_mutual_funds": len(snapshot.mutual_funds),
+                "version": snapshot.version
             }
         elif analysis_type == "detailed":
             data = {
                 "summary": summary,
-                "stocks": PORTFOLIO_DATA["stocks"],
-                "mutual_funds": PORTFOLIO_DATA["mutual_funds"]
+                "stocks": to_plain(snapshot.stocks),
+                "mutual_funds": to_plain(snapshot.mutual_funds),
+                "version": snapshot.version
             }
         elif analysis_type == "sectors":
-            sectors = {}
-            for stock in PORTFOLIO_DATA["stocks"]:
-                sector = stock["sector"]
-                if sector not in sectors:
-                    sectors[sector] = {"stocks": [], "total_value": 0}
-                sectors[sector]["stocks"].append(stock)
-                sectors[sector]["total_value"] += stock["quantity"] * stock["current_price"]
+            sectors = {
+                sector: {"stocks": to_plain(snapshot.stocks_by("sector", sector)), "total_value": group["total_value"]}
+                for sector, group in snapshot.by_sector.items()
+            }
             
             data = {
                 "summary": summary,
                 "sectors": sectors
             }
         elif analysis_type == "countries":
-            countries = {}
-            for stock in PORTFOLIO_DATA["stocks"]:
-                country = stock["country"]
-                if country not in countries:
-                    countries[country] = {"stocks": [], "total_value": 0}
-                countries[country]["stocks"].append(stock)
-                countries[country]["total_value"] += stock["quantity"] * stock["current_price"]
+            countries = {
+                country: {"stocks": to_plain(snapshot.stocks_by("country", country)), "total_value": group["total_value"]}
+                for country, group in snapshot.by_country.items()
+            }
             
             data = {
                 "summary": summary,
@@ -165,14 +226,19 @@ async def get_portfolio(analysis_type: str = "summary"):
             timestamp=datetime.now().isoformat()
         )
         
+    except HTTPException:
+        raise
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting portfolio: {str(e)}")
 
 @app.get("/portfolio/penny-stocks")
-async def get_penny_stocks():
+async def get_penny_stocks(portfolio_id: Optional[str] = None):
     """Get penny stocks in portfolio"""
     try:
-        penny_stocks = [stock for stock in PORTFOLIO_DATA["stocks"] if stock["current_price"] < 20]
+        snapshot = await asyncio.to_thread(get_portfolio_snapshot, portfolio_id)
+        penny_stocks = to_plain(snapshot.penny_stocks())
         
         return {
             "penny_stocks": penny_stocks,
@@ -180,9 +246,41 @@ async def get_penny_stocks():
             "timestamp": datetime.now().isoformat()
         }
         
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting penny stocks: {str(e)}")
 
+@app.get("/portfolios")
+async def list_portfolios(user_id: Optional[str] = None):
+    """List stored portfolios, optionally for one user"""
+    try:
+        portfolios = await asyncio.to_thread(portfolio_repository.list_portfolios, user_id)
+        return {
+            "portfolios": portfolios,
+            "count": len(portfolios),
+            "timestamp": datetime.now().isoformat()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error listing portfolios: {str(e)}")
+
+@app.put("/portfolios/{portfolio_id}")
+async def upsert_portfolio(portfolio_id: str, request: PortfolioUpsertRequest):
+    """Create or replace a portfolio"""
+    try:
+        portfolio = {"stocks": request.stocks, "mutual_funds": request.mutual_funds or []}
+        await asyncio.to_thread(save_portfolio, portfolio_id, request.user_id, portfolio, request.name)
+        return {
+            "portfolio_id": portfolio_id,
+            "user_id": request.user_id,
+            "stock_count": len(request.stocks),
+            "timestamp": datetime.now().isoformat()
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error saving portfolio: {str(e)}")
+
 @app.get("/agents/status", response_model=AgentStatusResponse)
 async def get_agent_status():
     """Get status of all agents"""
@@ -309,17 +407,44 @@ async def health_check():
         "authentication": "disabled"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Per-stage latency quantiles in Prometheus text format"""
+    return PlainTextResponse(stage_metrics.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    """Get stored chat session data"""
+    session = await asyncio.to_thread(session_store.get, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return {
+        "session_id": session_id,
+        "session": session,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/sessions")
+async def get_session_stats():
+    """Get session store statistics"""
+    return {
+        "stats": await asyncio.to_thread(session_store.stats),
+        "timestamp": datetime.now().isoformat()
+    }
+
 # Chart and data endpoints
 @app.get("/charts/portfolio")
-async def get_portfolio_charts():
+async def get_portfolio_charts(portfolio_id: Optional[str] = None):
     """Get portfolio charts"""
     try:
-        portfolio_data = get_portfolio_data()
-        charts = chart_service.generate_portfolio_charts(portfolio_data)
+        portfolio_data = await asyncio.to_thread(get_portfolio_data, portfolio_id)
+        charts = await asyncio.to_thread(chart_service.generate_portfolio_charts, portfolio_data)
         return {
             "charts": charts,
             "timestamp": datetime.now().isoformat()
         }
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating charts: {str(e)}")
 
@@ -327,7 +452,7 @@ async def get_portfolio_charts():
 async def get_stock_charts(symbol: str):
     """Get stock-specific charts"""
     try:
-        charts = chart_service.generate_stock_charts(symbol)
+        charts = await asyncio.to_thread(chart_service.generate_stock_charts, symbol)
         return {
             "symbol": symbol,
             "charts": charts,
@@ -340,7 +465,8 @@ async def get_stock_charts(symbol: str):
 async def get_live_prices():
     """Get live stock prices"""
     try:
-        prices = real_time_service.get_live_prices()
+        symbols = [stock["symbol"] for stock in PORTFOLIO_DATA["stocks"]]
+        prices = await real_time_service.aget_live_prices(symbols)
         return {
             "prices": prices,
             "timestamp": datetime.now().isoformat()
@@ -348,11 +474,25 @@ async def get_live_prices():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching live prices: {str(e)}")
 
+@app.get("/data/cache-stats")
+async def get_cache_stats():
+    """Get quote and exchange rate cache statistics"""
+    return {
+        "quotes": real_time_service.get_cache_stats(),
+        "fx_rates": currency_service.get_cache_stats(),
+        "history": real_time_service.get_history_cache_stats(),
+        "indicators": real_time_service.get_indicator_stats(),
+        "risk": risk_engine.get_stats(),
+        "responses": agent_system.response_cache.stats(),
+        "refresher": market_data_refresher.status(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.get("/data/stock-info/{symbol}")
 async def get_stock_info(symbol: str):
     """Get comprehensive stock information"""
     try:
-        info = real_time_service.get_comprehensive_stock_info(symbol)
+        info = await real_time_service.aget_stock_info(symbol)
         return {
             "symbol": symbol,
             "info": info,
@@ -362,4 +502,7 @@ async def get_stock_info(symbol: str):
         raise HTTPException(status_code=500, detail=f"Error fetching stock info: {str(e)}")
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    # Hand off to the uvicorn CLI: spawned Monte Carlo workers re-import __main__,
+    # which must not be this module or every worker would rebuild the app
+    os.execv(sys.executable, [sys.executable, "-m", "uvicorn", "main:app",
+                              "--host", "0.0.0.0", "--port", "8000", "--reload"])
@@ -0,0 +1,176 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+import numpy as np
+import pandas as pd
+import config
+
+# One record per daily bar; files are plain .npy so they can be memory-mapped
+BAR_DTYPE = np.dtype([
+    ("date", "datetime64[D]"),
+    ("open", "f8"),
+    ("high", "f8"),
+    ("low", "f8"),
+    ("close", "f8"),
+    ("volume", "f8")
+])
+
+# Column names of the yfinance history frames the store reads and writes
+FRAME_COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+
+# Calendar days covered by each yfinance history period
+PERIOD_DAYS = {"1d": 1, "5d": 5, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731, "5y": 1827, "10y": 3653}
+
+
+def period_start(period: str, today: Optional[date] = None) -> Optional[date]:
+    """First calendar date of a yfinance period, or None for periods the store does not serve ("max")"""
+    today = today or date.today()
+    if period == "ytd":
+        return date(today.year, 1, 1)
+    days = PERIOD_DAYS.get(period)
+    return today - timedelta(days=days) if days is not None else None
+
+
+class BarStore:
+    """Persistent daily OHLCV bars, one memory-mapped NumPy file per symbol.
+
+    Each symbol has SYMBOL.npy (bars sorted by date) and SYMBOL.json (the earliest
+    date covered and when the tail was last checked). Writes merge new bars into a
+    temporary file and atomically replace the old one, so readers in this or another
+    process always see a complete file. Reads are zero-copy slices of the mapping.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._maps = {}
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.writes = 0
+
+    def coverage(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Stored coverage: {"start", "end", "checked_at", "bars"}, or None if never stored"""
+        meta = self._read_meta(symbol)
+        if meta is None:
+            return None
+        bars = self.read(symbol)
+        meta["start"] = date.fromisoformat(meta["start"])
+        meta["end"] = bars["date"][-1].astype(date) if len(bars) else None
+        meta["bars"] = len(bars)
+        return meta
+
+    def read(self, symbol: str, start: Optional[date] = None, end: Optional[date] = None) -> np.ndarray:
+        """Bars with start <= date <= end as a read-only view of the mapped file"""
+        bars = self._map(symbol)
+        self.reads += 1
+        if start is None and end is None:
+            return bars
+        dates = bars["date"]
+        lo = np.searchsorted(dates, np.datetime64(start, "D"), side="left") if start is not None else 0
+        hi = np.searchsorted(dates, np.datetime64(end, "D"), side="right") if end is not None else len(bars)
+        return bars[lo:hi]
+
+    def read_frame(self, symbol: str, start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+        """Bars as a yfinance-style frame (Open/High/Low/Close/Volume by date)"""
+        bars = self.read(symbol, start, end)
+        return pd.DataFrame({column: bars[field] for field, column in FRAME_COLUMNS.items()},
+                            index=pd.DatetimeIndex(bars["date"], name="Date"))
+
+    def append(self, symbol: str, history: pd.DataFrame, covered_from: Optional[date] = None, checked: bool = True):
+        """Merge fetched bars into the store (fetched bars win on overlapping dates).
+
+        covered_from extends the recorded coverage back to the requested start even
+        when the first bar is later (holidays, listing date); checked marks the tail
+        as verified now.
+        """
+        new_bars = _frame_to_bars(history)
+        with self._lock:
+            existing = self._map(symbol)
+            merged = np.concatenate([existing, new_bars]) if len(existing) else new_bars
+            if len(merged):
+                # Stable sort keeps fetched bars after stored ones, so keeping the last per date prefers them
+                merged = merged[np.argsort(merged["date"], kind="stable")]
+                last_per_date = np.append(merged["date"][1:] != merged["date"][:-1], True)
+                merged = merged[last_per_date]
+
+            meta = self._read_meta(symbol) or {}
+            starts = [date.fromisoformat(meta["start"])] if "start" in meta else []
+            starts += [covered_from] if covered_from is not None else []
+            starts += [merged["date"][0].astype(date)] if len(merged) else []
+            meta["start"] = min(starts).isoformat() if starts else date.today().isoformat()
+            if checked or "checked_at" not in meta:
+                meta["checked_at"] = time.time() if checked else 0.0
+
+            os.makedirs(self.path, exist_ok=True)
+            self._atomic_write(self._file(symbol, ".npy"), lambda f: np.save(f, merged))
+            self._atomic_write(self._file(symbol, ".json"), lambda f: f.write(json.dumps(meta).encode()))
+            self._maps.pop(symbol, None)
+            self.writes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Store location and counters for monitoring"""
+        return {"path": self.path, "mapped_symbols": len(self._maps), "reads": self.reads, "writes": self.writes}
+
+    def _map(self, symbol: str) -> np.ndarray:
+        """Memory-mapped bars for a symbol, remapped when the file was replaced"""
+        path = self._file(symbol, ".npy")
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        # A replaced file has a new inode, so this also notices writes by other processes
+        version = (stat.st_ino, stat.st_mtime_ns)
+        cached = self._maps.get(symbol)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        try:
+            bars = np.load(path, mmap_mode="r")
+        except ValueError:
+            # Zero-row files have nothing to map
+            bars = np.load(path)
+        self._maps[symbol] = (version, bars)
+        return bars
+
+    def _read_meta(self, symbol: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._file(symbol, ".json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _file(self, symbol: str, suffix: str) -> str:
+        return os.path.join(self.path, re.sub(r"[^A-Za-z0-9._-]", "_", symbol) + suffix)
+
+    def _atomic_write(self, path: str, write):
+        """Write to a temporary file in the same directory, then rename over path"""
+        fd, temporary = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+
+def _frame_to_bars(history: pd.DataFrame) -> np.ndarray:
+    """Structured bar records from a yfinance history frame, dated in exchange-local time"""
+    if history is None or history.empty:
+        return np.empty(0, dtype=BAR_DTYPE)
+    index = pd.DatetimeIndex(history.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    bars = np.empty(len(history), dtype=BAR_DTYPE)
+    bars["date"] = index.to_numpy().astype("datetime64[D]")
+    for field, column in FRAME_COLUMNS.items():
+        bars[field] = history[column].to_numpy(dtype=np.float64) if column in history else np.nan
+    return bars
+
+
+# Global instance
+bar_store = BarStore(config.BAR_STORE_PATH)
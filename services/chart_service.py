@@ -3,6 +3,8 @@ import plotly.express as px
 import pandas as pd
 from typing import Dict, List, Any
 from services.real_time_data import real_time_service
+from data.holdings_store import HoldingsStore
+from services.tracing import traced
 
 class ChartService:
     """Service for generating interactive charts and visualizations"""
@@ -17,15 +19,12 @@ class ChartService:
             'info': '#17a2b8'
         }
     
+    @traced("charts.portfolio_pie")
     def generate_portfolio_pie_chart(self, portfolio_data: Dict[str, Any]) -> str:
         """Generate portfolio sector distribution pie chart"""
         try:
             # Prepare data for pie chart
-            sector_data = {}
-            for stock in portfolio_data['stocks']:
-                sector = stock.get('sector', 'Unknown')
-                current_value = stock.get('quantity', 0) * stock.get('current_price', 0)
-                sector_data[sector] = sector_data.get(sector, 0) + current_value
+            sector_data = self._sector_values(portfolio_data)
             
             # Create pie chart
             fig = go.Figure(data=[go.Pie(
@@ -48,6 +47,7 @@ class ChartService:
             print(f"Error generating pie chart: {e}")
             return "<p>Chart generation failed</p>"
     
+    @traced("charts.portfolio_performance")
     def generate_portfolio_performance_chart(self, portfolio_data: Dict[str, Any]) -> str:
         """Generate portfolio performance bar chart"""
         try:
@@ -85,6 +85,7 @@ class ChartService:
             print(f"Error generating performance chart: {e}")
             return "<p>Chart generation failed</p>"
     
+    @traced("charts.stock_price")
     def generate_stock_price_chart(self, symbol: str, period: str = "6mo") -> str:
         """Generate stock price chart with technical indicators"""
         try:
@@ -140,18 +141,13 @@ class ChartService:
             print(f"Error generating stock chart: {e}")
             return "<p>Chart generation failed</p>"
     
+    @traced("charts.risk_metrics")
     def generate_risk_metrics_chart(self, portfolio_data: Dict[str, Any]) -> str:
         """Generate risk metrics visualization"""
         try:
-            # Calculate risk metrics
-            total_value = sum(stock.get('quantity', 0) * stock.get('current_price', 0) for stock in portfolio_data['stocks'])
-            
             # Sector concentration
-            sector_concentration = {}
-            for stock in portfolio_data['stocks']:
-                sector = stock.get('sector', 'Unknown')
-                value = stock.get('quantity', 0) * stock.get('current_price', 0)
-                sector_concentration[sector] = sector_concentration.get(sector, 0) + value
+            sector_concentration = self._sector_values(portfolio_data)
+            total_value = sum(sector_concentration.values())
             
             # Convert to percentages
             sector_percentages = {k: (v/total_value)*100 for k, v in sector_concentration.items()}
@@ -180,6 +176,12 @@ class ChartService:
             print(f"Error generating risk chart: {e}")
             return "<p>Chart generation failed</p>"
     
+    def _sector_values(self, portfolio_data: Dict[str, Any]) -> Dict[str, float]:
+        """Current value per sector, aggregated in one vectorized pass"""
+        holdings = HoldingsStore.from_records(portfolio_data['stocks'])
+        return {sector: totals['total_value'] for sector, totals in holdings.group_totals('sector').items()}
+    
+    @traced("charts.market_sentiment")
     def generate_market_sentiment_chart(self, portfolio_data: Dict[str, Any]) -> str:
         """Generate market sentiment visualization"""
         try:
@@ -222,6 +224,7 @@ class ChartService:
             print(f"Error generating sentiment chart: {e}")
             return "<p>Chart generation failed</p>"
     
+    @traced("charts.dashboard")
     def generate_comprehensive_dashboard(self, portfolio_data: Dict[str, Any]) -> str:
         """Generate comprehensive dashboard with multiple charts"""
         try:
@@ -1,57 +1,106 @@
 import requests
+import httpx
 import json
-from typing import Dict, Optional
-from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+import config
+from services.quote_cache import QuoteCache
+from services.tracing import traced
 
 class CurrencyService:
     """Service for currency conversion and exchange rates"""
     
     def __init__(self):
-        self.cache = {}
-        self.cache_duration = 3600  # 1 hour
-        self.last_update = {}
+        self.rate_cache = QuoteCache(
+            ttl=config.FX_CACHE_TTL_SECONDS,
+            stale_ttl=config.FX_CACHE_STALE_SECONDS,
+            max_size=256,
+            name="fx_rates"
+        )
         self.base_url = "https://api.exchangerate-api.com/v4/latest"
     
     def get_exchange_rate(self, from_currency: str, to_currency: str) -> float:
         """Get exchange rate between two currencies"""
-        current_time = datetime.now()
         cache_key = f"{from_currency}_{to_currency}"
         
-        # Check cache first
-        if (cache_key in self.cache and 
-            cache_key in self.last_update and 
-            (current_time - self.last_update[cache_key]).seconds < self.cache_duration):
-            return self.cache[cache_key]
+        rate = self.rate_cache.get(
+            cache_key,
+            lambda keys: self._fetch_rate(from_currency, to_currency, cache_key)
+        )
+        if rate is not None:
+            return rate
+        return self._get_last_or_fallback_rate(cache_key)
+    
+    async def aget_exchange_rate(self, from_currency: str, to_currency: str) -> float:
+        """Async variant of get_exchange_rate using a non-blocking HTTP client"""
+        cache_key = f"{from_currency}_{to_currency}"
+        
+        cached_rate = self.rate_cache.get_if_fresh(cache_key)
+        if cached_rate is not None:
+            return cached_rate
         
         try:
-            # Use free exchange rate API
             url = f"{self.base_url}/{from_currency}"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                rates = data.get('rates', {})
-                rate = rates.get(to_currency, 1.0)
-                
-                # Cache the result
-                self.cache[cache_key] = rate
-                self.last_update[cache_key] = current_time
-                
+            async with httpx.AsyncClient(timeout=10) as client:
+                response = await client.get(url)
+            rate = self._parse_rate_response(response, to_currency)
+            if rate is not None:
+                self.rate_cache.set(cache_key, rate)
                 return rate
-            else:
-                # Fallback to cached rate or default
-                return self.cache.get(cache_key, 1.0)
                 
         except Exception as e:
             print(f"Error fetching exchange rate: {e}")
-            # Fallback rates (approximate)
-            fallback_rates = {
-                "INR_USD": 0.012,  # 1 INR = 0.012 USD
-                "USD_INR": 83.0,   # 1 USD = 83 INR
-                "EUR_USD": 1.08,   # 1 EUR = 1.08 USD
-                "USD_EUR": 0.93,   # 1 USD = 0.93 EUR
-            }
-            return fallback_rates.get(cache_key, 1.0)
+        
+        return self._get_last_or_fallback_rate(cache_key)
+    
+    @traced("fx.fetch")
+    def _fetch_rate(self, from_currency: str, to_currency: str, cache_key: str) -> Dict[str, float]:
+        """Rate cache loader using the free exchange rate API"""
+        try:
+            url = f"{self.base_url}/{from_currency}"
+            response = requests.get(url, timeout=10)
+            rate = self._parse_rate_response(response, to_currency)
+            return {cache_key: rate} if rate is not None else {}
+        except Exception as e:
+            print(f"Error fetching exchange rate: {e}")
+            return {}
+    
+    def _parse_rate_response(self, response, to_currency: str) -> Optional[float]:
+        """Extract the rate from an exchange rate API response"""
+        if response.status_code == 200:
+            data = response.json()
+            rates = data.get('rates', {})
+            return rates.get(to_currency, 1.0)
+        return None
+    
+    def _get_last_or_fallback_rate(self, cache_key: str) -> float:
+        """Last known rate, or the approximate fallback when none was ever fetched"""
+        last_rate = self.rate_cache.peek(cache_key)
+        if last_rate is not None:
+            return last_rate
+        return self._get_fallback_rate(cache_key)
+    
+    def refresh_rates(self, pairs: List[Tuple[str, str]]):
+        """Reload exchange rates for currency pairs regardless of cache age (background refresh)"""
+        for from_currency, to_currency in pairs:
+            cache_key = f"{from_currency}_{to_currency}"
+            self.rate_cache.refresh(
+                [cache_key],
+                lambda keys, f=from_currency, t=to_currency, k=cache_key: self._fetch_rate(f, t, k)
+            )
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Rate cache counters for monitoring"""
+        return self.rate_cache.stats()
+    
+    def _get_fallback_rate(self, cache_key: str) -> float:
+        """Fallback rates (approximate) when the API is unreachable"""
+        fallback_rates = {
+            "INR_USD": 0.012,  # 1 INR = 0.012 USD
+            "USD_INR": 83.0,   # 1 USD = 83 INR
+            "EUR_USD": 1.08,   # 1 EUR = 1.08 USD
+            "USD_EUR": 0.93,   # 1 USD = 0.93 EUR
+        }
+        return fallback_rates.get(cache_key, 1.0)
     
     def convert_currency(self, amount: float, from_currency: str, to_currency: str) -> float:
         """Convert amount from one currency to another"""
@@ -61,6 +110,14 @@ class CurrencyService:
         rate = self.get_exchange_rate(from_currency, to_currency)
         return amount * rate
     
+    async def aconvert_currency(self, amount: float, from_currency: str, to_currency: str) -> float:
+        """Async variant of convert_currency"""
+        if from_currency == to_currency:
+            return amount
+        
+        rate = await self.aget_exchange_rate(from_currency, to_currency)
+        return amount * rate
+    
     def format_currency(self, amount: float, currency: str) -> str:
         """Format currency amount with proper symbols"""
         currency_symbols = {
@@ -0,0 +1,259 @@
+import warnings
+from typing import Dict, Optional, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import pandas as pd
+
+# Latest-value columns returned by IndicatorEngine.latest, one row per symbol
+INDICATOR_COLUMNS = (
+    "close", "rsi", "macd", "macd_signal", "macd_histogram", "sma_20", "sma_50", "ema_20",
+    "bb_upper", "bb_middle", "bb_lower", "bb_percent_b", "support", "resistance", "volume", "avg_volume"
+)
+
+
+def align_history(history: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Close and volume matrices (dates x symbols) from per-symbol OHLCV frames.
+
+    Exchanges trade on different calendars, so the union of dates is used and each
+    symbol's last close is carried forward over its market holidays. That suits
+    cross-sectional returns (a holiday is a zero-return day); indicators use
+    stack_bars instead, so filled rows never count as bars.
+    """
+    frames = {symbol: frame for symbol, frame in history.items() if frame is not None and not frame.empty}
+    if not frames:
+        return pd.DataFrame(), pd.DataFrame()
+
+    symbols = list(frames)
+    dates = [_calendar_dates(frame.index) for frame in frames.values()]
+    calendar = np.unique(np.concatenate(dates))
+
+    # Scatter each symbol's bars into its rows of the shared calendar; a later bar
+    # on the same date overwrites an earlier one
+    close = np.full((len(calendar), len(symbols)), np.nan)
+    volume = np.zeros((len(calendar), len(symbols)))
+    for column, (frame, symbol_dates) in enumerate(zip(frames.values(), dates)):
+        rows = np.searchsorted(calendar, symbol_dates)
+        close[rows, column] = frame["Close"].to_numpy(dtype=np.float64)
+        if "Volume" in frame:
+            volume[rows, column] = frame["Volume"].to_numpy(dtype=np.float64)
+
+    index = pd.DatetimeIndex(calendar)
+    return pd.DataFrame(_forward_fill(close), index=index, columns=symbols), pd.DataFrame(volume, index=index, columns=symbols)
+
+
+
+def stack_bars(history: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Close and volume matrices (bars x symbols) holding each symbol's own bars only.
+
+    Columns are aligned on their latest bar (the last row) and shorter histories are
+    NaN-padded at the top, so every rolling or recursive indicator runs over the
+    symbol's own trading days and does not depend on which other symbols are in the
+    batch. Rows are bar positions, not dates.
+    """
+    frames = {symbol: frame for symbol, frame in history.items() if frame is not None and not frame.empty}
+    if not frames:
+        return pd.DataFrame(), pd.DataFrame()
+
+    bars = {}
+    for symbol, frame in frames.items():
+        # A later bar on the same date (e.g. a live update) replaces the earlier one
+        keep = ~pd.Index(_calendar_dates(frame.index)).duplicated(keep="last")
+        bars[symbol] = frame[keep]
+
+    symbols = list(bars)
+    rows = max(len(frame) for frame in bars.values())
+    close = np.full((rows, len(symbols)), np.nan)
+    volume = np.full((rows, len(symbols)), np.nan)
+    for column, frame in enumerate(bars.values()):
+        close[rows - len(frame):, column] = frame["Close"].to_numpy(dtype=np.float64)
+        if "Volume" in frame:
+            volume[rows - len(frame):, column] = frame["Volume"].to_numpy(dtype=np.float64)
+
+    return pd.DataFrame(close, columns=symbols), pd.DataFrame(volume, columns=symbols)
+
+class IndicatorEngine:
+    """Batch technical indicators over a multi-symbol price matrix (see stack_bars).
+
+    Every indicator is a column-wise rolling or exponentially weighted operation on
+    the whole bars x symbols matrix, so hundreds of symbols cost one pass each
+    rather than one pandas pipeline per symbol.
+    """
+
+    def __init__(self, rsi_period: int = 14, macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9,
+                 bollinger_window: int = 20, bollinger_width: float = 2.0, level_window: int = 20):
+        self.rsi_period = rsi_period
+        self.macd_fast = macd_fast
+        self.macd_slow = macd_slow
+        self.macd_signal = macd_signal
+        self.bollinger_window = bollinger_window
+        self.bollinger_width = bollinger_width
+        self.level_window = level_window
+
+    def compute(self, close: pd.DataFrame, volume: Optional[pd.DataFrame] = None) -> Dict[str, pd.DataFrame]:
+        """Indicator matrices (same shape as close) keyed by indicator name"""
+        volumes = None
+        if volume is not None and not volume.empty:
+            volumes = volume.reindex(index=close.index, columns=close.columns).to_numpy(dtype=np.float64)
+        return {name: pd.DataFrame(values, index=close.index, columns=close.columns)
+                for name, values in self._compute_arrays(close.to_numpy(dtype=np.float64), volumes).items()}
+
+    def latest(self, close: pd.DataFrame, volume: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """Last value of every indicator, one row per symbol (NaN where history is too short)"""
+        if close.empty:
+            return pd.DataFrame(columns=list(INDICATOR_COLUMNS))
+        volumes = None
+        if volume is not None and not volume.empty:
+            volumes = volume.reindex(index=close.index, columns=close.columns).to_numpy(dtype=np.float64)
+        indicators = self._compute_arrays(close.to_numpy(dtype=np.float64), volumes)
+        latest = pd.DataFrame({name: values[-1] for name, values in indicators.items()}, index=close.columns)
+        return latest.reindex(columns=list(INDICATOR_COLUMNS))
+
+    def _compute_arrays(self, prices: np.ndarray, volumes: Optional[np.ndarray]) -> Dict[str, np.ndarray]:
+        """Indicator arrays for a bars x symbols price array (leading NaNs are padding)"""
+
+        # Wilder RSI: exponential smoothing of gains and losses with alpha = 1/period
+        delta = np.diff(prices, axis=0)
+        first_row = np.full((1,) + prices.shape[1:], np.nan)
+        average_gain = np.concatenate([first_row, _ewm(np.maximum(delta, 0), 1 / self.rsi_period, self.rsi_period)])
+        average_loss = np.concatenate([first_row, _ewm(np.maximum(-delta, 0), 1 / self.rsi_period, self.rsi_period)])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 - 100 / (1 + average_gain / average_loss)
+        # No losses gives 100 - 100/inf = 100; a flat window is neutral
+        rsi = np.where((average_loss == 0) & (average_gain == 0), 50.0, rsi)
+
+        macd = _ewm(prices, 2 / (self.macd_fast + 1)) - _ewm(prices, 2 / (self.macd_slow + 1))
+        macd_signal = _ewm(macd, 2 / (self.macd_signal + 1))
+
+        bb_middle, bb_std = _rolling_mean_std(prices, self.bollinger_window)
+        bb_upper = bb_middle + self.bollinger_width * bb_std
+        bb_lower = bb_middle - self.bollinger_width * bb_std
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bb_percent_b = (prices - bb_lower) / (bb_upper - bb_lower)
+
+        level_windows = _windows(prices, self.level_window)
+        with warnings.catch_warnings():
+            # Leading all-NaN windows for symbols with a shorter history
+            warnings.simplefilter("ignore", RuntimeWarning)
+            support = np.nanmin(level_windows, axis=-1)
+            resistance = np.nanmax(level_windows, axis=-1)
+
+        indicators = {
+            "close": prices,
+            "rsi": rsi,
+            "macd": macd,
+            "macd_signal": macd_signal,
+            "macd_histogram": macd - macd_signal,
+            "sma_20": _rolling_mean_std(prices, 20)[0],
+            "sma_50": _rolling_mean_std(prices, 50)[0],
+            "ema_20": _ewm(prices, 2 / 21),
+            "bb_upper": bb_upper,
+            "bb_middle": bb_middle,
+            "bb_lower": bb_lower,
+            "bb_percent_b": bb_percent_b,
+            "support": support,
+            "resistance": resistance
+        }
+        if volumes is not None:
+            indicators["volume"] = volumes
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                indicators["avg_volume"] = np.nanmean(_windows(volumes, 20), axis=-1)
+        return indicators
+
+    def recursive_tails(self, close: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Last two rows (2 x symbols) of every exponential average, for seeding streaming states.
+
+        Unlike compute, averages are not masked until min_periods observations, since a
+        streaming average carries its value from the first one. Rows before a symbol's
+        first observation are NaN.
+        """
+        prices = close.to_numpy(dtype=np.float64)
+        first_row = np.full((1,) + prices.shape[1:], np.nan)
+        delta = np.concatenate([first_row, np.diff(prices, axis=0)])
+        ema_fast = _ewm(prices, 2 / (self.macd_fast + 1))
+        ema_slow = _ewm(prices, 2 / (self.macd_slow + 1))
+        averages = {
+            "ema_fast": ema_fast,
+            "ema_slow": ema_slow,
+            "macd_signal": _ewm(ema_fast - ema_slow, 2 / (self.macd_signal + 1)),
+            "ema_20": _ewm(prices, 2 / 21),
+            "rsi_gain": _ewm(np.maximum(delta, 0), 1 / self.rsi_period),
+            "rsi_loss": _ewm(np.maximum(-delta, 0), 1 / self.rsi_period)
+        }
+        return {name: np.concatenate([first_row, values])[-2:] for name, values in averages.items()}
+
+
+def _ewm(values: np.ndarray, alpha: float, min_periods: int = 1) -> np.ndarray:
+    """Exponentially weighted mean down each column (pandas adjust=False semantics).
+
+    The recursion runs over rows only; each step is one vector operation across all
+    symbols. NaNs (leading gaps) carry the previous average forward.
+    """
+    result = np.empty_like(values)
+    gaps = np.isnan(values)
+    if len(values) and not gaps.any():
+        # Common case: no gaps, so the recursion is a single multiply-add per row
+        average = values[0].copy()
+        result[0] = average
+        for row in range(1, values.shape[0]):
+            average += alpha * (values[row] - average)
+            result[row] = average
+        if min_periods > 1:
+            result[:min_periods - 1] = np.nan
+        return result
+
+    average = np.full(values.shape[1:], np.nan)
+    observed = np.zeros(values.shape[1:], dtype=np.int64)
+    for row in range(values.shape[0]):
+        current = values[row]
+        valid = ~gaps[row]
+        average = np.where(valid, np.where(np.isnan(average), current, average + alpha * (current - average)), average)
+        observed += valid
+        result[row] = np.where(observed >= min_periods, average, np.nan)
+    return result
+
+
+def _rolling_mean_std(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Trailing mean and population std from cumulative sums; NaN until a full gap-free window"""
+    gaps = np.isnan(values)
+    filled = np.where(gaps, 0.0, values)
+    zeros = np.zeros((1,) + values.shape[1:])
+    sums = np.concatenate([zeros, np.cumsum(filled, axis=0)])
+    squares = np.concatenate([zeros, np.cumsum(filled * filled, axis=0)])
+    gap_counts = np.concatenate([zeros, np.cumsum(gaps, axis=0)])
+
+    mean = np.full_like(values, np.nan)
+    std = np.full_like(values, np.nan)
+    if values.shape[0] >= window:
+        window_sum = sums[window:] - sums[:-window]
+        window_squares = squares[window:] - squares[:-window]
+        complete = (gap_counts[window:] - gap_counts[:-window]) == 0
+        window_mean = window_sum / window
+        # Clip the rounding noise of E[x^2] - E[x]^2 on flat windows
+        window_std = np.sqrt(np.maximum(window_squares / window - window_mean * window_mean, 0.0))
+        mean[window - 1:] = np.where(complete, window_mean, np.nan)
+        std[window - 1:] = np.where(complete, window_std, np.nan)
+    return mean, std
+
+
+def _windows(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing windows (rows x columns x window), NaN-padded before the first row"""
+    padded = np.concatenate([np.full((window - 1,) + values.shape[1:], np.nan), values])
+    return sliding_window_view(padded, window, axis=0)
+
+
+def _forward_fill(values: np.ndarray) -> np.ndarray:
+    """Carry the last non-NaN value down each column (leading NaNs stay)"""
+    rows = np.where(np.isnan(values), -1, np.arange(values.shape[0])[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    filled = values[rows, np.arange(values.shape[1])]
+    filled[rows < 0] = np.nan
+    return filled
+
+
+def _calendar_dates(index: pd.Index) -> np.ndarray:
+    """Naive calendar dates of an index, in the exchange's local time"""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.to_numpy().astype("datetime64[D]")
@@ -0,0 +1,107 @@
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+import httpx
+import config
+
+DEFAULT_BASE_URL = "https://api.mistral.ai/v1"
+
+
+class LLMRegistry:
+    """Process-wide, lazily built pool of chat model clients.
+
+    Clients are created on first use and cached per (model, temperature), and all of
+    them share one sync and one async HTTP connection pool whose size bounds outbound
+    concurrency to the LLM provider. Nothing is imported or connected until an agent
+    actually asks for a model.
+    """
+
+    def __init__(self, api_key: str, default_model: str, default_temperature: float,
+                 max_connections: int = 16, timeout: float = 120.0, base_url: Optional[str] = None):
+        self.api_key = api_key
+        self.default_model = default_model
+        self.default_temperature = default_temperature
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.base_url = base_url or os.getenv("MISTRAL_BASE_URL") or DEFAULT_BASE_URL
+        self._clients = {}
+        self._http_client = None
+        self._async_http_client = None
+        self._lock = threading.Lock()
+
+    def get(self, model: Optional[str] = None, temperature: Optional[float] = None):
+        """Chat model for model/temperature (registry defaults when omitted), created on first use"""
+        key = (model or self.default_model,
+               self.default_temperature if temperature is None else temperature)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._create(*key)
+                self._clients[key] = client
+            return client
+
+    def stats(self) -> Dict[str, Any]:
+        """Loaded clients and pool limits for monitoring"""
+        return {
+            "clients": [{"model": model, "temperature": temperature} for model, temperature in self._clients],
+            "http_pool_open": self._http_client is not None,
+            "max_connections": self.max_connections
+        }
+
+    def close(self):
+        """Close the shared sync connection pool and drop cached clients"""
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._clients = {}
+            self._http_client = None
+            self._async_http_client = None
+
+    def _create(self, model: str, temperature: float):
+        """Build a chat model on the shared connection pools (lock must be held)"""
+        # Imported here: langchain_mistralai takes about a second to import
+        from langchain_mistralai import ChatMistralAI
+
+        http_client, async_http_client = self._shared_http_clients()
+        return ChatMistralAI(
+            model=model,
+            mistral_api_key=self.api_key,
+            temperature=temperature,
+            endpoint=self.base_url,
+            timeout=int(self.timeout),
+            max_concurrent_requests=self.max_connections,
+            client=http_client,
+            async_client=async_http_client
+        )
+
+    def _shared_http_clients(self) -> Tuple[httpx.Client, httpx.AsyncClient]:
+        """Sync and async HTTP clients shared by every chat model (lock must be held)"""
+        if self._http_client is None:
+            options = {
+                "base_url": self.base_url,
+                "headers": {
+                    "Content-Type": "application/json",
+                    "Accept": "application/json",
+                    "Authorization": f"Bearer {self.api_key}"
+                },
+                "timeout": self.timeout,
+                "limits": httpx.Limits(max_connections=self.max_connections,
+                                       max_keepalive_connections=self.max_connections)
+            }
+            self._http_client = httpx.Client(**options)
+            self._async_http_client = httpx.AsyncClient(**options)
+        return self._http_client, self._async_http_client
+
+
+# Global instance
+llm_registry = LLMRegistry(
+    api_key=config.MISTRAL_API_KEY,
+    default_model=config.LLM_MODEL,
+    default_temperature=config.LLM_TEMPERATURE,
+    max_connections=config.LLM_MAX_CONNECTIONS,
+    timeout=config.LLM_TIMEOUT_SECONDS
+)
@@ -0,0 +1,172 @@
+import threading
+import time
+from datetime import datetime, time as dt_time
+from typing import Any, Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
+import config
+from services.real_time_data import real_time_service
+from services.currency_service import currency_service
+from data.portfolio_data import get_tracked_symbols
+
+# Regular trading sessions (local time, Monday-Friday; exchange holidays are not modelled)
+MARKET_SESSIONS = {
+    "NSE": (ZoneInfo("Asia/Kolkata"), dt_time(9, 15), dt_time(15, 30)),
+    "US": (ZoneInfo("America/New_York"), dt_time(9, 30), dt_time(16, 0))
+}
+
+# Currency pairs kept warm for portfolio conversions
+FX_REFRESH_PAIRS = [("INR", "USD"), ("USD", "INR")]
+
+
+def market_for_symbol(symbol: str) -> str:
+    """Exchange session a symbol trades in"""
+    if symbol.endswith((".NS", ".BO")):
+        return "NSE"
+    return "US"
+
+
+def is_market_open(market: str, now: Optional[datetime] = None) -> bool:
+    """Check whether a market is inside its regular trading session"""
+    timezone, open_time, close_time = MARKET_SESSIONS[market]
+    local_now = (now or datetime.now(timezone)).astimezone(timezone)
+    if local_now.weekday() >= 5:
+        return False
+    return open_time <= local_now.time() < close_time
+
+
+class MarketDataRefresher:
+    """Background thread that keeps quotes, exchange rates and historical bars warm.
+
+    Each market's symbols are refreshed on the quote interval while that market is
+    open, once more right after it closes, and otherwise only if they were never
+    loaded. While running, RealTimeDataService serves reads from memory.
+    """
+
+    def __init__(self, symbols_provider: Callable[[], List[str]],
+                 quote_interval: float = 60.0,
+                 fx_interval: float = 1800.0,
+                 history_interval: float = 3600.0,
+                 history_periods: Optional[List[str]] = None,
+                 clock: Optional[Callable[[], datetime]] = None):
+        self.symbols_provider = symbols_provider
+        self.quote_interval = quote_interval
+        self.fx_interval = fx_interval
+        self.history_interval = history_interval
+        self.history_periods = history_periods or ["6mo", "1y"]
+        self.clock = clock or (lambda: datetime.now(ZoneInfo("UTC")))
+        self.tick_seconds = min(quote_interval, fx_interval, history_interval, 30.0)
+
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._last_quotes = {}
+        self._last_history = {}
+        self._last_fx = None
+        self._was_open = {}
+        self.last_run = {}
+        self.run_count = 0
+        self.error_count = 0
+
+    def start(self):
+        """Start the refresh thread (idempotent)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        real_time_service.serve_from_memory = True
+        self._thread = threading.Thread(target=self._run, name="market-data-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the refresh thread and return reads to the on-demand path"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        real_time_service.serve_from_memory = False
+
+    def is_running(self) -> bool:
+        """Whether the refresh thread is alive"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def run_pending(self):
+        """Run every refresh task that is due"""
+        now = time.monotonic()
+        wall_now = self.clock()
+        symbols_by_market = self._group_symbols()
+
+        for market, symbols in symbols_by_market.items():
+            market_open = is_market_open(market, wall_now)
+            just_closed = self._was_open.get(market, False) and not market_open
+            self._was_open[market] = market_open
+
+            if self._is_due(self._last_quotes.get(market), now, self.quote_interval, market_open) or just_closed:
+                self._run_task(f"quotes:{market}", real_time_service.refresh_prices, symbols)
+                self._last_quotes[market] = now
+
+            if self._is_due(self._last_history.get(market), now, self.history_interval, market_open) or just_closed:
+                self._run_task(f"history:{market}", real_time_service.refresh_historical_data,
+                               symbols, self.history_periods)
+                self._last_history[market] = now
+
+        if self._last_fx is None or now - self._last_fx >= self.fx_interval:
+            self._run_task("fx", currency_service.refresh_rates, FX_REFRESH_PAIRS)
+            self._last_fx = now
+
+        self.run_count += 1
+
+    def status(self) -> Dict[str, Any]:
+        """Refresher state for monitoring"""
+        wall_now = self.clock()
+        return {
+            "running": self.is_running(),
+            "run_count": self.run_count,
+            "error_count": self.error_count,
+            "markets_open": {market: is_market_open(market, wall_now) for market in MARKET_SESSIONS},
+            "last_run": dict(self.last_run),
+            "intervals": {
+                "quotes": self.quote_interval,
+                "fx": self.fx_interval,
+                "history": self.history_interval
+            }
+        }
+
+    def _run(self):
+        """Refresh loop"""
+        while not self._stop_event.is_set():
+            try:
+                self.run_pending()
+            except Exception as e:
+                self.error_count += 1
+                print(f"Error in market data refresh: {e}")
+            self._stop_event.wait(self.tick_seconds)
+
+    def _group_symbols(self) -> Dict[str, List[str]]:
+        """Group the tracked symbols by market"""
+        grouped = {}
+        for symbol in self.symbols_provider():
+            grouped.setdefault(market_for_symbol(symbol), []).append(symbol)
+        return grouped
+
+    def _is_due(self, last_run: Optional[float], now: float, interval: float, market_open: bool) -> bool:
+        """A task is due if it never ran, or its market is open and the interval has elapsed"""
+        if last_run is None:
+            return True
+        return market_open and now - last_run >= interval
+
+    def _run_task(self, name: str, task: Callable, *args):
+        """Run one refresh task, recording its completion time or failure"""
+        try:
+            task(*args)
+            self.last_run[name] = datetime.now().isoformat()
+        except Exception as e:
+            self.error_count += 1
+            print(f"Error refreshing {name}: {e}")
+
+
+# Global instance
+market_data_refresher = MarketDataRefresher(
+    symbols_provider=get_tracked_symbols,
+    quote_interval=config.MARKET_REFRESH_INTERVAL_SECONDS,
+    fx_interval=config.FX_REFRESH_INTERVAL_SECONDS,
+    history_interval=config.HISTORY_REFRESH_INTERVAL_SECONDS,
+    history_periods=config.HISTORY_REFRESH_PERIODS
+)
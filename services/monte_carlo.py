@@ -0,0 +1,294 @@
+import os
+import re
+import threading
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+import config
+from services import simulation_worker
+from services.risk_engine import risk_engine
+from services.tracing import span
+from services.value_at_risk import inr_exposures
+
+METHODS = ("gbm", "bootstrap")
+
+# Query phrases that ask for a forward simulation
+SIMULATION_PHRASES = ("what if", "what happens", "simulate", "simulation", "monte carlo", "worst case")
+
+# Query words that make a simulation question about a buy or a sell rather than the portfolio as held
+BUY_PATTERN = r"\b(buy|buying|invest|investing|add|adding)\b"
+SELL_PATTERN = r"\b(sell|selling|trim|trimming|reduce|reducing|exit|exiting)\b"
+
+
+class MonteCarloSimulator:
+    """Forward simulation of portfolio value over daily steps.
+
+    Paths are split into batches that run on a process pool. The model (drift,
+    Cholesky factor or historical log returns, INR positions) and the outputs
+    (recorded values, max drawdowns) are shared memory blocks, so tasks carry
+    only names and a batch number; each batch draws from its own child of one
+    SeedSequence, which makes a run reproducible whatever the worker count.
+    """
+
+    def __init__(self, paths: int = 100000, horizon_days: int = 252, batch_size: int = 5000,
+                 workers: Optional[int] = None, seed: int = 42, band_every: int = 21,
+                 percentiles: Sequence[float] = (5, 25, 50, 75, 95), tolerance: float = 0.002):
+        self.paths = paths
+        self.horizon_days = horizon_days
+        self.batch_size = batch_size
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.seed = seed
+        self.band_every = band_every
+        self.percentiles = tuple(percentiles)
+        self.tolerance = tolerance
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def simulate(self, symbols: Sequence[str], values: Sequence[float], countries: Sequence[str],
+                 **options) -> Optional[Dict[str, Any]]:
+        """Final simulation result (see stream for options); None if no holding has history"""
+        result = None
+        for result in self.stream(symbols, values, countries, **options):
+            pass
+        return result
+
+    def stream(self, symbols: Sequence[str], values: Sequence[float], countries: Sequence[str],
+               paths: Optional[int] = None, horizon_days: Optional[int] = None, method: str = "gbm",
+               initial_shock: float = 0.0, volatility_scale: float = 1.0,
+               stop_when_converged: bool = False) -> Iterator[Dict[str, Any]]:
+        """Percentile bands over the paths finished so far, after every batch; the last item is final.
+
+        initial_shock is an immediate fractional move of every holding (-0.2 for a
+        20% fall) and volatility_scale multiplies daily volatility. With
+        stop_when_converged, remaining batches are cancelled once the bands move
+        less than tolerance (relative) between updates.
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown simulation method: {method}")
+        paths = paths or self.paths
+        steps = horizon_days or self.horizon_days
+
+        model = self._model(symbols, values, countries, method, initial_shock, volatility_scale)
+        if model is None:
+            return
+        record_steps = np.unique(np.append(np.arange(self.band_every, steps + 1, self.band_every), steps))
+        model["record_steps"] = record_steps
+
+        blocks = []
+        batches = None
+        try:
+            specs = {}
+            for key, array in model.items():
+                if isinstance(array, np.ndarray):
+                    block, specs[key] = simulation_worker.share(array)
+                    blocks.append(block)
+            values_block, specs["values"] = simulation_worker.allocate((paths, len(record_steps)), "f8")
+            drawdown_block, specs["drawdowns"] = simulation_worker.allocate((paths,), "f8")
+            blocks += [values_block, drawdown_block]
+            path_values = np.ndarray((paths, len(record_steps)), dtype="f8", buffer=values_block.buf)
+            drawdowns = np.ndarray((paths,), dtype="f8", buffer=drawdown_block.buf)
+
+            tasks = [{
+                "blocks": specs,
+                "start": start,
+                "stop": min(start + self.batch_size, paths),
+                "batch": batch,
+                "entropy": self.seed,
+                "steps": steps,
+                "method": method,
+                "initial_value": model["initial_value"]
+            } for batch, start in enumerate(range(0, paths, self.batch_size))]
+
+            done = np.zeros(paths, dtype=bool)
+            previous = None
+            batches = self._run(tasks)
+            with span("simulation.run"):
+                for start, stop in batches:
+                    done[start:stop] = True
+                    bands = self._bands(path_values[done], record_steps)
+                    converged = previous is not None and _relative_change(previous, bands) < self.tolerance
+                    previous = bands
+                    finished = done.all() or (converged and stop_when_converged)
+                    if finished:
+                        yield self._summary(path_values[done], drawdowns[done], bands, model, method,
+                                            initial_shock, volatility_scale, converged)
+                        return
+                    yield {"paths_completed": int(done.sum()), "converged": converged, "final": False,
+                           "bands": bands}
+        finally:
+            # Workers must be done with the blocks before they are unlinked
+            if batches is not None:
+                batches.close()
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+    def _run(self, tasks: List[Dict[str, Any]]) -> Iterator[Tuple[int, int]]:
+        """(start, stop) of each batch as it completes; in-process when there is one worker"""
+        if self.workers <= 1 or len(tasks) == 1:
+            for task in tasks:
+                yield simulation_worker.simulate_batch(task)
+            return
+
+        futures = {self._get_executor().submit(simulation_worker.simulate_batch, task) for task in tasks}
+        try:
+            while futures:
+                finished, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield future.result()
+        finally:
+            # Early stop (or an error): drop batches that have not started
+            for future in futures:
+                future.cancel()
+            wait(futures)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Shared process pool, started on first use (spawned, so no server threads are forked).
+
+        Spawned workers re-import the __main__ module: serve with the uvicorn CLI
+        (uvicorn main:app, which python main.py hands off to), not a script that
+        builds the app at import time.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def _model(self, symbols: Sequence[str], values: Sequence[float], countries: Sequence[str], method: str,
+               initial_shock: float, volatility_scale: float) -> Optional[Dict[str, Any]]:
+        """Factor model arrays from the risk engine's returns window and shrunk covariance"""
+        exposures, _ = inr_exposures(symbols, values, countries)
+        if not exposures:
+            return None
+        fx_symbol = config.VAR_FX_SYMBOL
+        foreign = any(currency == "USD" for currency, _ in exposures.values())
+        wanted = list(exposures) + ([fx_symbol] if foreign and fx_symbol else [])
+
+        found, returns, covariance = risk_engine.returns_and_covariance(wanted)
+        assets = [symbol for symbol in found if symbol in exposures]
+        if not assets or len(returns) < 2:
+            return None
+
+        fx_column = found.index(fx_symbol) if fx_symbol in found else -1
+        log_returns = np.log1p(returns)
+        mean = log_returns.mean(axis=0)
+        positions = np.array([exposures[symbol][1] for symbol in assets])
+
+        # Holding log value = own factor (+ FX factor for USD holdings)
+        selection = np.zeros((len(found), len(assets)))
+        for column, symbol in enumerate(assets):
+            selection[found.index(symbol), column] = 1.0
+            if fx_column >= 0 and exposures[symbol][0] == "USD":
+                selection[fx_column, column] = 1.0
+
+        model = {
+            "positions": positions * (1 + initial_shock),
+            "selection": selection,
+            "initial_value": float(positions.sum()),
+            "symbols": assets
+        }
+        if method == "bootstrap":
+            # Whole historical days keep the cross-sectional correlation; scale moves about the mean
+            model["history"] = mean + volatility_scale * (log_returns - mean)
+            model["drift"] = mean
+        else:
+            scaled = covariance * volatility_scale ** 2
+            model["factor"] = np.linalg.cholesky(scaled + np.eye(len(found)) * 1e-12).astype(np.float32)
+            # GBM: log drift is the arithmetic mean less half the variance
+            model["drift"] = returns.mean(axis=0) - 0.5 * np.diag(scaled)
+        return model
+
+    def _bands(self, path_values: np.ndarray, record_steps: np.ndarray) -> Dict[str, List[float]]:
+        """Percentile bands of portfolio value at each recorded step"""
+        quantiles = np.percentile(path_values, self.percentiles, axis=0)
+        bands = {f"p{percentile:g}": [float(value) for value in row] for percentile, row in zip(self.percentiles, quantiles)}
+        bands["days"] = [int(step) for step in record_steps]
+        return bands
+
+    def _summary(self, path_values: np.ndarray, drawdowns: np.ndarray, bands: Dict[str, List[float]],
+                 model: Dict[str, Any], method: str, initial_shock: float, volatility_scale: float,
+                 converged: bool) -> Dict[str, Any]:
+        """Final result: bands plus terminal value and drawdown statistics"""
+        initial_value = model["initial_value"]
+        terminal = path_values[:, -1]
+        returns = terminal / initial_value - 1
+        worst = np.sort(returns)[:max(1, len(returns) // 20)]
+        return {
+            "final": True,
+            "converged": converged,
+            "paths_completed": len(terminal),
+            "method": method,
+            "initial_shock": initial_shock,
+            "volatility_scale": volatility_scale,
+            "currency": "INR",
+            "initial_value": initial_value,
+            "horizon_days": bands["days"][-1],
+            "bands": bands,
+            "expected_value": float(terminal.mean()),
+            "median_return": float(np.median(returns)),
+            "probability_of_loss": float((returns < 0).mean()),
+            "expected_shortfall_5": float(worst.mean()),
+            "median_max_drawdown": float(np.median(drawdowns)),
+            "probability_drawdown_over_20": float((drawdowns > 0.2).mean()),
+            "symbols": len(model["symbols"])
+        }
+
+
+def is_simulation_query(query: str) -> bool:
+    """Whether a chat query asks how the portfolio would fare going forward"""
+    query = query.lower()
+    return any(phrase in query for phrase in SIMULATION_PHRASES)
+
+
+def is_trade_query(query: str) -> bool:
+    """Whether a chat query is about buying or selling (advice) rather than holding (risk)"""
+    return is_sell_query(query) or re.search(BUY_PATTERN, query.lower()) is not None
+
+
+def is_sell_query(query: str) -> bool:
+    """Whether a chat query is about selling, trimming or exiting a position"""
+    return re.search(SELL_PATTERN, query.lower()) is not None
+
+
+def parse_scenario(query: str) -> Dict[str, float]:
+    """Simulation options from a 'what happens if ...' query (initial_shock, volatility_scale)"""
+    query = query.lower()
+    options = {}
+    move = re.search(r"\b(fall|falls|drop|drops|crash|crashes|decline|declines|down|lose|loses|rise|rises|rally|"
+                     r"rallies|gain|gains|up|jump|jumps)\b\D{0,20}?(\d+(?:\.\d+)?)\s*(?:%|percent)", query)
+    if move:
+        size = float(move.group(2)) / 100
+        options["initial_shock"] = size if move.group(1).startswith(("rise", "rall", "gain", "up", "jump")) else -size
+    if re.search(r"volatility (doubles|double|spikes|spike)", query):
+        options["volatility_scale"] = 2.0
+    elif re.search(r"volatility (halves|halve|drops|falls)", query):
+        options["volatility_scale"] = 0.5
+    return options
+
+
+def _relative_change(previous: Dict[str, List[float]], current: Dict[str, List[float]]) -> float:
+    """Largest relative move of any band value between two updates"""
+    before = np.array([values for key, values in previous.items() if key != "days"])
+    after = np.array([values for key, values in current.items() if key != "days"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.abs(after - before) / np.abs(before)
+    return float(np.nanmax(change)) if change.size else 0.0
+
+
+# Global instance
+monte_carlo = MonteCarloSimulator(
+    paths=config.MONTE_CARLO_PATHS,
+    horizon_days=config.MONTE_CARLO_HORIZON_DAYS,
+    batch_size=config.MONTE_CARLO_BATCH_SIZE,
+    workers=config.MONTE_CARLO_WORKERS or None,
+    seed=config.MONTE_CARLO_SEED
+)
@@ -0,0 +1,219 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# A loader receives the keys to fetch and returns the values it could resolve
+Loader = Callable[[List[str]], Dict[str, Any]]
+
+
+class _CacheEntry:
+    """Cached value with the monotonic time it was stored"""
+
+    __slots__ = ("value", "stored_at")
+
+    def __init__(self, value: Any, stored_at: float):
+        self.value = value
+        self.stored_at = stored_at
+
+
+class QuoteCache:
+    """Thread-safe TTL cache with stale-while-revalidate, request coalescing and LRU eviction.
+
+    Entries younger than ttl are served as hits. Entries older than ttl but younger
+    than ttl + stale_ttl are served immediately while one background refresh runs.
+    Anything older is a miss. Concurrent misses for the same key share one load.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0.0, max_size: int = 1024,
+                 refresh_workers: int = 2, name: str = "cache"):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self.name = name
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=refresh_workers,
+                                                    thread_name_prefix=f"{name}-refresh")
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "loads": 0,
+            "refreshes": 0,
+            "load_errors": 0,
+            "evictions": 0
+        }
+
+    def get(self, key: str, loader: Loader) -> Optional[Any]:
+        """Return the value for key, loading it on a miss; None if it could not be loaded"""
+        return self.get_many([key], loader).get(key)
+
+    def get_many(self, keys: Iterable[str], loader: Loader) -> Dict[str, Any]:
+        """Return values for keys; all missing keys are resolved with a single coalesced load"""
+        results = {}
+        missing = []
+        stale = []
+        seen = set()
+        now = time.monotonic()
+
+        with self._lock:
+            for key in keys:
+                if key in seen:
+                    continue
+                seen.add(key)
+                entry = self._entries.get(key)
+                if entry is None:
+                    missing.append(key)
+                    continue
+                age = now - entry.stored_at
+                if age < self.ttl:
+                    self._counters["hits"] += 1
+                elif age < self.ttl + self.stale_ttl:
+                    self._counters["stale_hits"] += 1
+                    if key not in self._inflight:
+                        stale.append(key)
+                else:
+                    missing.append(key)
+                    continue
+                self._entries.move_to_end(key)
+                results[key] = entry.value
+
+            if stale:
+                self._counters["refreshes"] += 1
+                self._claim(stale)
+
+        if stale:
+            self._refresh_executor.submit(self._load, stale, loader)
+
+        if missing:
+            results.update(self._load_missing(missing, loader))
+
+        return results
+
+    def refresh(self, keys: Iterable[str], loader: Loader) -> Dict[str, Any]:
+        """Reload keys regardless of age (used by background warmers); keys already in flight are skipped"""
+        with self._lock:
+            owned = [key for key in dict.fromkeys(keys) if key not in self._inflight]
+            if owned:
+                self._counters["refreshes"] += 1
+                self._claim(owned)
+
+        if not owned:
+            return {}
+        return self._load(owned, loader)
+
+    def peek_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Return the last stored values for the known keys regardless of age, without loading"""
+        with self._lock:
+            return {key: self._entries[key].value for key in keys if key in self._entries}
+
+    def get_if_fresh(self, key: str) -> Optional[Any]:
+        """Return the value for key only if it is within ttl; counts as a hit or a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.stored_at < self.ttl:
+                self._counters["hits"] += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            self._counters["misses"] += 1
+            return None
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Return the last stored value for key regardless of age, without touching counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.value if entry is not None else None
+
+    def set(self, key: str, value: Any):
+        """Store a value directly"""
+        with self._lock:
+            self._store(key, value, time.monotonic())
+
+    def invalidate(self, key: Optional[str] = None):
+        """Drop one key, or every key when none is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and size for monitoring"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["size"] = len(self._entries)
+            stats["inflight"] = len(self._inflight)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 4) if lookups else 0.0
+        stats["name"] = self.name
+        stats["max_size"] = self.max_size
+        stats["ttl_seconds"] = self.ttl
+        stats["stale_ttl_seconds"] = self.stale_ttl
+        return stats
+
+    def _load_missing(self, keys: List[str], loader: Loader) -> Dict[str, Any]:
+        """Load keys not in the cache, joining loads already in flight for any of them"""
+        with self._lock:
+            self._counters["misses"] += len(keys)
+            waiting = {key: self._inflight[key] for key in keys if key in self._inflight}
+            self._counters["coalesced"] += len(waiting)
+            owned = [key for key in keys if key not in waiting]
+            self._claim(owned)
+
+        results = {}
+        if owned:
+            results.update(self._load(owned, loader))
+
+        for key, future in waiting.items():
+            try:
+                value = future.result()
+            except Exception:
+                value = None
+            if value is not None:
+                results[key] = value
+
+        return results
+
+    def _claim(self, keys: List[str]):
+        """Register in-flight futures for keys this caller will load (lock must be held)"""
+        for key in keys:
+            self._inflight[key] = Future()
+
+    def _load(self, keys: List[str], loader: Loader) -> Dict[str, Any]:
+        """Run the loader for claimed keys, store the results and release waiters"""
+        with self._lock:
+            self._counters["loads"] += 1
+
+        values = {}
+        try:
+            values = loader(keys) or {}
+        except Exception as e:
+            with self._lock:
+                self._counters["load_errors"] += 1
+            print(f"Error loading {len(keys)} keys into {self.name}: {e}")
+
+        results = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                value = values.get(key)
+                if value is not None:
+                    self._store(key, value, now)
+                    results[key] = value
+                future = self._inflight.pop(key, None)
+                if future is not None:
+                    future.set_result(value)
+
+        return results
+
+    def _store(self, key: str, value: Any, stored_at: float):
+        """Insert or replace an entry and evict least recently used entries (lock must be held)"""
+        self._entries[key] = _CacheEntry(value, stored_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
@@ -0,0 +1,114 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import yfinance as yf
+import pandas as pd
+from services.rate_limiter import TokenBucket
+
+
+class QuoteProvider(ABC):
+    """Source of latest prices for a batch of symbols"""
+
+    @abstractmethod
+    def get_quotes(self, symbols: List[str]) -> Dict[str, float]:
+        """Return the latest price for each symbol that could be priced"""
+        pass
+
+
+class YFinanceQuoteProvider(QuoteProvider):
+    """Yahoo Finance quotes fetched with one bulk download per batch"""
+
+    def __init__(self, max_workers: int = 4, timeout: int = 10, rate_limiter: Optional[TokenBucket] = None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        # Per-symbol gap-fill calls are requests too; each one takes a token
+        self.rate_limiter = rate_limiter
+
+    def get_quotes(self, symbols: List[str]) -> Dict[str, float]:
+        """Fetch all symbols in a single round-trip, then fill gaps with a bounded parallel pool"""
+        if not symbols:
+            return {}
+
+        quotes = {}
+        try:
+            history = yf.download(
+                tickers=symbols,
+                period="5d",
+                interval="1d",
+                group_by="ticker",
+                auto_adjust=False,
+                threads=True,
+                progress=False,
+                timeout=self.timeout
+            )
+            quotes.update(self._last_closes(history, symbols))
+        except Exception as e:
+            print(f"Error in bulk quote download: {e}")
+
+        missing = self._allowed([symbol for symbol in symbols if symbol not in quotes])
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(missing))) as executor:
+                for symbol, price in zip(missing, executor.map(self._get_single_quote, missing)):
+                    if price and price > 0:
+                        quotes[symbol] = price
+
+        return quotes
+
+    def _allowed(self, missing: List[str]) -> List[str]:
+        """Gap-fill symbols the rate limit allows; the rest wait for the next load"""
+        if self.rate_limiter is None:
+            return missing
+        allowed = []
+        for symbol in missing:
+            if not self.rate_limiter.try_acquire():
+                print(f"Rate limit reached, skipping gap-fill for {len(missing) - len(allowed)} symbols")
+                break
+            allowed.append(symbol)
+        return allowed
+
+    def _last_closes(self, history: pd.DataFrame, symbols: List[str]) -> Dict[str, float]:
+        """Extract the last valid close per symbol from a bulk download"""
+        quotes = {}
+        if history is None or history.empty:
+            return quotes
+
+        for symbol in symbols:
+            try:
+                if isinstance(history.columns, pd.MultiIndex):
+                    if symbol not in history.columns.get_level_values(0):
+                        continue
+                    closes = history[symbol]["Close"]
+                else:
+                    closes = history["Close"]
+                closes = closes.dropna()
+                if not closes.empty and closes.iloc[-1] > 0:
+                    quotes[symbol] = float(closes.iloc[-1])
+            except Exception as e:
+                print(f"Error reading bulk quote for {symbol}: {e}")
+
+        return quotes
+
+    def _get_single_quote(self, symbol: str) -> float:
+        """Fetch one symbol's price directly"""
+        try:
+            return yf.Ticker(symbol).info.get('regularMarketPrice') or 0
+        except Exception as e:
+            print(f"Error fetching price for {symbol}: {e}")
+            return 0
+
+
+class StaticQuoteProvider(QuoteProvider):
+    """Local quote provider backed by a fixed price map (tests, demos, offline runs)"""
+
+    def __init__(self, prices: Dict[str, float]):
+        self.prices = dict(prices)
+        self.request_count = 0
+
+    def get_quotes(self, symbols: List[str]) -> Dict[str, float]:
+        """Return the configured prices for the requested symbols"""
+        self.request_count += 1
+        return {symbol: self.prices[symbol] for symbol in symbols if symbol in self.prices}
+
+    def set_price(self, symbol: str, price: float):
+        """Update a configured price"""
+        self.prices[symbol] = price
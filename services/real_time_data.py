@@ -2,91 +2,128 @@ import yfinance as yf
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+from datetime import date
 import asyncio
 import aiohttp
 import json
+import time
+import config
+from services.quote_provider import QuoteProvider, YFinanceQuoteProvider
+from services.rate_limiter import TokenBucket
+from services.quote_cache import QuoteCache
+from services.streaming_indicators import StreamingIndicators
+from services.bar_store import bar_store, period_start
+from services.tracing import traced
+
+# Fallback prices used when live quotes are unavailable (demo values)
+FALLBACK_PRICES = {
+    "RELIANCE.NS": 2650,
+    "TCS.NS": 3191,
+    "INFY.NS": 1500,
+    "HDFCBANK.NS": 1736,
+    "ICICIBANK.NS": 1020,
+    "AAPL": 175.0,
+    "MSFT": 350.0,
+    "GOOGL": 140.0,
+    "AMZN": 145.0,
+    "TSLA": 220.0,
+    "SUZLON.NS": 47.5,
+    "JPASSOCIAT.NS": 62.0,
+    "YESBANK.NS": 15.0
+}
 
 class RealTimeDataService:
     """Service for fetching real-time financial data"""
     
-    def __init__(self):
-        self.cache = {}
-        self.cache_duration = 600  # 10 minutes (increased for demo)
-        self.last_update = {}
-        self.request_count = 0
-        self.last_request_time = datetime.now()
-        self.max_requests_per_minute = 10  # Conservative limit
+    def __init__(self, provider: Optional[QuoteProvider] = None):
+        self.quote_cache = QuoteCache(
+            ttl=config.QUOTE_CACHE_TTL_SECONDS,
+            stale_ttl=config.QUOTE_CACHE_STALE_SECONDS,
+            max_size=config.QUOTE_CACHE_MAX_SIZE,
+            name="quotes"
+        )
+        self.history_cache = QuoteCache(
+            ttl=config.HISTORY_CACHE_TTL_SECONDS,
+            stale_ttl=config.HISTORY_CACHE_STALE_SECONDS,
+            max_size=config.QUOTE_CACHE_MAX_SIZE,
+            name="history"
+        )
+        # Persistent daily bars under the history cache; only missing date ranges are downloaded
+        self.bar_store = bar_store if config.BAR_STORE_ENABLED else None
+        # Indicator states seeded from history and advanced by every quote load
+        self.streaming_indicators = StreamingIndicators()
+        # Set while a background refresher keeps the caches warm; reads then never block on the network
+        self.serve_from_memory = False
+        self.max_requests_per_minute = config.QUOTE_REQUESTS_PER_MINUTE
+        self.rate_limiter = TokenBucket.per_minute(self.max_requests_per_minute)
+        self.provider = provider or YFinanceQuoteProvider(rate_limiter=self.rate_limiter)
+    
+    def set_provider(self, provider: QuoteProvider):
+        """Swap the quote provider (e.g. a StaticQuoteProvider for tests or offline runs)"""
+        self.provider = provider
+        self.quote_cache.invalidate()
     
     def get_live_prices(self, symbols: List[str]) -> Dict[str, float]:
-        """Fetch real-time stock prices with rate limiting"""
-        current_time = datetime.now()
+        """Fetch real-time stock prices with caching, batching and rate limiting"""
+        if self.serve_from_memory:
+            cached_prices = self.quote_cache.peek_many(symbols)
+            unknown = [symbol for symbol in symbols if symbol not in cached_prices]
+            if unknown:
+                cached_prices.update(self.quote_cache.get_many(unknown, self._load_quotes))
+        else:
+            cached_prices = self.quote_cache.get_many(symbols, self._load_quotes)
+        
         live_prices = {}
+        for symbol in symbols:
+            price = cached_prices.get(symbol)
+            # Fallback to last known price or default
+            live_prices[symbol] = price if price is not None else self._get_fallback_price(symbol)
         
-        # Enhanced rate limiting and caching
-        import time
+        return live_prices
+    
+    @traced("quotes.fetch")
+    def _load_quotes(self, symbols: List[str]) -> Dict[str, float]:
+        """Quote cache loader: one batched provider round-trip, if the rate limit allows it"""
+        if not self.rate_limiter.try_acquire():
+            return {}
         
-        for i, symbol in enumerate(symbols):
-            # Check cache first (priority for demo)
-            if (symbol in self.cache and 
-                symbol in self.last_update and 
-                (current_time - self.last_update[symbol]).seconds < self.cache_duration):
-                live_prices[symbol] = self.cache[symbol]
-                continue
-            
-            # Rate limiting check
-            time_since_last = (current_time - self.last_request_time).seconds
-            if time_since_last < 60:  # Within last minute
-                if self.request_count >= self.max_requests_per_minute:
-                    # Use fallback data to avoid rate limiting
-                    live_prices[symbol] = self._get_fallback_price(symbol)
-                    continue
-            else:
-                # Reset counter for new minute
-                self.request_count = 0
-                self.last_request_time = current_time
-            
-            try:
-                # Add delay between requests (1 second for demo)
-                if i > 0:
-                    time.sleep(1.0)
-                
-                self.request_count += 1
-                ticker = yf.Ticker(symbol)
-                price = ticker.info.get('regularMarketPrice')
-                if price and price > 0:
-                    live_prices[symbol] = price
-                    self.cache[symbol] = price
-                    self.last_update[symbol] = current_time
-                else:
-                    # Fallback to cached price or default
-                    live_prices[symbol] = self._get_fallback_price(symbol)
-            except Exception as e:
-                print(f"Error fetching price for {symbol}: {e}")
-                # Use fallback prices for demo
-                live_prices[symbol] = self._get_fallback_price(symbol)
+        try:
+            quotes = self.provider.get_quotes(symbols)
+        except Exception as e:
+            print(f"Error fetching prices for {len(symbols)} symbols: {e}")
+            return {}
         
-        return live_prices
+        prices = {symbol: price for symbol, price in quotes.items() if price and price > 0}
+        self.streaming_indicators.update_many(prices)
+        return prices
+    
+    def refresh_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Reload quotes for symbols regardless of cache age (background refresh)"""
+        return self.quote_cache.refresh(symbols, self._load_quotes)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Quote cache counters for monitoring"""
+        return self.quote_cache.stats()
+    
+    def get_history_cache_stats(self) -> Dict[str, Any]:
+        """Historical data cache and bar store counters for monitoring"""
+        stats = self.history_cache.stats()
+        if self.bar_store is not None:
+            stats["bar_store"] = self.bar_store.stats()
+        return stats
+    
+    async def aget_live_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Async variant of get_live_prices; the blocking fetch runs in a worker thread"""
+        return await asyncio.to_thread(self.get_live_prices, symbols)
     
     def _get_fallback_price(self, symbol: str) -> float:
         """Get fallback price for demo purposes"""
-        fallback_prices = {
-            "RELIANCE.NS": 2650,
-            "TCS.NS": 3191,
-            "INFY.NS": 1500,
-            "HDFCBANK.NS": 1736,
-            "ICICIBANK.NS": 1020,
-            "AAPL": 175.0,
-            "MSFT": 350.0,
-            "GOOGL": 140.0,
-            "AMZN": 145.0,
-            "TSLA": 220.0,
-            "SUZLON.NS": 47.5,
-            "JPASSOCIAT.NS": 62.0,
-            "YESBANK.NS": 15.0
-        }
-        return fallback_prices.get(symbol, self.cache.get(symbol, 0))
+        last_price = self.quote_cache.peek(symbol)
+        if last_price is not None:
+            return last_price
+        return FALLBACK_PRICES.get(symbol, 0)
     
+    @traced("yfinance.stock_info")
     def get_stock_info(self, symbol: str) -> Dict[str, Any]:
         """Get comprehensive stock information"""
         try:
@@ -128,59 +165,161 @@ class RealTimeDataService:
                 'exchange': 'Unknown'
             }
     
+    async def aget_stock_info(self, symbol: str) -> Dict[str, Any]:
+        """Async variant of get_stock_info"""
+        return await asyncio.to_thread(self.get_stock_info, symbol)
+    
     def get_historical_data(self, symbol: str, period: str = "1y") -> pd.DataFrame:
-        """Get historical price data"""
+        """Get historical price data (cached; callers must not modify the returned frame)"""
+        cache_key = f"{symbol}|{period}"
+        if self.serve_from_memory:
+            hist = self.history_cache.peek(cache_key)
+            if hist is not None:
+                return hist
+        
+        hist = self.history_cache.get(cache_key, self._load_history)
+        return hist if hist is not None else pd.DataFrame()
+    
+    def get_historical_data_many(self, symbols: List[str], period: str = "1y") -> Dict[str, pd.DataFrame]:
+        """Cached historical data for several symbols; misses are fetched in one coalesced load"""
+        keys = [f"{symbol}|{period}" for symbol in symbols]
+        if self.serve_from_memory:
+            history = self.history_cache.peek_many(keys)
+            missing = [key for key in keys if key not in history]
+            if missing:
+                history.update(self.history_cache.get_many(missing, self._load_history))
+        else:
+            history = self.history_cache.get_many(keys, self._load_history)
+        return {key.split("|", 1)[0]: hist for key, hist in history.items()}
+    
+    def refresh_historical_data(self, symbols: List[str], periods: List[str]):
+        """Reload historical data for symbols and periods regardless of cache age (background refresh)"""
+        keys = [f"{symbol}|{period}" for symbol in symbols for period in periods]
+        self.history_cache.refresh(keys, self._load_history)
+    
+    @traced("history.fetch")
+    def _load_history(self, cache_keys: List[str]) -> Dict[str, pd.DataFrame]:
+        """History cache loader; keys are 'symbol|period'"""
+        history = {}
+        for cache_key in cache_keys:
+            symbol, period = cache_key.split("|", 1)
+            try:
+                start = period_start(period)
+                if self.bar_store is None or start is None:
+                    hist = self._download_history(symbol, period=period)
+                else:
+                    self._sync_bars(symbol, start)
+                    hist = self.bar_store.read_frame(symbol, start)
+                if hist is not None and not hist.empty:
+                    history[cache_key] = hist
+            except Exception as e:
+                print(f"Error fetching historical data for {symbol}: {e}")
+        return history
+    
+    def _sync_bars(self, symbol: str, start: date):
+        """Download only the date ranges the bar store is missing for a symbol since start.
+
+        Coverage grows whenever a download succeeds, even without bars (before the
+        listing date, weekday holidays); a failed download leaves the range uncovered
+        so it is retried later.
+        """
+        coverage = self.bar_store.coverage(symbol)
+        if coverage is None:
+            hist = self._download_history(symbol, start=start)
+            if hist is not None:
+                self.bar_store.append(symbol, hist, covered_from=start)
+            return
+        
+        if start < coverage["start"]:
+            if np.busday_count(start, coverage["start"]) == 0:
+                # Only weekend days are missing: known to have no bars, so nothing to download
+                self.bar_store.append(symbol, pd.DataFrame(), covered_from=start, checked=False)
+            else:
+                hist = self._download_history(symbol, start=start, end=coverage["start"])
+                if hist is not None:
+                    self.bar_store.append(symbol, hist, covered_from=start, checked=False)
+        
+        if time.time() - coverage["checked_at"] >= config.BAR_STORE_REFRESH_SECONDS:
+            # Re-download from the last stored bar so a partial bar for today gets replaced
+            hist = self._download_history(symbol, start=coverage["end"] or coverage["start"])
+            if hist is not None:
+                self.bar_store.append(symbol, hist)
+    
+    @traced("history.download")
+    def _download_history(self, symbol: str, period: Optional[str] = None, start: Optional[date] = None,
+                          end: Optional[date] = None) -> Optional[pd.DataFrame]:
+        """Daily bars from Yahoo Finance for a period or a date range (end exclusive).
+
+        Returns None on failure and an empty frame when Yahoo answered without bars.
+        """
         try:
             ticker = yf.Ticker(symbol)
-            hist = ticker.history(period=period)
+            if period is not None:
+                hist = ticker.history(period=period)
+            else:
+                hist = ticker.history(start=start.isoformat(), end=end.isoformat() if end else None)
+            if hist.empty and not ticker.history_metadata:
+                # yfinance reports failures as an empty frame too; only a chart response carries metadata
+                return None
             return hist
         except Exception as e:
-            print(f"Error fetching historical data for {symbol}: {e}")
-            return pd.DataFrame()
+            print(f"Error downloading historical data for {symbol}: {e}")
+            return None
+    
+    async def aget_historical_data(self, symbol: str, period: str = "1y") -> pd.DataFrame:
+        """Async variant of get_historical_data"""
+        return await asyncio.to_thread(self.get_historical_data, symbol, period)
+    
+    def get_indicators_many(self, symbols: List[str]) -> Dict[str, Dict[str, Optional[float]]]:
+        """Latest streaming indicator values per symbol (symbols without history are omitted)"""
+        history = self.get_historical_data_many(symbols, config.INDICATOR_HISTORY_PERIOD)
+        behind = {symbol: hist for symbol, hist in history.items()
+                  if hist is not None and not hist.empty and self.streaming_indicators.is_behind(symbol, hist)}
+        if behind:
+            # Seed from history once (or again after missed days); live quotes keep it current from here
+            self.streaming_indicators.seed_many(behind)
+            # The cached quotes may be newer than the last bars
+            for symbol, price in self.quote_cache.peek_many(list(behind)).items():
+                if price:
+                    self.streaming_indicators.update(symbol, price)
+        
+        indicators = {}
+        for symbol in symbols:
+            values = self.streaming_indicators.latest(symbol)
+            if values:
+                indicators[symbol] = values
+        return indicators
     
     def calculate_technical_indicators(self, symbol: str) -> Dict[str, float]:
         """Calculate technical indicators"""
         try:
-            hist = self.get_historical_data(symbol, "6mo")
-            if hist.empty:
+            values = self.get_indicators_many([symbol]).get(symbol)
+            if values is None:
                 return {}
             
-            # Calculate RSI
-            delta = hist['Close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-            
-            # Calculate MACD
-            exp1 = hist['Close'].ewm(span=12).mean()
-            exp2 = hist['Close'].ewm(span=26).mean()
-            macd = exp1 - exp2
-            signal = macd.ewm(span=9).mean()
-            
-            # Calculate Moving Averages
-            sma_20 = hist['Close'].rolling(window=20).mean()
-            sma_50 = hist['Close'].rolling(window=50).mean()
-            
             return {
-                'rsi': rsi.iloc[-1] if not rsi.empty else 50,
-                'macd': macd.iloc[-1] if not macd.empty else 0,
-                'macd_signal': signal.iloc[-1] if not signal.empty else 0,
-                'sma_20': sma_20.iloc[-1] if not sma_20.empty else 0,
-                'sma_50': sma_50.iloc[-1] if not sma_50.empty else 0,
-                'current_price': hist['Close'].iloc[-1] if not hist.empty else 0,
-                'volume': hist['Volume'].iloc[-1] if not hist.empty else 0
+                'rsi': values['rsi'],
+                'macd': values['macd'],
+                'macd_signal': values['macd_signal'],
+                'sma_20': values['sma_20'],
+                'sma_50': values['sma_50'],
+                'current_price': values['close'],
+                'volume': values['volume']
             }
         except Exception as e:
             print(f"Error calculating indicators for {symbol}: {e}")
             return {}
     
+    def get_indicator_stats(self) -> Dict[str, Any]:
+        """Streaming indicator counters for monitoring"""
+        return self.streaming_indicators.stats()
+    
     def get_market_sentiment(self, symbol: str) -> Dict[str, Any]:
         """Get market sentiment data with fallback"""
         try:
             # Use cached data if available to avoid rate limiting
-            if symbol in self.cache:
-                current_price = self.cache[symbol]
+            current_price = self.quote_cache.peek(symbol)
+            if current_price is not None:
                 # Simulate price change for demo
                 import random
                 price_change = random.uniform(-5, 5)
@@ -199,23 +338,7 @@ class RealTimeDataService:
                 }
             
             # Fallback to simulated data
-            fallback_prices = {
-                "RELIANCE.NS": 2650,
-                "TCS.NS": 3191,
-                "INFY.NS": 1500,
-                "HDFCBANK.NS": 1736,
-                "ICICIBANK.NS": 1020,
-                "AAPL": 175.0,
-                "MSFT": 350.0,
-                "GOOGL": 140.0,
-                "AMZN": 145.0,
-                "TSLA": 220.0,
-                "SUZLON.NS": 47.5,
-                "JPASSOCIAT.NS": 62.0,
-                "YESBANK.NS": 15.0
-            }
-            
-            current_price = fallback_prices.get(symbol, 100)
+            current_price = FALLBACK_PRICES.get(symbol, 100)
             import random
             price_change = random.uniform(-5, 5)
             price_change_pct = (price_change / current_price * 100) if current_price > 0 else 0
@@ -246,5 +369,6 @@ class RealTimeDataService:
                 'sentiment': 'neutral'
             }
 
+
 # Global instance
 real_time_service = RealTimeDataService()
@@ -0,0 +1,95 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional
+import config
+from services.monte_carlo import BUY_PATTERN, SELL_PATTERN, parse_scenario
+from services.quote_cache import QuoteCache
+from services.stress_test import match_scenarios
+
+# Query words that ask whether to keep a position as it is
+HOLD_PATTERN = r"\b(hold|keep)\b"
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase a query and collapse punctuation and whitespace"""
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+
+def extract_entities(query: str, stocks: Iterable[Dict[str, Any]]) -> List[str]:
+    """Held symbols the query mentions by ticker (without exchange suffix) or by first name word"""
+    words = set(normalize_query(query).split())
+    entities = []
+    for stock in stocks:
+        ticker = stock["symbol"].split(".")[0].lower()
+        name_words = (stock.get("name") or "").lower().split()
+        if ticker in words or (name_words and name_words[0] in words):
+            entities.append(stock["symbol"])
+    return sorted(entities)
+
+
+def extract_actions(query: str) -> List[str]:
+    """Trade actions, event scenarios and simulated moves a query asks about ("buy", "oil_shock", "initial_shock=-0.2")"""
+    query = query.lower()
+    actions = [action for action, pattern in (("buy", BUY_PATTERN), ("sell", SELL_PATTERN), ("hold", HOLD_PATTERN))
+               if re.search(pattern, query)]
+    actions += sorted(match_scenarios(query))
+    actions += [f"{name}={value:g}" for name, value in sorted(parse_scenario(query).items())]
+    return actions
+
+
+class ResponseCache:
+    """Cache of /chat results keyed on the query, language and portfolio snapshot version.
+
+    The exact key uses the normalized query text. The optional semantic key uses the
+    primary intent, the holdings the query mentions and the actions it asks about
+    (buy or sell, scenario, simulated move), so rephrasings of the same question
+    share an entry but "should I buy TCS" and "should I sell TCS" do not. Both keys embed the snapshot version, so a price
+    or holdings change makes older entries unreachable.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 512, semantic: bool = False):
+        self.semantic = semantic
+        self.semantic_hits = 0
+        self.cache = QuoteCache(ttl=ttl, max_size=max_size, refresh_workers=1, name="responses")
+
+    def exact_key(self, query: str, language: str, portfolio_id: Optional[str], version: int) -> str:
+        """Key for the normalized query text"""
+        return f"q|{normalize_query(query)}|{language}|{portfolio_id or ''}|{version}"
+
+    def semantic_key(self, intent: Dict[str, Any], entities: List[str], actions: List[str], language: str,
+                     portfolio_id: Optional[str], version: int) -> str:
+        """Key for the primary intent, mentioned holdings and requested actions"""
+        return f"i|{intent['primary']}|{','.join(entities)}|{','.join(actions)}|{language}|{portfolio_id or ''}|{version}"
+
+    def get(self, keys: List[str]) -> Optional[Dict[str, Any]]:
+        """First fresh result among keys (exact key first)"""
+        for position, key in enumerate(keys):
+            result = self.cache.get_if_fresh(key)
+            if result is not None:
+                if position > 0:
+                    self.semantic_hits += 1
+                return result
+        return None
+
+    def set(self, keys: List[str], result: Dict[str, Any]):
+        """Store a result under every key"""
+        for key in keys:
+            self.cache.set(key, result)
+
+    def invalidate(self):
+        """Drop every cached response"""
+        self.cache.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache counters plus semantic hit count"""
+        stats = self.cache.stats()
+        stats["semantic_enabled"] = self.semantic
+        stats["semantic_hits"] = self.semantic_hits
+        return stats
+
+
+# Global instance
+response_cache = ResponseCache(
+    ttl=config.RESPONSE_CACHE_TTL_SECONDS,
+    max_size=config.RESPONSE_CACHE_MAX_SIZE,
+    semantic=config.RESPONSE_CACHE_SEMANTIC
+)
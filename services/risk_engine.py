@@ -0,0 +1,345 @@
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+import config
+from services.indicator_engine import align_history
+from services.real_time_data import real_time_service
+from services.tracing import traced
+
+# Trading days per year, for annualizing daily volatility
+TRADING_DAYS = 252
+
+
+class CovarianceState:
+    """Rolling window of daily returns with running sums and cross-products.
+
+    The sample covariance of any subset of symbols is read straight from the
+    running sums, so a new trading day costs one rank-one update (O(N^2)) and a
+    newly held symbol one column (O(T*N)) instead of a full O(T*N^2) rebuild.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.dates = np.empty(0, dtype="datetime64[D]")
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.returns = np.empty((0, 0))
+        self.sums = np.empty(0)
+        self.cross = np.empty((0, 0))
+        self.shrinkage = 0.0
+        self.rows_since_rebuild = 0
+        self.full_builds = 0
+        self.incremental_updates = 0
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def rebuild(self, dates: np.ndarray, symbols: List[str], returns: np.ndarray):
+        """Recompute the running sums (and shrinkage intensity) from scratch"""
+        dates, returns = dates[-self.window:], returns[-self.window:]
+        self.dates = dates.copy()
+        self.symbols = list(symbols)
+        self.index = {symbol: column for column, symbol in enumerate(self.symbols)}
+        self.returns = np.array(returns, dtype=np.float64)
+        self.sums = self.returns.sum(axis=0)
+        self.cross = self.returns.T @ self.returns
+        self.shrinkage = _ledoit_wolf_shrinkage(self.returns)
+        self.rows_since_rebuild = 0
+        self.full_builds += 1
+
+    def add_symbols(self, symbols: List[str], returns: np.ndarray):
+        """Append columns for new symbols (returns aligned to self.dates)"""
+        count = len(self.symbols)
+        returns = np.asarray(returns, dtype=np.float64)
+        self.returns = np.hstack([self.returns, returns])
+        new_cross = returns.T @ self.returns
+        cross = np.empty((count + len(symbols),) * 2)
+        cross[:count, :count] = self.cross
+        cross[count:, :] = new_cross
+        cross[:count, count:] = new_cross[:, :count].T
+        self.cross = cross
+        self.sums = np.concatenate([self.sums, returns.sum(axis=0)])
+        for symbol in symbols:
+            self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        self.incremental_updates += 1
+
+    def push(self, date: np.datetime64, row: np.ndarray):
+        """Add one day of returns (all symbols); the same date revises the last row"""
+        row = np.asarray(row, dtype=np.float64)
+        if len(self.dates) and date == self.dates[-1]:
+            previous = self.returns[-1]
+            self.sums += row - previous
+            self.cross += np.outer(row, row) - np.outer(previous, previous)
+            self.returns[-1] = row
+        else:
+            self.sums += row
+            self.cross += np.outer(row, row)
+            self.dates = np.append(self.dates, date)
+            self.returns = np.vstack([self.returns, row])
+            if len(self.dates) > self.window:
+                oldest = self.returns[0]
+                self.sums -= oldest
+                self.cross -= np.outer(oldest, oldest)
+                self.dates = self.dates[1:]
+                self.returns = self.returns[1:]
+            self.rows_since_rebuild += 1
+        self.incremental_updates += 1
+
+    def covariance(self, symbols: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        """Shrunk daily covariance of the known symbols among symbols (unknown ones are dropped)"""
+        found = [symbol for symbol in symbols if symbol in self.index]
+        observations = len(self.dates)
+        if not found or observations < 2:
+            return [], np.empty((0, 0))
+        columns = np.fromiter((self.index[symbol] for symbol in found), dtype=np.intp, count=len(found))
+        mean = self.sums[columns] / observations
+        sample = (self.cross[np.ix_(columns, columns)] - observations * np.outer(mean, mean)) / (observations - 1)
+        # Shrink towards a scaled identity with the universe's Ledoit-Wolf intensity
+        target = np.trace(sample) / len(found)
+        covariance = (1 - self.shrinkage) * sample
+        covariance[np.diag_indices_from(covariance)] += self.shrinkage * target
+        return found, covariance
+
+
+class RiskEngine:
+    """Portfolio risk from a shrinkage covariance of daily returns.
+
+    One CovarianceState is shared by every portfolio: its universe is the union of
+    symbols analyzed so far, and it advances incrementally as new bars arrive.
+    Volatility, beta, marginal and component risk contributions and correlation
+    clusters all come from the same covariance matrix in one pass.
+    """
+
+    def __init__(self, period: str = "1y", window: int = TRADING_DAYS, benchmark: Optional[str] = None,
+                 correlation_threshold: float = 0.7, max_symbols: int = 5000, rebuild_fraction: float = 0.25):
+        self.period = period
+        self.window = window
+        self.benchmark = benchmark
+        self.correlation_threshold = correlation_threshold
+        self.max_symbols = max_symbols
+        self.rebuild_fraction = rebuild_fraction
+        self.state = CovarianceState(window)
+        self._history: Dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    @traced("risk.analyze")
+    def analyze(self, symbols: Sequence[str], values: Sequence[float], top: int = 5) -> Optional[Dict[str, Any]]:
+        """Risk metrics for holdings (symbol, current value); None if no symbol has enough history"""
+        weights = _weights(symbols, values)
+        if not weights:
+            return None
+
+        wanted = list(weights) + ([self.benchmark] if self.benchmark and self.benchmark not in weights else [])
+        with self._lock:
+            self._sync(wanted)
+            found, covariance = self.state.covariance(wanted)
+        if not found:
+            return None
+
+        benchmark_variance = None
+        benchmark_covariance = None
+        if self.benchmark in found:
+            column = found.index(self.benchmark)
+            benchmark_variance = covariance[column, column]
+            benchmark_covariance = covariance[column]
+            if self.benchmark not in weights:
+                keep = [index for index in range(len(found)) if index != column]
+                found = [found[index] for index in keep]
+                covariance = covariance[np.ix_(keep, keep)]
+                benchmark_covariance = benchmark_covariance[keep]
+        if not found:
+            return None
+
+        return self.metrics(found, np.array([weights[symbol] for symbol in found]), covariance,
+                            benchmark_covariance, benchmark_variance, total_weight=sum(weights.values()), top=top)
+
+    def metrics(self, symbols: List[str], weights: np.ndarray, covariance: np.ndarray,
+                benchmark_covariance: Optional[np.ndarray] = None, benchmark_variance: Optional[float] = None,
+                total_weight: Optional[float] = None, top: int = 5) -> Dict[str, Any]:
+        """Volatility, beta, risk contributions and clusters for weights over a daily covariance"""
+        covered = float(weights.sum())
+        weights = weights / covered
+        sigma_w = covariance @ weights
+        variance = float(weights @ sigma_w)
+        daily_volatility = np.sqrt(max(variance, 0.0))
+        annualizer = np.sqrt(TRADING_DAYS)
+
+        # Euler decomposition: component contributions sum to the portfolio volatility
+        with np.errstate(divide="ignore", invalid="ignore"):
+            marginal = sigma_w / daily_volatility if daily_volatility > 0 else np.zeros_like(sigma_w)
+        component = weights * marginal
+        share = component / daily_volatility if daily_volatility > 0 else np.zeros_like(component)
+        order = np.argsort(-component)[:top]
+        contributions = [{
+            "symbol": symbols[index],
+            "weight": float(weights[index]),
+            "marginal_risk": float(marginal[index] * annualizer),
+            "component_risk": float(component[index] * annualizer),
+            "risk_share": float(share[index])
+        } for index in order]
+
+        beta = None
+        if benchmark_covariance is not None and benchmark_variance:
+            beta = float(weights @ benchmark_covariance / benchmark_variance)
+
+        return {
+            "volatility": float(daily_volatility * annualizer),
+            "beta": beta,
+            "benchmark": self.benchmark if beta is not None else None,
+            "risk_contributions": contributions,
+            "correlation_clusters": self._clusters(symbols, weights, covariance),
+            "coverage": covered / total_weight if total_weight else 1.0,
+            "symbols": len(symbols),
+            "observations": len(self.state)
+        }
+
+    def returns_and_covariance(self, symbols: Sequence[str]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Symbols with history, their daily returns window (dates x symbols) and shrunk covariance"""
+        symbols = list(dict.fromkeys(symbols))
+        with self._lock:
+            self._sync(symbols)
+            found, covariance = self.state.covariance(symbols)
+            columns = [self.state.index[symbol] for symbol in found]
+            returns = self.state.returns[:, columns]
+        return found, returns, covariance
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Covariance state size and update counters"""
+        with self._lock:
+            state = self.state
+            return {
+                "symbols": len(state.symbols),
+                "observations": len(state),
+                "last_date": str(state.dates[-1]) if len(state) else None,
+                "shrinkage": round(state.shrinkage, 4),
+                "full_builds": state.full_builds,
+                "incremental_updates": state.incremental_updates
+            }
+
+    def _sync(self, symbols: List[str]):
+        """Bring the covariance state up to date with cached history for symbols"""
+        state = self.state
+        universe = list(dict.fromkeys(state.symbols + symbols))
+        if len(universe) > self.max_symbols:
+            # Drop symbols nobody has asked for recently rather than growing without bound
+            universe = list(dict.fromkeys(symbols))
+            state.symbols = []
+
+        history = real_time_service.get_historical_data_many(universe, self.period)
+        if history.keys() == self._history.keys() and all(frame is self._history[symbol] for symbol, frame in history.items()):
+            # Same cached frames as the last sync: the state is already current
+            return
+        self._history = history
+
+        dates, returns_frame = self._returns(history)
+        if returns_frame.empty:
+            return
+        if not len(state) or not state.symbols:
+            state.rebuild(dates, list(returns_frame.columns), returns_frame.to_numpy())
+            return
+
+        new_rows = dates > state.dates[-1]
+        if new_rows.sum() + state.rows_since_rebuild > self.window * self.rebuild_fraction:
+            state.rebuild(dates, list(returns_frame.columns), returns_frame.to_numpy())
+            return
+
+        new_symbols = [symbol for symbol in returns_frame.columns if symbol not in state.index]
+        if new_symbols:
+            # New columns over the dates the state already holds (0 where not traded)
+            aligned = returns_frame[new_symbols].reindex(pd.DatetimeIndex(state.dates)).fillna(0.0)
+            state.add_symbols(new_symbols, aligned.to_numpy())
+
+        # Revise the latest known day (intraday bar) and append anything newer
+        columns = returns_frame.reindex(columns=state.symbols, fill_value=0.0)
+        rows = np.flatnonzero(dates >= state.dates[-1])
+        values = columns.to_numpy()
+        for row in rows:
+            if dates[row] == state.dates[-1] and np.array_equal(values[row], state.returns[-1]):
+                continue
+            state.push(dates[row], values[row])
+
+    def _returns(self, history: Dict[str, pd.DataFrame]) -> Tuple[np.ndarray, pd.DataFrame]:
+        """Daily simple returns (dates x symbols) from price history; gaps count as flat days"""
+        close, _ = align_history(history)
+        if len(close) < 2:
+            return np.empty(0, dtype="datetime64[D]"), pd.DataFrame()
+        prices = close.to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = prices[1:] / prices[:-1] - 1
+        returns[~np.isfinite(returns)] = 0.0
+        index = close.index[1:]
+        return index.to_numpy().astype("datetime64[D]"), pd.DataFrame(returns, index=index, columns=close.columns)
+
+    def _clusters(self, symbols: List[str], weights: np.ndarray, covariance: np.ndarray) -> List[Dict[str, Any]]:
+        """Groups of holdings linked by pairwise correlation above the threshold, largest weight first"""
+        deviations = np.sqrt(np.diag(covariance))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correlation = covariance / np.outer(deviations, deviations)
+        linked = np.argwhere(np.triu(np.nan_to_num(correlation) > self.correlation_threshold, k=1))
+        if not len(linked):
+            return []
+
+        # Connected components by union-find over the linked pairs
+        parent = np.arange(len(symbols))
+
+        def find(node: int) -> int:
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for left, right in linked:
+            parent[find(left)] = find(right)
+
+        groups: Dict[int, List[int]] = {}
+        for node in np.unique(linked):
+            groups.setdefault(find(node), []).append(node)
+
+        clusters = []
+        for members in groups.values():
+            block = correlation[np.ix_(members, members)]
+            clusters.append({
+                "symbols": [symbols[member] for member in members],
+                "weight": float(weights[members].sum()),
+                "average_correlation": float(block[np.triu_indices(len(members), k=1)].mean())
+            })
+        return sorted(clusters, key=lambda cluster: -cluster["weight"])
+
+
+def _weights(symbols: Sequence[str], values: Sequence[float]) -> Dict[str, float]:
+    """Positive holding values per symbol (repeated symbols are summed)"""
+    weights: Dict[str, float] = {}
+    for symbol, value in zip(symbols, values):
+        if value and value > 0:
+            weights[symbol] = weights.get(symbol, 0.0) + float(value)
+    return weights
+
+
+def _ledoit_wolf_shrinkage(returns: np.ndarray) -> float:
+    """Ledoit-Wolf (2004) intensity for shrinking the sample covariance towards a scaled identity"""
+    observations, count = returns.shape
+    if observations < 2 or count == 0:
+        return 0.0
+    centered = returns - returns.mean(axis=0)
+    sample = centered.T @ centered / observations
+    target = np.trace(sample) / count
+    dispersion = (np.sum(sample * sample) - 2 * target * np.trace(sample) + target * target * count) / count
+    if dispersion <= 0:
+        return 0.0
+    # Sum over days of ||x x' - S||^2, expanded so no per-day N x N matrix is built
+    norms = np.einsum("ij,ij->i", centered, centered)
+    projected = np.einsum("ij,ij->i", centered @ sample, centered)
+    noise = (np.sum(norms * norms) - 2 * np.sum(projected) + observations * np.sum(sample * sample)) / count
+    noise /= observations * observations
+    return float(min(noise, dispersion) / dispersion)
+
+
+# Global instance
+risk_engine = RiskEngine(
+    period=config.RISK_HISTORY_PERIOD,
+    window=config.RISK_WINDOW_DAYS,
+    benchmark=config.RISK_BENCHMARK_SYMBOL or None,
+    correlation_threshold=config.RISK_CORRELATION_THRESHOLD
+)
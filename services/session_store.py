@@ -0,0 +1,173 @@
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import config
+
+
+class SessionStore(ABC):
+    """Chat session storage with expiry"""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Session data, or None if unknown or expired"""
+        pass
+
+    @abstractmethod
+    def set(self, session_id: str, data: Dict[str, Any]):
+        """Store session data and restart its expiry"""
+        pass
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        """Forget a session"""
+        pass
+
+    @abstractmethod
+    def sweep(self) -> int:
+        """Remove expired sessions and return how many were removed"""
+        pass
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Backend, size and expiry settings for monitoring"""
+        pass
+
+
+class MemorySessionStore(SessionStore):
+    """In-process LRU store with TTL; sessions are private to one worker"""
+
+    def __init__(self, ttl: float, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._sessions.get(session_id)
+            if item is None:
+                return None
+            expires_at, data = item
+            if expires_at <= time.monotonic():
+                del self._sessions[session_id]
+                self.expirations += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            return dict(data)
+
+    def set(self, session_id: str, data: Dict[str, Any]):
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic() + self.ttl, dict(data))
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_size:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def sweep(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            expired = [session_id for session_id, (expires_at, _) in self._sessions.items() if expires_at <= now]
+            for session_id in expired:
+                del self._sessions[session_id]
+            self.expirations += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "size": len(self._sessions),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite (WAL) store shared by every worker process on the host"""
+
+    def __init__(self, db_path: str, ttl: float):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.expirations = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        with self._lock:
+            if db_path != ":memory:":
+                self._connection.execute("PRAGMA journal_mode=WAL")
+                self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at);
+            """)
+            self._connection.commit()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data FROM sessions WHERE session_id = ? AND expires_at > ?",
+                (session_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, session_id: str, data: Dict[str, Any]):
+        payload = json.dumps(data, default=str)
+        with self._lock, self._connection:
+            self._connection.execute(
+                """INSERT INTO sessions (session_id, data, expires_at) VALUES (?, ?, ?)
+                   ON CONFLICT (session_id) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at""",
+                (session_id, payload, time.time() + self.ttl)
+            )
+
+    def delete(self, session_id: str):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def sweep(self) -> int:
+        with self._lock, self._connection:
+            cursor = self._connection.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+        self.expirations += cursor.rowcount
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = self._connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {
+            "backend": "sqlite",
+            "size": size,
+            "db_path": self.db_path,
+            "ttl_seconds": self.ttl,
+            "expirations": self.expirations
+        }
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._connection.close()
+
+
+def create_session_store(backend: str) -> SessionStore:
+    """Session store for the configured backend ("memory" or "sqlite")"""
+    if backend == "sqlite":
+        return SQLiteSessionStore(config.SESSION_DB_PATH, config.SESSION_TTL_SECONDS)
+    if backend != "memory":
+        print(f"Unknown session store backend '{backend}', using memory")
+    return MemorySessionStore(config.SESSION_TTL_SECONDS, config.SESSION_MAX_SIZE)
+
+
+# Global instance
+session_store = create_session_store(config.SESSION_STORE_BACKEND)
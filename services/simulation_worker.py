@@ -0,0 +1,96 @@
+"""Process-pool side of the Monte Carlo simulator.
+
+Kept free of application imports so spawned workers start with NumPy only
+(they also re-import __main__, which is why the app runs under the uvicorn CLI).
+Model inputs and path outputs live in shared memory: tasks carry block names,
+shapes and a seed, never arrays.
+"""
+
+from multiprocessing import shared_memory
+from typing import Any, Dict, Tuple
+import numpy as np
+
+# Block spec: (shared memory name, shape, dtype string)
+BlockSpec = Tuple[str, Tuple[int, ...], str]
+
+
+def share(array: np.ndarray) -> Tuple[shared_memory.SharedMemory, BlockSpec]:
+    """Copy array into a new shared memory block"""
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def allocate(shape: Tuple[int, ...], dtype: str) -> Tuple[shared_memory.SharedMemory, BlockSpec]:
+    """New zeroed shared memory block for an output array"""
+    size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    np.ndarray(shape, dtype=dtype, buffer=block.buf).fill(0)
+    return block, (block.name, tuple(shape), np.dtype(dtype).str)
+
+
+def attach(spec: BlockSpec) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    """Open an existing block as an array (the caller closes the block)"""
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def simulate_batch(task: Dict[str, Any]) -> Tuple[int, int]:
+    """Simulate paths [start, stop) and write their recorded values and max drawdowns.
+
+    Each column of the model is one risk factor (holding or FX rate). Daily
+    factor log returns are either correlated normals (drift + z @ factor') or
+    whole historical days drawn with replacement. Normal draws are antithetic
+    (paths come in z / -z pairs), which halves the random numbers needed and
+    reduces variance. Holding log values in INR are factor paths times the
+    selection matrix (own factor, plus the FX factor for foreign holdings).
+    """
+    blocks = []
+    try:
+        arrays = {}
+        for key, spec in task["blocks"].items():
+            block, array = attach(spec)
+            blocks.append(block)
+            arrays[key] = array
+
+        start, stop = task["start"], task["stop"]
+        count = stop - start
+        rng = np.random.default_rng(np.random.SeedSequence(task["entropy"], spawn_key=(task["batch"],)))
+        positions = arrays["positions"]
+        selection = arrays["selection"]
+        record_steps = {int(step): index for index, step in enumerate(arrays["record_steps"])}
+
+        log_prices = np.zeros((count, selection.shape[0]))
+        holding_logs = np.empty((count, selection.shape[1]))
+        half = (count + 1) // 2
+        # Drawdowns are measured from the pre-shock value, so an initial shock counts
+        peak = np.full(count, task["initial_value"])
+        max_drawdown = np.zeros(count)
+
+        for step in range(1, task["steps"] + 1):
+            if task["method"] == "bootstrap":
+                days = rng.integers(0, arrays["history"].shape[0], size=count)
+                log_prices += arrays["history"][days]
+            else:
+                shocks = rng.standard_normal((half, selection.shape[0]), dtype=np.float32) @ arrays["factor"].T
+                log_prices += arrays["drift"]
+                log_prices[:half] += shocks
+                log_prices[half:] -= shocks[:count - half]
+
+            np.matmul(log_prices, selection, out=holding_logs)
+            np.exp(holding_logs, out=holding_logs)
+            value = holding_logs @ positions
+
+            np.maximum(peak, value, out=peak)
+            np.maximum(max_drawdown, 1 - value / peak, out=max_drawdown)
+            column = record_steps.get(step)
+            if column is not None:
+                arrays["values"][start:stop, column] = value
+
+        arrays["drawdowns"][start:stop] = max_drawdown
+        return start, stop
+    finally:
+        for block in blocks:
+            block.close()
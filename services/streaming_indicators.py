@@ -0,0 +1,479 @@
+import json
+import math
+import threading
+from datetime import datetime, time, timezone
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+from services.indicator_engine import IndicatorEngine, stack_bars
+
+# Checkpoint format version; bump when the state layout changes
+CHECKPOINT_VERSION = 1
+
+# Exchange timezone and session open by symbol suffix; other symbols trade in New York
+EXCHANGE_SESSIONS = {
+    ".NS": ("Asia/Kolkata", time(9, 15)),
+    ".BO": ("Asia/Kolkata", time(9, 15))
+}
+DEFAULT_SESSION = ("America/New_York", time(9, 30))
+
+
+class EMAState:
+    """Exponential moving average (pandas adjust=False) whose latest input can be revised"""
+
+    __slots__ = ("alpha", "min_periods", "previous", "value", "count")
+
+    def __init__(self, alpha: float, min_periods: int = 1):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.previous = None
+        self.value = None
+        self.count = 0
+
+    def push(self, x: float):
+        """Add a new observation"""
+        self.previous = self.value
+        self.count += 1
+        self.revise(x)
+
+    def revise(self, x: float):
+        """Replace the latest observation (same bar, newer price)"""
+        self.value = x if self.previous is None else self.previous + self.alpha * (x - self.previous)
+
+    def load(self, tail: np.ndarray, count: int):
+        """Take the last two averages of a batch run over count observations (NaN where none)"""
+        self.previous, self.value = (None if math.isnan(x) else float(x) for x in tail)
+        self.count = count
+
+    @property
+    def current(self) -> Optional[float]:
+        """Average once min_periods observations were seen, else None"""
+        return self.value if self.count >= self.min_periods else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"alpha": self.alpha, "min_periods": self.min_periods, "previous": self.previous,
+                "value": self.value, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "EMAState":
+        state = cls(data["alpha"], data["min_periods"])
+        state.previous, state.value, state.count = data["previous"], data["value"], data["count"]
+        return state
+
+
+class RollingWindow:
+    """Fixed-size ring buffer with running sum and sum of squares.
+
+    Mean and std are O(1) per update; min/max scan the window, which is bounded by
+    its size and not by the length of the history. The running sums are recomputed
+    exactly each time the buffer wraps, so floating-point drift cannot accumulate.
+    """
+
+    __slots__ = ("size", "values", "position", "count", "total", "total_squares")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = [0.0] * size
+        self.position = 0
+        self.count = 0
+        self.total = 0.0
+        self.total_squares = 0.0
+
+    def push(self, x: float):
+        """Add a new observation, evicting the oldest once full"""
+        if self.count == self.size:
+            old = self.values[self.position]
+            self.total -= old
+            self.total_squares -= old * old
+        else:
+            self.count += 1
+        self.values[self.position] = x
+        self.total += x
+        self.total_squares += x * x
+        self.position = (self.position + 1) % self.size
+        if self.position == 0:
+            self.total = math.fsum(self.values)
+            self.total_squares = math.fsum(value * value for value in self.values)
+
+    def load(self, values: np.ndarray):
+        """Fill the window with the trailing observations of a series (oldest first)"""
+        values = [float(x) for x in values[-self.size:]]
+        self.values = values + [0.0] * (self.size - len(values))
+        self.count = len(values)
+        self.position = self.count % self.size
+        self.total = math.fsum(values)
+        self.total_squares = math.fsum(value * value for value in values)
+
+    def revise(self, x: float):
+        """Replace the latest observation"""
+        if self.count == 0:
+            self.push(x)
+            return
+        last = (self.position - 1) % self.size
+        old = self.values[last]
+        self.values[last] = x
+        self.total += x - old
+        self.total_squares += x * x - old * old
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.size
+
+    def mean(self, partial: bool = False) -> Optional[float]:
+        """Window mean; None until the window is full unless partial"""
+        if self.count == 0 or (not partial and not self.full):
+            return None
+        return self.total / self.count
+
+    def std(self) -> Optional[float]:
+        """Population std of a full window"""
+        if not self.full:
+            return None
+        mean = self.total / self.size
+        return math.sqrt(max(self.total_squares / self.size - mean * mean, 0.0))
+
+    def minimum(self) -> Optional[float]:
+        return min(self._filled()) if self.count else None
+
+    def maximum(self) -> Optional[float]:
+        return max(self._filled()) if self.count else None
+
+    def _filled(self) -> List[float]:
+        return self.values if self.full else self.values[:self.count]
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Running sums are stored as-is so a restored window continues bit-for-bit
+        return {"size": self.size, "values": list(self.values), "position": self.position, "count": self.count,
+                "total": self.total, "total_squares": self.total_squares}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RollingWindow":
+        window = cls(data["size"])
+        window.values = list(data["values"])
+        window.position, window.count = data["position"], data["count"]
+        window.total, window.total_squares = data["total"], data["total_squares"]
+        return window
+
+
+class WilderRSI:
+    """RSI with Wilder smoothing (EMA of gains and losses with alpha = 1/period)"""
+
+    __slots__ = ("gain", "loss", "previous_close", "last_close")
+
+    def __init__(self, period: int = 14):
+        self.gain = EMAState(1 / period, period)
+        self.loss = EMAState(1 / period, period)
+        self.previous_close = None
+        self.last_close = None
+
+    def push(self, close: float):
+        """Add a new bar's close"""
+        self.previous_close = self.last_close
+        self.last_close = close
+        if self.previous_close is not None:
+            delta = close - self.previous_close
+            self.gain.push(max(delta, 0.0))
+            self.loss.push(max(-delta, 0.0))
+
+    def revise(self, close: float):
+        """Replace the latest bar's close"""
+        self.last_close = close
+        if self.previous_close is not None:
+            delta = close - self.previous_close
+            self.gain.revise(max(delta, 0.0))
+            self.loss.revise(max(-delta, 0.0))
+
+    @property
+    def current(self) -> Optional[float]:
+        gain, loss = self.gain.current, self.loss.current
+        if gain is None or loss is None:
+            return None
+        if loss == 0:
+            return 50.0 if gain == 0 else 100.0
+        return 100 - 100 / (1 + gain / loss)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"gain": self.gain.to_dict(), "loss": self.loss.to_dict(),
+                "previous_close": self.previous_close, "last_close": self.last_close}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "WilderRSI":
+        rsi = cls()
+        rsi.gain, rsi.loss = EMAState.from_dict(data["gain"]), EMAState.from_dict(data["loss"])
+        rsi.previous_close, rsi.last_close = data["previous_close"], data["last_close"]
+        return rsi
+
+
+class IndicatorState:
+    """Streaming indicators for one symbol.
+
+    Each price either starts a new bar or, when it carries the current bar's key,
+    revises it (intraday ticks on a daily bar). Both are O(1), and the values match
+    IndicatorEngine over the same bars.
+    """
+
+    def __init__(self, rsi_period: int = 14, macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9,
+                 bollinger_window: int = 20, bollinger_width: float = 2.0, level_window: int = 20):
+        self.bollinger_width = bollinger_width
+        self.bar = None
+        self.close = None
+        self.volume = None
+        self.rsi = WilderRSI(rsi_period)
+        self.ema_fast = EMAState(2 / (macd_fast + 1))
+        self.ema_slow = EMAState(2 / (macd_slow + 1))
+        self.macd_signal = EMAState(2 / (macd_signal + 1))
+        self.ema_20 = EMAState(2 / 21)
+        self.sma_20 = RollingWindow(20)
+        self.sma_50 = RollingWindow(50)
+        self.bollinger = RollingWindow(bollinger_window)
+        self.levels = RollingWindow(level_window)
+        self.volumes = RollingWindow(20)
+
+    def update(self, price: float, volume: Optional[float] = None, bar: Optional[str] = None):
+        """Apply a price for bar (a new bar unless bar equals the current one)"""
+        revise = bar is not None and bar == self.bar
+        self.bar = bar
+        self.close = price
+
+        for state in (self.rsi, self.ema_fast, self.ema_slow, self.ema_20,
+                      self.sma_20, self.sma_50, self.bollinger, self.levels):
+            _apply(state, price, revise)
+        _apply(self.macd_signal, self.ema_fast.value - self.ema_slow.value, revise)
+
+        if volume is not None:
+            self.volume = volume
+            _apply(self.volumes, volume, revise)
+
+    @classmethod
+    def from_bars(cls, closes: np.ndarray, volumes: Optional[np.ndarray], bar: str,
+                  tails: Dict[str, np.ndarray]) -> "IndicatorState":
+        """State after a symbol's bars, from IndicatorEngine.recursive_tails instead of a replay"""
+        state = cls()
+        state.bar = bar
+        state.close = float(closes[-1])
+        for name in ("ema_fast", "ema_slow", "macd_signal", "ema_20"):
+            getattr(state, name).load(tails[name], len(closes))
+        state.rsi.gain.load(tails["rsi_gain"], len(closes) - 1)
+        state.rsi.loss.load(tails["rsi_loss"], len(closes) - 1)
+        state.rsi.previous_close = float(closes[-2]) if len(closes) > 1 else None
+        state.rsi.last_close = state.close
+        for window in (state.sma_20, state.sma_50, state.bollinger, state.levels):
+            window.load(closes)
+        if volumes is not None:
+            state.volume = float(volumes[-1])
+            state.volumes.load(volumes)
+        return state
+
+    def values(self) -> Dict[str, Optional[float]]:
+        """Latest indicator values (None where the history is too short), keyed like IndicatorEngine.latest"""
+        if self.close is None:
+            return {}
+
+        macd = self.ema_fast.value - self.ema_slow.value
+        bb_middle, bb_std = self.bollinger.mean(), self.bollinger.std()
+        bb_upper = bb_lower = bb_percent_b = None
+        if bb_middle is not None:
+            bb_upper = bb_middle + self.bollinger_width * bb_std
+            bb_lower = bb_middle - self.bollinger_width * bb_std
+            bb_percent_b = (self.close - bb_lower) / (bb_upper - bb_lower) if bb_upper > bb_lower else None
+
+        return {
+            "close": self.close,
+            "rsi": self.rsi.current,
+            "macd": macd,
+            "macd_signal": self.macd_signal.value,
+            "macd_histogram": macd - self.macd_signal.value,
+            "sma_20": self.sma_20.mean(),
+            "sma_50": self.sma_50.mean(),
+            "ema_20": self.ema_20.value,
+            "bb_upper": bb_upper,
+            "bb_middle": bb_middle,
+            "bb_lower": bb_lower,
+            "bb_percent_b": bb_percent_b,
+            "support": self.levels.minimum(),
+            "resistance": self.levels.maximum(),
+            "volume": self.volume,
+            "avg_volume": self.volumes.mean(partial=True)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable checkpoint"""
+        return {
+            "bollinger_width": self.bollinger_width,
+            "bar": self.bar,
+            "close": self.close,
+            "volume": self.volume,
+            "rsi": self.rsi.to_dict(),
+            "emas": {name: getattr(self, name).to_dict() for name in ("ema_fast", "ema_slow", "macd_signal", "ema_20")},
+            "windows": {name: getattr(self, name).to_dict()
+                        for name in ("sma_20", "sma_50", "bollinger", "levels", "volumes")}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "IndicatorState":
+        """Restore a checkpoint written by to_dict"""
+        state = cls(bollinger_width=data["bollinger_width"])
+        state.bar, state.close, state.volume = data["bar"], data["close"], data["volume"]
+        state.rsi = WilderRSI.from_dict(data["rsi"])
+        for name, ema in data["emas"].items():
+            setattr(state, name, EMAState.from_dict(ema))
+        for name, window in data["windows"].items():
+            setattr(state, name, RollingWindow.from_dict(window))
+        return state
+
+
+class StreamingIndicators:
+    """Indicator states per symbol, seeded from daily history and advanced by live prices.
+
+    A symbol is reseeded whenever its history has bars the state never saw, so days
+    missed while the service was down (or after an old checkpoint) are backfilled.
+    """
+
+    def __init__(self):
+        self._states = {}
+        self._lock = threading.Lock()
+        self.engine = IndicatorEngine()
+        self.updates = 0
+
+    def is_seeded(self, symbol: str) -> bool:
+        return symbol in self._states
+
+    def is_behind(self, symbol: str, history: pd.DataFrame) -> bool:
+        """Whether history has bars the symbol's state never saw (not seeded, downtime, an old checkpoint)"""
+        with self._lock:
+            state = self._states.get(symbol)
+            if state is None or state.bar is None:
+                return True
+            return not history.empty and _bar_key(history.index[-1]) > state.bar
+
+    def seed(self, symbol: str, history: pd.DataFrame):
+        """Build a symbol's state from its daily bars"""
+        self.seed_many({symbol: history})
+
+    def seed_many(self, history: Dict[str, pd.DataFrame]):
+        """Build symbols' states from their daily bars.
+
+        The exponential averages come from one vectorized batch run over every
+        symbol (IndicatorEngine.recursive_tails); rolling windows take each
+        symbol's trailing bars. No bar is replayed in Python.
+        """
+        close, volume = stack_bars(history)
+        if close.empty:
+            return
+        tails = self.engine.recursive_tails(close)
+        prices = close.to_numpy(dtype=np.float64)
+        volumes = volume.to_numpy(dtype=np.float64)
+        # Shorter histories are NaN-padded at the top
+        padding = np.isnan(prices).argmin(axis=0)
+
+        states = {}
+        for column, symbol in enumerate(close.columns):
+            frame = history[symbol]
+            start = padding[column]
+            states[symbol] = IndicatorState.from_bars(
+                prices[start:, column], volumes[start:, column] if "Volume" in frame else None,
+                _bar_key(frame.index[-1]), {name: tail[:, column] for name, tail in tails.items()})
+        with self._lock:
+            self._states.update(states)
+
+    def update(self, symbol: str, price: float, volume: Optional[float] = None,
+               bar: Optional[str] = None) -> Optional[Dict[str, Optional[float]]]:
+        """Advance a seeded symbol with a live price (bar defaults to the exchange's session); None if not seeded"""
+        with self._lock:
+            state = self._states.get(symbol)
+            if state is None:
+                return None
+            state.update(price, volume, _live_bar(state, price, bar or session_bar(symbol)))
+            self.updates += 1
+            return state.values()
+
+    def update_many(self, prices: Dict[str, float], bar: Optional[str] = None) -> int:
+        """Advance every seeded symbol in prices; returns how many were updated"""
+        now = datetime.now(timezone.utc)
+        updated = 0
+        with self._lock:
+            for symbol, price in prices.items():
+                state = self._states.get(symbol)
+                if state is not None:
+                    state.update(price, None, _live_bar(state, price, bar or session_bar(symbol, now)))
+                    updated += 1
+            self.updates += updated
+        return updated
+
+    def latest(self, symbol: str) -> Optional[Dict[str, Optional[float]]]:
+        """Latest indicator values for a seeded symbol"""
+        with self._lock:
+            state = self._states.get(symbol)
+            return state.values() if state is not None else None
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """JSON-serializable snapshot of every symbol's state"""
+        with self._lock:
+            return {"version": CHECKPOINT_VERSION,
+                    "states": {symbol: state.to_dict() for symbol, state in self._states.items()}}
+
+    def restore(self, checkpoint: Dict[str, Any]) -> int:
+        """Load states from a checkpoint; returns how many symbols were restored"""
+        if checkpoint.get("version") != CHECKPOINT_VERSION:
+            print(f"Ignoring indicator checkpoint with version {checkpoint.get('version')}")
+            return 0
+        states = {symbol: IndicatorState.from_dict(data) for symbol, data in checkpoint.get("states", {}).items()}
+        with self._lock:
+            self._states.update(states)
+        return len(states)
+
+    def save(self, path: str):
+        """Write a checkpoint file"""
+        with open(path, "w") as f:
+            json.dump(self.checkpoint(), f)
+
+    def load(self, path: str) -> int:
+        """Restore from a checkpoint file; a missing or unreadable file restores nothing"""
+        try:
+            with open(path) as f:
+                return self.restore(json.load(f))
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            print(f"Error loading indicator checkpoint {path}: {e}")
+            return 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"symbols": len(self._states), "updates": self.updates}
+
+
+def _apply(state: Any, value: float, revise: bool):
+    """Revise the latest observation of a state or push a new one"""
+    if revise:
+        state.revise(value)
+    else:
+        state.push(value)
+
+
+def session_bar(symbol: str, now: Optional[datetime] = None) -> Optional[str]:
+    """Daily bar a live price belongs to: the exchange's local date once its session opened on a weekday, else None"""
+    zone, opens_at = next((session for suffix, session in EXCHANGE_SESSIONS.items() if symbol.endswith(suffix)),
+                          DEFAULT_SESSION)
+    local = (now or datetime.now(timezone.utc)).astimezone(ZoneInfo(zone))
+    if local.weekday() >= 5 or local.time() < opens_at:
+        return None
+    return local.date().isoformat()
+
+
+def _live_bar(state: IndicatorState, price: float, bar: Optional[str]) -> Optional[str]:
+    """Bar key to apply a live price with: a new session's bar, or the current one to revise.
+
+    Outside sessions, and while the price is still the last close (the quote on an
+    exchange holiday), the current bar is revised so no flat bar is invented.
+    """
+    if state.bar is None:
+        return bar
+    if bar is None or bar <= state.bar or price == state.close:
+        return state.bar
+    return bar
+
+
+def _bar_key(timestamp: Any) -> str:
+    """Calendar date of a bar in the exchange's local time"""
+    return pd.Timestamp(timestamp).date().isoformat()
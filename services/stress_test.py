@@ -0,0 +1,220 @@
+import re
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from services.currency_service import currency_service
+from services.tracing import traced
+from services.value_at_risk import BASE_CURRENCY, COUNTRY_CURRENCY
+
+# Fractional price move of a sector per +100bp rate shock (assumed sensitivities)
+RATE_SENSITIVITY = {
+    "Banking": 0.01,
+    "Technology": -0.04,
+    "IT": -0.03,
+    "Consumer Discretionary": -0.035,
+    "Automotive": -0.03,
+    "Construction": -0.05,
+    "Energy": -0.02,
+    "Oil & Gas": -0.015
+}
+DEFAULT_RATE_SENSITIVITY = -0.02
+
+# Declarative scenarios: fractional shocks by sector, country and symbol, FX moves
+# (fractional change of the quoted pair) and a rate shock in basis points
+SCENARIOS = {
+    "tech_rally": {
+        "name": "Tech rally on AI breakthrough",
+        "sector": {"Technology": 0.05, "IT": 0.03}
+    },
+    "oil_shock": {
+        "name": "Oil price spike on geopolitical tensions",
+        "sector": {"Oil & Gas": -0.04, "Automotive": -0.03, "Energy": 0.02},
+        "country": {"India": -0.01}
+    },
+    "rate_hike": {
+        "name": "Central bank hikes rates by 50bp",
+        "rates_bps": 50
+    },
+    "rupee_depreciation": {
+        "name": "Rupee weakens 5% against the dollar",
+        "fx": {"USD_INR": 0.05},
+        "sector": {"IT": 0.02}
+    },
+    "india_logistics_disruption": {
+        "name": "Traffic and logistics disruption in India",
+        "country": {"India": -0.005},
+        "symbol": {"RELIANCE.NS": -0.03, "TCS.NS": -0.015, "INFY.NS": -0.015, "HDFCBANK.NS": -0.005}
+    },
+    "us_logistics_disruption": {
+        "name": "Traffic and logistics disruption in the USA",
+        "country": {"USA": -0.005},
+        "symbol": {"AMZN": -0.03, "TSLA": -0.015, "AAPL": -0.015, "MSFT": -0.005}
+    },
+    "global_selloff": {
+        "name": "Global equity sell-off",
+        "country": {"India": -0.12, "USA": -0.15},
+        "fx": {"USD_INR": 0.03}
+    }
+}
+
+# Query phrases that ask how much an event would move the portfolio; they only make a
+# stress query together with a registered scenario ("how much would an oil shock hit me")
+STRESS_PHRASES = ("hit me", "hit my", "how much would", "impact", "affect")
+
+# Query patterns that select a registered scenario
+SCENARIO_PATTERNS = {
+    "tech_rally": r"\b(tech|technology|ai|artificial intelligence)\b",
+    "oil_shock": r"\b(oil|crude|geopolitic\w*)\b",
+    "rate_hike": r"\b(rates?|interest|rbi|fed|repo)\b",
+    "rupee_depreciation": r"\b(rupee|inr|dollar|currency|fx)\b",
+    "global_selloff": r"\b(crash\w*|sell-?off|recession|bear market)\b"
+}
+
+
+class StressTestEngine:
+    """Scenario P&L for a portfolio snapshot.
+
+    Scenarios are compiled into dense shock matrices over the snapshot's sector,
+    country and symbol codes, so any number of scenarios is evaluated together:
+    the scenarios x holdings return matrix comes from a few gathers, and P&L by
+    sector and country from one matrix product each.
+    """
+
+    def __init__(self, scenarios: Optional[Mapping[str, Mapping[str, Any]]] = None):
+        self.scenarios = dict(scenarios or SCENARIOS)
+
+    @traced("stress.run")
+    def run(self, snapshot, scenarios: Optional[Sequence[Any]] = None) -> Dict[str, Dict[str, Any]]:
+        """Impact of each scenario (key into SCENARIOS or an inline scenario dict) on the stock holdings"""
+        specs = self._resolve(scenarios)
+        holdings = snapshot.holdings
+        if not specs or not len(holdings):
+            return {}
+
+        values, foreign = self._inr_values(holdings)
+        returns = self.scenario_returns(holdings, [spec for _, spec in specs], foreign)
+        pnl = returns * values
+
+        sectors = holdings.categories["sector"]
+        countries = holdings.categories["country"]
+        by_sector = pnl @ _one_hot(holdings.codes["sector"], len(sectors))
+        by_country = pnl @ _one_hot(holdings.codes["country"], len(countries))
+        totals = pnl.sum(axis=1)
+        portfolio_value = float(values.sum())
+        symbols = [record["symbol"] for record in holdings.records]
+
+        results = {}
+        for row, (key, spec) in enumerate(specs):
+            order = np.argsort(pnl[row])
+            hit = [index for index in order if pnl[row, index] != 0]
+            results[key] = {
+                "name": spec.get("name", key),
+                "pnl": float(totals[row]),
+                "pnl_percentage": float(totals[row] / portfolio_value * 100) if portfolio_value else 0.0,
+                "by_sector": {sector: float(by_sector[row, code]) for code, sector in enumerate(sectors)
+                              if by_sector[row, code] != 0},
+                "by_country": {country: float(by_country[row, code]) for code, country in enumerate(countries)
+                               if by_country[row, code] != 0},
+                "holdings": [{"symbol": symbols[index], "pnl": float(pnl[row, index]),
+                              "return": float(returns[row, index])} for index in hit],
+                "currency": BASE_CURRENCY
+            }
+        return results
+
+    def scenario_returns(self, holdings, specs: Sequence[Mapping[str, Any]], foreign: np.ndarray) -> np.ndarray:
+        """Scenarios x holdings INR returns: sector + country + symbol + rate moves, compounded with FX"""
+        sector_codes = holdings.codes["sector"]
+        country_codes = holdings.codes["country"]
+        sectors = holdings.categories["sector"]
+        countries = holdings.categories["country"]
+
+        sector_shocks = _shock_matrix(specs, "sector", sectors)
+        country_shocks = _shock_matrix(specs, "country", countries)
+        rates = np.array([spec.get("rates_bps", 0) / 100 for spec in specs])
+        sensitivity = np.array([RATE_SENSITIVITY.get(sector, DEFAULT_RATE_SENSITIVITY) for sector in sectors])
+        fx = np.array([spec.get("fx", {}).get(f"USD_{BASE_CURRENCY}", 0.0) for spec in specs])
+
+        local = sector_shocks[:, sector_codes] + country_shocks[:, country_codes]
+        local += np.outer(rates, sensitivity[sector_codes])
+        for row, spec in enumerate(specs):
+            for symbol, shock in spec.get("symbol", {}).items():
+                column = holdings.index_of(symbol)
+                if column is not None:
+                    local[row, column] += shock
+        return (1 + local) * (1 + np.outer(fx, foreign)) - 1
+
+    def _resolve(self, scenarios: Optional[Sequence[Any]]) -> List[Tuple[str, Mapping[str, Any]]]:
+        """(key, scenario) pairs; all registered scenarios by default"""
+        if scenarios is None:
+            return list(self.scenarios.items())
+        resolved = []
+        for index, scenario in enumerate(scenarios):
+            if isinstance(scenario, str):
+                if scenario in self.scenarios:
+                    resolved.append((scenario, self.scenarios[scenario]))
+            else:
+                resolved.append((scenario.get("key", f"custom_{index}"), scenario))
+        return resolved
+
+    def _inr_values(self, holdings) -> Tuple[np.ndarray, np.ndarray]:
+        """Holding values in INR and a 1/0 flag for USD holdings"""
+        currencies = [COUNTRY_CURRENCY.get(record.get("country", ""), BASE_CURRENCY) for record in holdings.records]
+        rates = {currency: 1.0 if currency == BASE_CURRENCY else currency_service.get_exchange_rate(currency, BASE_CURRENCY)
+                 for currency in set(currencies)}
+        fx = np.array([rates[currency] for currency in currencies])
+        foreign = np.array([currency == "USD" for currency in currencies], dtype=np.float64)
+        return holdings.current_value * fx, foreign
+
+
+def is_stress_query(query: str) -> bool:
+    """Whether a chat query asks for a stress test or the portfolio impact of a registered scenario"""
+    query = query.lower()
+    if "stress test" in query:
+        return True
+    return any(phrase in query for phrase in STRESS_PHRASES) and bool(match_scenarios(query))
+
+
+def is_traffic_query(query: str) -> bool:
+    """Whether a chat query is about traffic or logistics disruption in India or the USA"""
+    query = query.lower()
+    return re.search(r"\b(traffic|logistics?)\b", query) is not None and re.search(r"\b(india|usa)\b", query) is not None
+
+
+def is_news_impact_query(query: str) -> bool:
+    """Whether a chat query asks how news or a regional event affects the holdings"""
+    query = query.lower()
+    return ("news" in query and "impact" in query) or is_traffic_query(query)
+
+
+def match_scenarios(query: str) -> List[str]:
+    """Registered scenarios a news or event query refers to (empty means none in particular)"""
+    query = query.lower()
+    matches = [key for key, pattern in SCENARIO_PATTERNS.items() if re.search(pattern, query)]
+    if re.search(r"\b(traffic|logistics?)\b", query):
+        if "india" in query:
+            matches.append("india_logistics_disruption")
+        if re.search(r"\b(usa|us|america)\b", query):
+            matches.append("us_logistics_disruption")
+    return matches
+
+
+def _shock_matrix(specs: Sequence[Mapping[str, Any]], field: str, labels: Sequence[str]) -> np.ndarray:
+    """Scenarios x categories shocks for one field (case-insensitive label match)"""
+    codes = {label.lower(): code for code, label in enumerate(labels)}
+    matrix = np.zeros((len(specs), len(labels)))
+    for row, spec in enumerate(specs):
+        for label, shock in spec.get(field, {}).items():
+            code = codes.get(label.lower())
+            if code is not None:
+                matrix[row, code] += shock
+    return matrix
+
+
+def _one_hot(codes: np.ndarray, size: int) -> np.ndarray:
+    """Holdings x categories indicator matrix"""
+    matrix = np.zeros((len(codes), size))
+    matrix[np.arange(len(codes)), codes] = 1.0
+    return matrix
+
+
+# Global instance
+stress_test_engine = StressTestEngine()
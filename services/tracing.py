@@ -0,0 +1,186 @@
+import contextvars
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import config
+
+# Quantiles reported per stage
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Span:
+    """Timed stage of a request with nested child spans"""
+
+    __slots__ = ("name", "started_at", "duration", "children", "attributes", "error")
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.started_at = time.perf_counter()
+        self.duration = None
+        self.children = []
+        self.attributes = attributes or {}
+        self.error = None
+
+    def finish(self):
+        """Record the span's duration"""
+        self.duration = time.perf_counter() - self.started_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Span tree with durations in milliseconds"""
+        result = {
+            "name": self.name,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None
+        }
+        if self.attributes:
+            result["attributes"] = dict(self.attributes)
+        if self.error:
+            result["error"] = self.error
+        if self.children:
+            result["children"] = [child.to_dict() for child in list(self.children)]
+        return result
+
+
+class StageMetrics:
+    """Per-stage latency counters with a sliding window of recent samples for quantiles"""
+
+    def __init__(self, window: int = 2048):
+        self.window = window
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, duration: float, error: bool = False):
+        """Record one stage duration in seconds"""
+        with self._lock:
+            metrics = self._stages.get(stage)
+            if metrics is None:
+                metrics = {"count": 0, "sum": 0.0, "errors": 0, "samples": deque(maxlen=self.window)}
+                self._stages[stage] = metrics
+            metrics["count"] += 1
+            metrics["sum"] += duration
+            metrics["samples"].append(duration)
+            if error:
+                metrics["errors"] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Count, sum, errors and quantiles (seconds) per stage"""
+        with self._lock:
+            stages = {stage: (metrics["count"], metrics["sum"], metrics["errors"], list(metrics["samples"]))
+                      for stage, metrics in self._stages.items()}
+
+        result = {}
+        for stage, (count, total, errors, samples) in sorted(stages.items()):
+            samples.sort()
+            result[stage] = {
+                "count": count,
+                "sum": total,
+                "errors": errors,
+                "quantiles": {quantile: _quantile(samples, quantile) for quantile in QUANTILES}
+            }
+        return result
+
+    def prometheus_text(self) -> str:
+        """Stage metrics in the Prometheus text exposition format"""
+        stages = self.snapshot()
+        lines = [
+            "# HELP wealthlens_stage_latency_seconds Latency of request stages (recent window quantiles)",
+            "# TYPE wealthlens_stage_latency_seconds summary"
+        ]
+        for stage, metrics in stages.items():
+            label = _escape_label(stage)
+            for quantile, value in metrics["quantiles"].items():
+                lines.append(f'wealthlens_stage_latency_seconds{{stage="{label}",quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'wealthlens_stage_latency_seconds_sum{{stage="{label}"}} {metrics["sum"]:.6f}')
+            lines.append(f'wealthlens_stage_latency_seconds_count{{stage="{label}"}} {metrics["count"]}')
+
+        lines.append("# HELP wealthlens_stage_errors_total Stages that raised an exception")
+        lines.append("# TYPE wealthlens_stage_errors_total counter")
+        for stage, metrics in stages.items():
+            lines.append(f'wealthlens_stage_errors_total{{stage="{_escape_label(stage)}"}} {metrics["errors"]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop all recorded samples"""
+        with self._lock:
+            self._stages.clear()
+
+
+_current_span = contextvars.ContextVar("wealthlens_current_span", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """Time a stage, nesting it under the current span and recording it in stage metrics"""
+    if not config.TRACING_ENABLED:
+        yield None
+        return
+
+    current = Span(name, attributes)
+    parent = _current_span.get()
+    if parent is not None:
+        parent.children.append(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+        stage_metrics.observe(name, current.duration, current.error is not None)
+
+
+def traced(name: str) -> Callable:
+    """Decorator that runs a function inside span(name)"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span() -> Optional[Span]:
+    """Innermost active span, if any"""
+    return _current_span.get()
+
+
+def set_attribute(key: str, value: Any):
+    """Set an attribute on the current span, if any"""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes[key] = value
+
+
+def record_error(error: Exception):
+    """Mark the current span as failed when the error is handled rather than raised"""
+    current = _current_span.get()
+    if current is not None:
+        current.error = type(error).__name__
+
+
+def run_in_context(func: Callable) -> Callable:
+    """Bind func to a copy of the current context so spans nest across thread pools"""
+    context = contextvars.copy_context()
+    return functools.partial(context.run, func)
+
+
+def _quantile(sorted_samples: List[float], quantile: float) -> float:
+    """Nearest-rank quantile of sorted samples (0 when empty)"""
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, int(round(quantile * len(sorted_samples))) - 1))
+    return sorted_samples[index]
+
+
+def _escape_label(value: str) -> str:
+    """Escape a Prometheus label value"""
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+# Global instance
+stage_metrics = StageMetrics(window=config.TRACING_SAMPLE_WINDOW)
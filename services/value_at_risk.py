@@ -0,0 +1,249 @@
+from collections import OrderedDict
+from statistics import NormalDist
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import config
+from services.currency_service import currency_service
+from services.risk_engine import risk_engine
+from services.tracing import traced
+
+# Currency of holdings by country; anything else is priced in INR
+COUNTRY_CURRENCY = {"USA": "USD"}
+
+BASE_CURRENCY = "INR"
+
+# Supported VaR methods; monte_carlo is opt-in (see VAR_METHODS)
+METHODS = ("historical", "parametric", "monte_carlo")
+
+
+class ValueAtRiskService:
+    """Value at risk and expected shortfall (CVaR) of portfolio holdings in INR.
+
+    Historical, parametric (delta-normal) and Monte Carlo estimates are read off
+    the risk engine's daily returns window and shrunk covariance, for every
+    horizon and confidence level at once. Foreign holdings are valued in INR and
+    carry the currency's own daily moves when FX history is available. Monte Carlo
+    dominates the cost on large portfolios, so it only runs when listed in methods.
+    """
+
+    def __init__(self, confidence_levels: Sequence[float] = (0.95, 0.99), horizons: Sequence[int] = (1, 10),
+                 simulations: int = 10000, fx_symbol: Optional[str] = None, seed: int = 42,
+                 methods: Sequence[str] = ("historical", "parametric"), max_draw_bytes: int = 256 * 2 ** 20):
+        self.confidence_levels = tuple(confidence_levels)
+        self.horizons = tuple(horizons)
+        self.simulations = simulations
+        self.fx_symbol = fx_symbol
+        self.seed = seed
+        self.methods = tuple(methods)
+        self.max_draw_bytes = max_draw_bytes
+        # Draw matrices by width, least recently used first
+        self._draws: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._draw_bytes = 0
+        self._draws_lock = threading.Lock()
+
+    @traced("risk.var")
+    def compute(self, symbols: Sequence[str], values: Sequence[float], countries: Sequence[str],
+                confidence_levels: Optional[Sequence[float]] = None, horizons: Optional[Sequence[int]] = None,
+                methods: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """VaR and CVaR per method (default: the configured ones), horizon and confidence level;
+        None if no holding has history.
+
+        values are in each holding's own currency (countries decide which); losses
+        are reported as positive INR amounts.
+        """
+        levels = np.asarray(confidence_levels or self.confidence_levels, dtype=np.float64)
+        horizons = tuple(horizons or self.horizons)
+        methods = tuple(methods or self.methods)
+
+        exposures, fx_rates = inr_exposures(symbols, values, countries)
+        if not exposures:
+            return None
+        foreign = any(currency != BASE_CURRENCY for currency, _ in exposures.values())
+        wanted = list(exposures) + ([self.fx_symbol] if foreign and self.fx_symbol else [])
+
+        found, returns, covariance = risk_engine.returns_and_covariance(wanted)
+        assets = [symbol for symbol in found if symbol in exposures]
+        if not assets or len(returns) < 2:
+            return None
+
+        positions = np.array([exposures[symbol][1] for symbol in assets])
+        asset_columns = [found.index(symbol) for symbol in assets]
+        fx_column = found.index(self.fx_symbol) if self.fx_symbol in found else None
+        # Holdings whose INR value also moves with the USD/INR rate
+        translated = np.array([fx_column is not None and exposures[symbol][0] == "USD" for symbol in assets])
+
+        results = {}
+        if "historical" in methods:
+            results["historical"] = self._historical(returns, asset_columns, fx_column, translated, positions,
+                                                     levels, horizons)
+        if "parametric" in methods:
+            results["parametric"] = self._parametric(returns, covariance, asset_columns, fx_column, translated,
+                                                     positions, levels, horizons)
+        if "monte_carlo" in methods:
+            results["monte_carlo"] = self._monte_carlo(returns, covariance, asset_columns, fx_column, translated,
+                                                       positions, levels, horizons)
+
+        total = sum(value for _, value in exposures.values())
+        return {
+            "currency": BASE_CURRENCY,
+            "portfolio_value": float(positions.sum()),
+            "coverage": float(positions.sum() / total) if total else 0.0,
+            "observations": len(returns),
+            "fx_rates": fx_rates,
+            "fx_risk": fx_column is not None,
+            "confidence_levels": [float(level) for level in levels],
+            "horizons": list(horizons),
+            "methods": results
+        }
+
+    def _historical(self, returns: np.ndarray, asset_columns: List[int], fx_column: Optional[int],
+                    translated: np.ndarray, positions: np.ndarray, levels: np.ndarray,
+                    horizons: Sequence[int]) -> Dict[str, Any]:
+        """Empirical quantiles of replayed daily P&L; h-day P&L from overlapping windows"""
+        asset_returns = returns[:, asset_columns]
+        if fx_column is not None:
+            asset_returns = (1 + asset_returns) * (1 + np.outer(returns[:, fx_column], translated)) - 1
+        daily_pnl = asset_returns @ positions
+        cumulative = np.concatenate([[0.0], np.cumsum(daily_pnl)])
+
+        by_horizon = {}
+        for horizon in horizons:
+            if horizon >= len(cumulative):
+                continue
+            losses = -(cumulative[horizon:] - cumulative[:-horizon])
+            by_horizon[f"{horizon}d"] = _tail_measures(losses, levels, positions.sum())
+        return by_horizon
+
+    def _parametric(self, returns: np.ndarray, covariance: np.ndarray, asset_columns: List[int],
+                    fx_column: Optional[int], translated: np.ndarray, positions: np.ndarray,
+                    levels: np.ndarray, horizons: Sequence[int]) -> Dict[str, Any]:
+        """Delta-normal: P&L ~ N(h * mean, h * exposure' cov exposure) with FX as one more risk factor"""
+        exposure = np.zeros(covariance.shape[0])
+        exposure[asset_columns] = positions
+        if fx_column is not None:
+            exposure[fx_column] += positions[translated].sum()
+        mean = float(returns.mean(axis=0) @ exposure)
+        deviation = float(np.sqrt(max(exposure @ covariance @ exposure, 0.0)))
+
+        normal = NormalDist()
+        quantiles = np.array([normal.inv_cdf(level) for level in levels])
+        # E[loss | loss > VaR] of a normal: mean loss + sigma * pdf(z) / (1 - level)
+        tail_means = np.array([normal.pdf(z) for z in quantiles]) / (1 - levels)
+
+        by_horizon = {}
+        for horizon in horizons:
+            scale = deviation * np.sqrt(horizon)
+            var = -mean * horizon + quantiles * scale
+            cvar = -mean * horizon + tail_means * scale
+            by_horizon[f"{horizon}d"] = _format_levels(levels, var, cvar, positions.sum())
+        return by_horizon
+
+    def _monte_carlo(self, returns: np.ndarray, covariance: np.ndarray, asset_columns: List[int],
+                     fx_column: Optional[int], translated: np.ndarray, positions: np.ndarray,
+                     levels: np.ndarray, horizons: Sequence[int]) -> Dict[str, Any]:
+        """Full revaluation under correlated lognormal h-day returns (one draw set for every horizon)"""
+        count = covariance.shape[0]
+        factor = _cholesky(covariance)
+        shocks = self._standard_normals(count) @ factor.T
+        drift = np.log1p(returns.mean(axis=0)) - 0.5 * np.diag(covariance)
+
+        by_horizon = {}
+        for horizon in horizons:
+            log_returns = drift * horizon + shocks * np.sqrt(horizon)
+            asset_log_returns = log_returns[:, asset_columns]
+            if fx_column is not None:
+                asset_log_returns = asset_log_returns + np.outer(log_returns[:, fx_column], translated)
+            losses = -(np.expm1(asset_log_returns) @ positions)
+            by_horizon[f"{horizon}d"] = _tail_measures(losses, levels, positions.sum())
+        return by_horizon
+
+    def _standard_normals(self, count: int) -> np.ndarray:
+        """Seeded standard normal draws (simulations x count), reused across calls of the same width.
+
+        Cached matrices are evicted least recently used first to stay within max_draw_bytes.
+        """
+        with self._draws_lock:
+            draws = self._draws.get(count)
+            if draws is not None:
+                self._draws.move_to_end(count)
+                return draws
+
+        draws = np.random.default_rng(self.seed).standard_normal((self.simulations, count))
+        if draws.nbytes <= self.max_draw_bytes:
+            with self._draws_lock:
+                if count not in self._draws:
+                    while self._draws and self._draw_bytes + draws.nbytes > self.max_draw_bytes:
+                        _, evicted = self._draws.popitem(last=False)
+                        self._draw_bytes -= evicted.nbytes
+                    self._draws[count] = draws
+                    self._draw_bytes += draws.nbytes
+        return draws
+
+
+def inr_exposures(symbols: Sequence[str], values: Sequence[float],
+                  countries: Sequence[str]) -> Tuple[Dict[str, Tuple[str, float]], Dict[str, float]]:
+    """(currency, INR value) per symbol from values in each holding's currency, plus the exchange rates used"""
+    rates = {BASE_CURRENCY: 1.0}
+    exposures: Dict[str, Tuple[str, float]] = {}
+    for symbol, value, country in zip(symbols, values, countries):
+        if not value or value <= 0:
+            continue
+        currency = COUNTRY_CURRENCY.get(country, BASE_CURRENCY)
+        if currency not in rates:
+            rates[currency] = currency_service.get_exchange_rate(currency, BASE_CURRENCY)
+        held = exposures.get(symbol, (currency, 0.0))[1]
+        exposures[symbol] = (currency, held + float(value) * rates[currency])
+    return exposures, {f"{currency}_{BASE_CURRENCY}": rate for currency, rate in rates.items() if currency != BASE_CURRENCY}
+
+
+def _tail_measures(losses: np.ndarray, levels: np.ndarray, portfolio_value: float) -> Dict[str, Dict[str, float]]:
+    """Empirical VaR (loss quantile) and CVaR (mean loss beyond it) for every level"""
+    ordered = np.sort(losses)
+    var = np.quantile(ordered, levels)
+    # Tail means from a cumulative sum over the sorted losses: one pass for all levels
+    tail_sums = np.concatenate([np.cumsum(ordered[::-1]), [0.0]])
+    starts = np.searchsorted(ordered, var, side="left")
+    tail_counts = len(ordered) - starts
+    cvar = np.where(tail_counts > 0, tail_sums[np.maximum(tail_counts - 1, 0)] / np.maximum(tail_counts, 1), var)
+    return _format_levels(levels, var, cvar, portfolio_value)
+
+
+def _format_levels(levels: np.ndarray, var: np.ndarray, cvar: np.ndarray,
+                   portfolio_value: float) -> Dict[str, Dict[str, float]]:
+    """{'95%': {var, cvar, var_pct, cvar_pct}} for each confidence level"""
+    return {
+        f"{level * 100:g}%": {
+            "var": float(var_value),
+            "cvar": float(cvar_value),
+            "var_pct": float(var_value / portfolio_value) if portfolio_value else 0.0,
+            "cvar_pct": float(cvar_value / portfolio_value) if portfolio_value else 0.0
+        }
+        for level, var_value, cvar_value in zip(levels, var, cvar)
+    }
+
+
+def _cholesky(covariance: np.ndarray) -> np.ndarray:
+    """Lower Cholesky factor, with eigenvalue clipping if rounding left the matrix indefinite"""
+    try:
+        return np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+
+
+def _parse_list(value: str, cast) -> List[Any]:
+    """Comma-separated config value as a list"""
+    return [cast(item) for item in value.split(",") if item.strip()]
+
+
+# Global instance
+var_service = ValueAtRiskService(
+    confidence_levels=_parse_list(config.VAR_CONFIDENCE_LEVELS, float),
+    horizons=_parse_list(config.VAR_HORIZONS, int),
+    simulations=config.VAR_SIMULATIONS,
+    fx_symbol=config.VAR_FX_SYMBOL or None,
+    seed=config.VAR_SEED,
+    methods=_parse_list(config.VAR_METHODS, str.strip),
+    max_draw_bytes=int(config.VAR_DRAW_CACHE_MB * 2 ** 20)
+)
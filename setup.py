@@ -23,8 +23,8 @@ def run_command(command, description):
 
 def check_python_version():
     """Check if Python version is compatible"""
-    if sys.version_info < (3, 8):
-        print("❌ Python 3.8 or higher is required")
+    if sys.version_info < (3, 10):
+        print("❌ Python 3.10 or higher is required")
         return False
     print(f"✅ Python {sys.version_info.major}.{sys.version_info.minor} detected")
     return True
@@ -185,7 +185,7 @@ def main():
     print("\n📋 Next steps:")
     print("1. Update API keys in .env file")
     print("2. Start the server: python main.py")
-    print("3. Run tests: python test_system.py")
+    print("3. Run the offline load test: python -m benchmarks.load_test")
     print("4. Open API docs: http://localhost:8000/docs")
     print("\n📚 Documentation:")
     print("- README.md: Complete setup and usage guide")
@@ -0,0 +1,94 @@
+"""Batch indicator engine against per-symbol pandas reference implementations."""
+
+import os
+
+# Must be set before config is imported: no background refresh or on-disk bar store
+os.environ.setdefault("MARKET_REFRESH_ENABLED", "false")
+os.environ.setdefault("BAR_STORE_ENABLED", "false")
+
+import numpy as np
+import pandas as pd
+import pytest
+from services.indicator_engine import IndicatorEngine, stack_bars
+
+
+def _bars(seed: int, dates: pd.DatetimeIndex) -> pd.DataFrame:
+    """Random-walk OHLCV bars on the given trading dates"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    volume = rng.integers(1000, 5000, len(dates)).astype(np.float64)
+    return pd.DataFrame({"Close": close, "Volume": volume}, index=dates)
+
+
+def _reference(frame: pd.DataFrame) -> pd.Series:
+    """Latest indicators for one symbol with plain pandas"""
+    close = frame["Close"]
+    delta = close.diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    loss = (-delta).clip(lower=0).ewm(alpha=1 / 14, adjust=False, min_periods=14).mean()
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    macd_signal = macd.ewm(span=9, adjust=False).mean()
+    bb_middle = close.rolling(20).mean()
+    bb_std = close.rolling(20).std(ddof=0)
+    bb_upper = bb_middle + 2 * bb_std
+    bb_lower = bb_middle - 2 * bb_std
+    reference = pd.DataFrame({
+        "close": close,
+        "rsi": 100 - 100 / (1 + gain / loss),
+        "macd": macd,
+        "macd_signal": macd_signal,
+        "macd_histogram": macd - macd_signal,
+        "sma_20": close.rolling(20).mean(),
+        "sma_50": close.rolling(50).mean(),
+        "ema_20": close.ewm(span=20, adjust=False).mean(),
+        "bb_upper": bb_upper,
+        "bb_middle": bb_middle,
+        "bb_lower": bb_lower,
+        "bb_percent_b": (close - bb_lower) / (bb_upper - bb_lower),
+        "support": close.rolling(20, min_periods=1).min(),
+        "resistance": close.rolling(20, min_periods=1).max(),
+        "volume": frame["Volume"],
+        "avg_volume": frame["Volume"].rolling(20, min_periods=1).mean()
+    })
+    return reference.iloc[-1]
+
+
+@pytest.fixture
+def history():
+    """Symbols on different exchange calendars and with different history lengths"""
+    weekdays = pd.bdate_range("2024-01-01", "2024-06-28")
+    indian = weekdays.drop(pd.to_datetime(["2024-01-26", "2024-03-25", "2024-04-11", "2024-05-01"]))
+    american = weekdays.drop(pd.to_datetime(["2024-01-15", "2024-02-19", "2024-03-29", "2024-05-27"]))
+    return {
+        "RELIANCE.NS": _bars(1, indian),
+        "AAPL": _bars(2, american),
+        "NEWCO": _bars(3, american[-30:])
+    }
+
+
+def test_latest_matches_pandas_reference(history):
+    close, volume = stack_bars(history)
+    latest = IndicatorEngine().latest(close, volume)
+
+    for symbol, frame in history.items():
+        expected = _reference(frame)
+        pd.testing.assert_series_equal(latest.loc[symbol, expected.index], expected, check_names=False,
+                                       rtol=1e-9, atol=1e-9)
+
+
+def test_symbol_indicators_do_not_depend_on_the_batch(history):
+    engine = IndicatorEngine()
+    together = engine.latest(*stack_bars(history))
+
+    for symbol in history:
+        alone = engine.latest(*stack_bars({symbol: history[symbol]}))
+        pd.testing.assert_series_equal(together.loc[symbol], alone.loc[symbol], rtol=1e-12, atol=1e-12)
+
+
+def test_repeated_date_keeps_the_later_bar(history):
+    frame = history["AAPL"]
+    revised = pd.concat([frame, frame.iloc[[-1]].assign(Close=frame["Close"].iloc[-1] * 1.01)])
+    close, _ = stack_bars({"AAPL": revised})
+
+    assert len(close) == len(frame)
+    assert close["AAPL"].iloc[-1] == pytest.approx(frame["Close"].iloc[-1] * 1.01)
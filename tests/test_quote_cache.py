@@ -0,0 +1,135 @@
+"""QuoteCache coalescing, stale-while-revalidate and LRU eviction."""
+
+import threading
+import time
+import pytest
+import services.quote_cache as quote_cache
+from services.quote_cache import QuoteCache
+from services.quote_provider import StaticQuoteProvider
+
+
+class FakeClock:
+    """Monotonic clock the tests advance by hand"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class GatedProvider(StaticQuoteProvider):
+    """Static quotes whose loads block until released, so concurrent misses overlap"""
+
+    def __init__(self, prices):
+        super().__init__(prices)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def get_quotes(self, symbols):
+        self.started.set()
+        self.release.wait(5)
+        return super().get_quotes(symbols)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(quote_cache, "time", clock)
+    return clock
+
+
+def _wait_for_refresh(cache: QuoteCache):
+    """Block until background refreshes have finished"""
+    deadline = time.monotonic() + 5
+    while cache.stats()["inflight"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_concurrent_misses_share_one_load():
+    provider = GatedProvider({"TCS.NS": 3191.0, "AAPL": 175.0})
+    cache = QuoteCache(ttl=60, name="test")
+    results = []
+
+    def fetch():
+        results.append(cache.get_many(["TCS.NS", "AAPL"], provider.get_quotes))
+
+    first = threading.Thread(target=fetch)
+    first.start()
+    assert provider.started.wait(5)
+    others = [threading.Thread(target=fetch) for _ in range(4)]
+    for thread in others:
+        thread.start()
+    time.sleep(0.05)
+    provider.release.set()
+    for thread in [first] + others:
+        thread.join(5)
+
+    assert provider.request_count == 1
+    assert results == [{"TCS.NS": 3191.0, "AAPL": 175.0}] * 5
+    stats = cache.stats()
+    assert stats["loads"] == 1
+    assert stats["coalesced"] == 8
+
+
+def test_fresh_entries_are_hits(clock):
+    provider = StaticQuoteProvider({"AAPL": 175.0})
+    cache = QuoteCache(ttl=60, name="test")
+
+    assert cache.get("AAPL", provider.get_quotes) == 175.0
+    provider.set_price("AAPL", 180.0)
+    clock.now += 59
+    assert cache.get("AAPL", provider.get_quotes) == 175.0
+    assert provider.request_count == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(clock):
+    provider = StaticQuoteProvider({"AAPL": 175.0})
+    cache = QuoteCache(ttl=60, stale_ttl=30, name="test")
+    cache.get("AAPL", provider.get_quotes)
+
+    provider.set_price("AAPL", 180.0)
+    clock.now += 70
+    assert cache.get("AAPL", provider.get_quotes) == 175.0
+    _wait_for_refresh(cache)
+
+    assert provider.request_count == 2
+    assert cache.get("AAPL", provider.get_quotes) == 180.0
+    stats = cache.stats()
+    assert stats["stale_hits"] == 1
+    assert stats["refreshes"] == 1
+
+
+def test_expired_entry_is_reloaded_before_returning(clock):
+    provider = StaticQuoteProvider({"AAPL": 175.0})
+    cache = QuoteCache(ttl=60, stale_ttl=30, name="test")
+    cache.get("AAPL", provider.get_quotes)
+
+    provider.set_price("AAPL", 180.0)
+    clock.now += 91
+    assert cache.get("AAPL", provider.get_quotes) == 180.0
+    assert cache.stats()["misses"] == 2
+
+
+def test_failed_load_is_not_cached():
+    cache = QuoteCache(ttl=60, name="test")
+
+    def failing(keys):
+        raise RuntimeError("provider down")
+
+    assert cache.get("AAPL", failing) is None
+    assert cache.get("AAPL", StaticQuoteProvider({"AAPL": 175.0}).get_quotes) == 175.0
+    assert cache.stats()["load_errors"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    provider = StaticQuoteProvider({"A": 1.0, "B": 2.0, "C": 3.0})
+    cache = QuoteCache(ttl=60, max_size=2, name="test")
+    cache.get_many(["A", "B"], provider.get_quotes)
+    cache.get("A", provider.get_quotes)
+    cache.get("C", provider.get_quotes)
+
+    assert cache.peek("B") is None
+    assert cache.peek_many(["A", "C"]) == {"A": 1.0, "C": 3.0}
+    assert cache.stats()["evictions"] == 1
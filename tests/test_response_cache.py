@@ -0,0 +1,35 @@
+"""Response cache semantic keys."""
+
+import os
+
+# Must be set before config is imported: no background refresh or on-disk bar store
+os.environ.setdefault("MARKET_REFRESH_ENABLED", "false")
+os.environ.setdefault("BAR_STORE_ENABLED", "false")
+
+from services.response_cache import ResponseCache, extract_actions, extract_entities
+
+STOCKS = [{"symbol": "TCS.NS", "name": "Tata Consultancy Services"}, {"symbol": "AAPL", "name": "Apple Inc."}]
+
+
+def _semantic_key(cache: ResponseCache, query: str) -> str:
+    """Semantic key for an advice query on version 1 of the default portfolio"""
+    intent = {"primary": "investment_advice", "secondary": ["portfolio_analysis"]}
+    return cache.semantic_key(intent, extract_entities(query, STOCKS), extract_actions(query), "normal", None, 1)
+
+
+def test_buy_and_sell_of_the_same_holding_do_not_share_an_entry():
+    cache = ResponseCache(ttl=60, semantic=True)
+    buy = _semantic_key(cache, "Should I buy TCS?")
+    sell = _semantic_key(cache, "should I sell TCS")
+    assert buy != sell
+
+    cache.set([buy], {"response": "buy"})
+    assert cache.get([sell]) is None
+    assert cache.get([_semantic_key(cache, "should i buy more tcs")]) == {"response": "buy"}
+
+
+def test_actions_include_scenarios_and_simulated_moves():
+    assert extract_actions("should I trim AAPL") == ["sell"]
+    assert extract_actions("how much would an oil shock hit me") == ["oil_shock"]
+    assert extract_actions("what if the market crashes 20%") == ["global_selloff", "initial_shock=-0.2"]
+    assert extract_actions("what if the market falls 10%") != extract_actions("what if the market falls 20%")
@@ -0,0 +1,59 @@
+"""Master agent routing of stress, news-impact and what-if queries."""
+
+import os
+
+# Must be set before config is imported: no background refresh or on-disk bar store
+os.environ.setdefault("MARKET_REFRESH_ENABLED", "false")
+os.environ.setdefault("BAR_STORE_ENABLED", "false")
+
+import pytest
+from agents.master_agent import MasterAgent
+from services.monte_carlo import is_sell_query
+
+
+@pytest.fixture(scope="module")
+def master():
+    return MasterAgent()
+
+
+@pytest.mark.parametrize("query", [
+    "how much would an oil shock hit me",
+    "what is the impact of rbi rates on my portfolio",
+    "run a stress test on my portfolio",
+    "news impact on my portfolio",
+    "how will traffic in india affect my stocks",
+])
+def test_event_and_news_impact_go_to_news_analyzer(master, query):
+    assert master._classify_intent(query)["primary"] == "news_analysis"
+
+
+@pytest.mark.parametrize("query", [
+    "how much would it cost to buy 10 AAPL shares",
+    "how much would I make if I invest 10000 in TCS",
+    "how much would my portfolio be worth in 5 years",
+    "what is the best case scenario for my portfolio",
+])
+def test_queries_without_a_scenario_are_not_stress_tests(master, query):
+    assert master._classify_intent(query)["primary"] != "news_analysis"
+
+
+@pytest.mark.parametrize("query, intent", [
+    ("what if the market crashes 20%, worst case scenario?", "risk_assessment"),
+    ("what happens to my portfolio if rates rise", "risk_assessment"),
+    ("what if I buy more TCS", "investment_advice"),
+    ("what if I trim TCS", "investment_advice"),
+])
+def test_what_ifs_go_to_the_simulation_agents(master, query, intent):
+    assert master._classify_intent(query)["primary"] == intent
+
+
+@pytest.mark.parametrize("query, sell", [
+    ("what if I buy more TCS", False),
+    ("what if I add 50 INFY shares", False),
+    ("what if I sell my AAPL", True),
+    ("what if I trim TCS", True),
+    ("what if I reduce my tech exposure", True),
+    ("what if I exit HDFCBANK", True),
+])
+def test_trade_what_ifs_are_split_into_buys_and_sells(query, sell):
+    assert is_sell_query(query) is sell
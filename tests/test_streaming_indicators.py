@@ -0,0 +1,128 @@
+"""Streaming indicator states against the batch engine, checkpoints and live bar keys."""
+
+import os
+
+# Must be set before config is imported: no background refresh or on-disk bar store
+os.environ.setdefault("MARKET_REFRESH_ENABLED", "false")
+os.environ.setdefault("BAR_STORE_ENABLED", "false")
+
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+import pytest
+from services.indicator_engine import INDICATOR_COLUMNS, IndicatorEngine, stack_bars
+from services.streaming_indicators import IndicatorState, StreamingIndicators, _live_bar, session_bar
+
+
+def _bars(seed: int, dates: pd.DatetimeIndex) -> pd.DataFrame:
+    """Random-walk OHLCV bars on the given trading dates"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    volume = rng.integers(1000, 5000, len(dates)).astype(np.float64)
+    return pd.DataFrame({"Close": close, "Volume": volume}, index=dates)
+
+
+def _batch(frame: pd.DataFrame) -> pd.Series:
+    """Latest batch engine values for one symbol"""
+    return IndicatorEngine().latest(*stack_bars({"X": frame})).loc["X"]
+
+
+def _assert_matches(values: dict, expected: pd.Series):
+    """Streaming values (None for too short a history) equal the batch row (NaN)"""
+    actual = pd.Series({name: np.nan if values[name] is None else values[name] for name in INDICATOR_COLUMNS})
+    pd.testing.assert_series_equal(actual, expected.reindex(INDICATOR_COLUMNS).astype(float), check_names=False,
+                                   rtol=1e-9, atol=1e-9)
+
+
+@pytest.fixture
+def history():
+    """Symbols with long, short and single-bar histories"""
+    dates = pd.bdate_range("2024-01-01", "2024-06-28")
+    return {
+        "RELIANCE.NS": _bars(1, dates),
+        "NEWCO": _bars(2, dates[-30:]),
+        "LISTED": _bars(3, dates[-1:])
+    }
+
+
+def test_seeded_states_match_the_batch_engine_and_a_replay(history):
+    streaming = StreamingIndicators()
+    streaming.seed_many(history)
+
+    for symbol, frame in history.items():
+        _assert_matches(streaming.latest(symbol), _batch(frame))
+        replay = IndicatorState()
+        for timestamp, close, volume in zip(frame.index, frame["Close"], frame["Volume"]):
+            replay.update(float(close), float(volume), timestamp.date().isoformat())
+        _assert_matches(streaming.latest(symbol), pd.Series(replay.values(), dtype=float))
+
+
+def test_live_bars_and_revisions_match_the_batch_engine(history):
+    frame = history["RELIANCE.NS"]
+    streaming = StreamingIndicators()
+    streaming.seed("RELIANCE.NS", frame.iloc[:-1])
+
+    streaming.update("RELIANCE.NS", frame["Close"].iloc[-1] * 0.99, frame["Volume"].iloc[-1], "2024-06-28")
+    streaming.update("RELIANCE.NS", frame["Close"].iloc[-1], frame["Volume"].iloc[-1], "2024-06-28")
+    _assert_matches(streaming.latest("RELIANCE.NS"), _batch(frame))
+
+
+def test_checkpoint_round_trip_continues_identically(history, tmp_path):
+    path = tmp_path / "indicators.json"
+    streaming = StreamingIndicators()
+    streaming.seed_many(history)
+    streaming.save(str(path))
+
+    restored = StreamingIndicators()
+    assert restored.load(str(path)) == len(history)
+    for symbol in history:
+        assert restored.latest(symbol) == streaming.latest(symbol)
+        assert restored.update(symbol, 101.5, 2000.0, "2024-07-01") == streaming.update(symbol, 101.5, 2000.0,
+                                                                                           "2024-07-01")
+
+
+def test_checkpoint_with_another_version_is_ignored(history):
+    streaming = StreamingIndicators()
+    streaming.seed_many(history)
+    checkpoint = dict(streaming.checkpoint(), version=0)
+
+    assert StreamingIndicators().restore(checkpoint) == 0
+
+
+def test_behind_until_seeded_with_the_latest_bar(history):
+    frame = history["NEWCO"]
+    streaming = StreamingIndicators()
+    assert streaming.is_behind("NEWCO", frame)
+
+    streaming.seed("NEWCO", frame.iloc[:-1])
+    assert streaming.is_behind("NEWCO", frame)
+    streaming.seed("NEWCO", frame)
+    assert not streaming.is_behind("NEWCO", frame)
+
+
+def test_live_bar_revises_outside_sessions_and_on_unchanged_prices():
+    state = IndicatorState()
+    state.update(100.0, None, "2024-06-28")
+
+    assert _live_bar(state, 101.0, "2024-07-01") == "2024-07-01"
+    assert _live_bar(state, 101.0, None) == "2024-06-28"
+    assert _live_bar(state, 100.0, "2024-07-01") == "2024-06-28"
+    assert _live_bar(state, 101.0, "2024-06-27") == "2024-06-28"
+    assert _live_bar(IndicatorState(), 101.0, "2024-07-01") == "2024-07-01"
+
+
+@pytest.mark.parametrize("symbol, now, bar", [
+    # 09:00 and 09:30 IST on a Monday
+    ("TCS.NS", datetime(2024, 7, 1, 3, 30, tzinfo=timezone.utc), None),
+    ("TCS.NS", datetime(2024, 7, 1, 4, 0, tzinfo=timezone.utc), "2024-07-01"),
+    ("TCS.BO", datetime(2024, 7, 1, 4, 0, tzinfo=timezone.utc), "2024-07-01"),
+    # 09:00 and 10:00 in New York (EDT) on the same Monday
+    ("AAPL", datetime(2024, 7, 1, 13, 0, tzinfo=timezone.utc), None),
+    ("AAPL", datetime(2024, 7, 1, 14, 0, tzinfo=timezone.utc), "2024-07-01"),
+    # 23:00 Monday in New York is already Tuesday in UTC
+    ("AAPL", datetime(2024, 7, 2, 3, 0, tzinfo=timezone.utc), "2024-07-01"),
+    # Saturday
+    ("TCS.NS", datetime(2024, 7, 6, 6, 0, tzinfo=timezone.utc), None)
+])
+def test_session_bar_uses_the_exchange_calendar_day(symbol, now, bar):
+    assert session_bar(symbol, now) == bar